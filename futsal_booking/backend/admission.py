@@ -0,0 +1,174 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, Tuple
+
+from . import cache, config
+
+# --- Admission Control ---
+# Middleware di depan semua endpoint: (1) token bucket per IP klien, (2) batas request yang
+# diproses bersamaan, terpisah untuk baca (GET) dan tulis (POST/DELETE, mis. booking) sehingga
+# lonjakan polling availability tidak menghabiskan threadpool yang dibutuhkan booking, dan
+# (3) antrean FIFO terbatas di depan batas itu. Request di atas panjang antrean langsung
+# ditolak 429 + Retry-After, bukan ikut antre dan memperlambat semua request yang diterima.
+# Semua state hanya disentuh dari event loop, jadi tidak perlu lock.
+
+READ = "read"
+WRITE = "write"
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Stream SSE berumur panjang & /metrics (harus tetap bisa dibaca saat overload)
+EXEMPT_PREFIXES = ("/events/", "/metrics")
+
+# Alasan penolakan (label metrics)
+RATE_LIMITED = "rate_limited"
+QUEUE_FULL = "queue_full"
+
+
+class Gate:
+    """Semaphore dengan antrean terbatas; limit 0 = tanpa batas."""
+
+    def __init__(self, limit: int, max_queue: int):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> bool:
+        """False jika antrean penuh (request harus ditolak)."""
+        if self.limit <= 0:
+            self.active += 1
+            return True
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot sudah diserahkan tepat sebelum request dibatalkan
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+        return True
+
+    def release(self):
+        # Slot diserahkan langsung ke antrean terdepan (active tidak berubah)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+
+class ClientBuckets:
+    """Token bucket per IP; bucket yang lama tidak dipakai dibuang (LRU)."""
+
+    def __init__(self, rate: float, burst: float, max_clients: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict() # ip -> (token, waktu)
+
+    def take(self, client: str) -> Optional[float]:
+        """None jika request boleh lewat, atau detik sampai token berikutnya tersedia."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = None
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class AdmissionController:
+    def __init__(self):
+        self.gates = {
+            READ: Gate(config.MAX_CONCURRENT_READS, config.MAX_QUEUED_READS),
+            WRITE: Gate(config.MAX_CONCURRENT_WRITES, config.MAX_QUEUED_WRITES),
+        }
+        self.buckets = ClientBuckets(config.RATE_LIMIT_RPS, config.RATE_LIMIT_BURST, config.RATE_LIMIT_MAX_CLIENTS)
+        # Semua key diisi di awal: /metrics membaca dari thread lain tanpa lock
+        self.admitted: Dict[str, int] = {kind: 0 for kind in self.gates}
+        self.shed: Dict[Tuple[str, str], int] = {(kind, reason): 0 for kind in self.gates for reason in (RATE_LIMITED, QUEUE_FULL)}
+
+    def rate_limited(self, client: Optional[str]) -> Optional[float]:
+        if config.RATE_LIMIT_RPS <= 0 or client is None or client in config.RATE_LIMIT_EXEMPT:
+            return None
+        return self.buckets.take(client)
+
+    def stats(self) -> dict:
+        return {
+            "admitted": dict(self.admitted),
+            "shed": {f"{kind}:{reason}": count for (kind, reason), count in self.shed.items()},
+            "in_flight": {kind: gate.active for kind, gate in self.gates.items()},
+            "queued": {kind: gate.queued for kind, gate in self.gates.items()},
+            "clients": len(self.buckets),
+        }
+
+
+controller = AdmissionController()
+
+
+async def reject(send, retry_after: float, detail: str):
+    body = cache.dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            # Retry-After hanya menerima detik bulat
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """Middleware ASGI murni; request yang ditolak tidak pernah menyentuh threadpool maupun DB."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        kind = READ if scope["method"] in READ_METHODS else WRITE
+        client = scope.get("client")
+        wait = controller.rate_limited(client[0] if client else None)
+        if wait is not None:
+            controller.shed[kind, RATE_LIMITED] += 1
+            await reject(send, wait, "Too many requests from this client, retry later")
+            return
+
+        gate = controller.gates[kind]
+        if not await gate.acquire():
+            controller.shed[kind, QUEUE_FULL] += 1
+            await reject(send, config.SHED_RETRY_AFTER_SECONDS, "Server is busy, retry later")
+            return
+        controller.admitted[kind] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
@@ -0,0 +1,131 @@
+from datetime import date
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import async_crud, cache, crud, database, holds, idempotency, models
+from .params import duration_param
+
+# --- Endpoint async (mode FUTSAL_ASYNC_DB) ---
+# Kontrak request/response sama dengan endpoint sync di main.py. Hanya availability dan
+# POST /bookings/ yang punya versi async; endpoint lain tetap sync (threadpool).
+
+router = APIRouter()
+
+@router.get("/courts/{court_id}/availability")
+async def get_availability(
+    court_id: int,
+    date: date,
+    duration: float = 1,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    length = duration_param(duration)
+    entry, generation = cache.availability.get(court_id, date, length)
+    if entry is None:
+        court = await async_crud.get_court(db, court_id)
+        if not court:
+            raise HTTPException(status_code=404, detail="Court not found")
+
+        taken = (await async_crud.get_occupancy(db, court_id, date)).union(holds.store.held(court_id, date))
+        payload = crud.availability_payload(court, taken, length)
+
+        entry = cache.availability.put(court_id, date, payload, generation, length)
+
+    return cache.json_response(entry, if_none_match)
+
+
+def with_sync_session(fn, *args):
+    # Store idempotency memakai Session sync (menunggu/polling), dijalankan di threadpool
+    db = database.SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+@router.post("/bookings/", response_model=models.Booking)
+async def create_booking(
+    booking: models.BookingCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    if idempotency_key is None:
+        return await book(db, booking)
+    if not 1 <= len(idempotency_key) <= idempotency.MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1 to {idempotency.MAX_KEY_LENGTH} characters")
+    try:
+        outcome = await run_in_threadpool(
+            with_sync_session, idempotency.begin, idempotency_key, idempotency.request_hash(booking)
+        )
+    except idempotency.KeyReusedError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except idempotency.InProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if outcome is not None:
+        if outcome.status_code != 200:
+            raise HTTPException(status_code=outcome.status_code, detail=outcome.detail, headers=idempotency.REPLAY_HEADERS)
+        response.headers.update(idempotency.REPLAY_HEADERS)
+        return await db.get(database.Booking, outcome.booking_id)
+
+    try:
+        db_booking = await book(db, booking, idempotency_key)
+    except idempotency.FinalHTTPException as e:
+        await run_in_threadpool(with_sync_session, idempotency.finish, idempotency_key, e.status_code, e.detail)
+        raise
+    except BaseException:
+        await run_in_threadpool(with_sync_session, idempotency.abandon, idempotency_key)
+        raise
+    idempotency.release(idempotency_key)
+    return db_booking
+
+
+async def book(db: AsyncSession, booking: models.BookingCreate, idempotency_key: Optional[str] = None):
+    start_minute = database.time_to_minutes(booking.start_time)
+    end_minute = start_minute + database.duration_minutes(booking.duration)
+    court = await async_crud.get_court(db, booking.court_id)
+    if not court:
+        raise idempotency.FinalHTTPException(status_code=404, detail="Court not found")
+    try:
+        crud.check_operating_hours(court, start_minute, end_minute)
+    except crud.OutsideOperatingHoursError as e:
+        raise idempotency.FinalHTTPException(status_code=422, detail=str(e))
+    try:
+        hold = holds.claim_for_booking(booking.hold_id, booking.court_id, booking.booking_date, start_minute, end_minute)
+    except holds.HoldInvalidError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if hold is None:
+        booked = await async_crud.get_occupancy(db, booking.court_id, booking.booking_date)
+        taken = booked.overlap(start_minute, end_minute)
+        if taken is not None:
+            raise idempotency.FinalHTTPException(status_code=409, detail=str(crud.SlotTakenError(taken)))
+        held = holds.store.held(booking.court_id, booking.booking_date).overlap(start_minute, end_minute)
+        if held is not None:
+            raise HTTPException(status_code=409, detail=str(holds.SlotHeldError(held)))
+
+    try:
+        db_booking = await async_crud.create_booking(db=db, booking=booking, idempotency_key=idempotency_key)
+    except crud.SlotTakenError as e:
+        raise idempotency.FinalHTTPException(status_code=409, detail=str(e))
+    except Exception:
+        if hold is not None:
+            holds.store.restore(hold)
+        raise
+    if db_booking is None:
+        raise idempotency.FinalHTTPException(status_code=404, detail="Court not found")
+    return db_booking
+
+
+def install(app: FastAPI):
+    """Ganti route sync dengan path & method yang sama oleh route async di atas."""
+    replaced = {(route.path, method) for route in router.routes for method in route.methods}
+    app.router.routes[:] = [
+        route for route in app.router.routes
+        if not (isinstance(route, APIRoute) and any((route.path, m) in replaced for m in route.methods))
+    ]
+    app.include_router(router)
@@ -0,0 +1,77 @@
+import asyncio
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import coherence, crud, database, idempotency, models, occupancy, rollups
+
+# --- Versi async dari fungsi CRUD (mode FUTSAL_ASYNC_DB) ---
+# Logika pembentukan booking/slot & error dibagi dengan crud agar perilakunya sama persis.
+
+async def get_court(db: AsyncSession, court_id: int):
+    return await db.get(database.Court, court_id)
+
+async def get_bookings_on_date(db: AsyncSession, court_id: int, date: date):
+    result = await db.execute(select(database.Booking).filter(
+        database.Booking.court_id == court_id,
+        database.Booking.booking_date == date
+    ))
+    return result.scalars().all()
+
+async def get_occupancy(db: AsyncSession, court_id: int, date: date) -> occupancy.Intervals:
+    async def load():
+        return occupancy.from_bookings(await get_bookings_on_date(db, court_id, date))
+    return await occupancy.index.aget(court_id, date, load)
+
+async def get_taken_slots(db: AsyncSession, court_id: int, date: date, start_minute: int, end_minute: int) -> List[int]:
+    result = await db.execute(select(database.BookingSlot.slot_minute).filter(
+        database.BookingSlot.court_id == court_id,
+        database.BookingSlot.booking_date == date,
+        database.BookingSlot.slot_minute >= start_minute,
+        database.BookingSlot.slot_minute < end_minute
+    ).order_by(database.BookingSlot.slot_minute))
+    return list(result.scalars())
+
+async def create_booking(db: AsyncSession, booking: models.BookingCreate, idempotency_key: Optional[str] = None):
+    court = await get_court(db, booking.court_id)
+    if not court:
+        return None
+
+    # Setelah rollback atribut court kedaluwarsa, dan lazy load tidak bisa di-await
+    price = court.price
+    for attempt in range(crud.BOOKING_MAX_ATTEMPTS):
+        db_booking = crud.new_booking(booking, price)
+        start_minute, end_minute = db_booking.start_minute, db_booking.end_minute
+        try:
+            db.add(db_booking)
+            await db.flush()
+            db.add_all(crud.new_booking_slots(db_booking))
+            await db.execute(rollups.upsert_statement(), rollups.deltas(
+                [(db_booking.court_id, db_booking.booking_date, db_booking.duration, db_booking.total_price)]
+            ))
+            if idempotency_key is not None:
+                await db.execute(idempotency.booking_statement(idempotency_key, db_booking.id))
+            changes = coherence.rows([coherence.booking_change(
+                booking.court_id, booking.booking_date, start_minute, end_minute, booking.hold_id
+            )])
+            if changes:
+                await db.execute(coherence.insert_statement(), changes)
+            await db.commit()
+            crud.booking_committed(booking.court_id, booking.booking_date, start_minute, end_minute)
+            break
+        except IntegrityError:
+            await db.rollback()
+            crud.slots_changed(booking.court_id, booking.booking_date)
+            taken = await get_taken_slots(db, booking.court_id, booking.booking_date, start_minute, end_minute)
+            raise crud.SlotTakenError(taken[0] if taken else start_minute)
+        except OperationalError:
+            await db.rollback()
+            if attempt == crud.BOOKING_MAX_ATTEMPTS - 1:
+                raise
+            await asyncio.sleep(crud.retry_delay(attempt))
+
+    await db.refresh(db_booking)
+    return db_booking
@@ -0,0 +1,203 @@
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from starlette.responses import Response
+
+from . import config
+
+try:
+    import orjson
+except ImportError: # opsional; tanpa orjson dipakai json bawaan
+    orjson = None
+
+
+# --- Encoder JSON Cepat ---
+# Respons dinamis tanpa response_model dikirim sebagai bytes dari dumps(), melewati
+# jsonable_encoder FastAPI yang menelusuri payload objek demi objek.
+
+def _encode_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, default=_encode_default)
+    return json.dumps(payload, separators=(",", ":"), default=_encode_default).encode()
+
+def fast_json(payload, status_code: int = 200) -> Response:
+    """Respons JSON untuk payload yang dibangun server sendiri (tanpa validasi ulang)."""
+    return Response(dumps(payload), status_code=status_code, media_type="application/json")
+
+
+# --- Cache Respons Availability (in-process, LRU) ---
+# Key (court_id, tanggal) -> per varian (durasi dalam menit) body JSON yang sudah jadi + ETag.
+# Semua varian sebuah key dibuang tepat saat booking untuk key tersebut di-commit, jadi isi
+# cache tidak pernah basi di proses ini. maxsize membatasi jumlah varian (body) di semua key.
+
+Key = Tuple[int, date]
+
+
+class Entry(NamedTuple):
+    etag: str
+    body: bytes
+
+
+class ResponseCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Key, Dict[int, Entry]]" = OrderedDict()
+        # Hasil hitung yang dimulai sebelum invalidate key-nya tidak disimpan. Satu clock global
+        # naik setiap invalidate; per key hanya disimpan clock invalidate terakhirnya, untuk
+        # paling banyak maxsize key (yang terlama dilupakan). _floor = clock invalidate terbaru
+        # yang sudah dilupakan: put() dengan generation lebih tua dari itu ditolak.
+        self._clock = 0
+        self._invalidated: "OrderedDict[Key, int]" = OrderedDict()
+        self._floor = 0
+        self._size = 0 # jumlah varian di semua key
+        self._lock = threading.Lock()
+        # Versi diambil dari satu counter global dan diawali id proses, sehingga ETag
+        # tidak pernah terpakai ulang (juga setelah entry di-evict atau server restart)
+        self._epoch = uuid.uuid4().hex[:8]
+        self._next_version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, court_id: int, date: date, variant: int = 0) -> Tuple[Optional[Entry], int]:
+        """Entry (atau None) beserta generation yang harus diberikan ke put()."""
+        key = (court_id, date)
+        with self._lock:
+            entry = self._entries.get(key, {}).get(variant)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return entry, self._clock
+
+    def put(self, court_id: int, date: date, payload: dict, generation: int, variant: int = 0) -> Entry:
+        key = (court_id, date)
+        body = dumps(payload)
+        with self._lock:
+            self._next_version += 1
+            entry = Entry(f'"{self._epoch}-{self._next_version}"', body)
+            if generation < self._floor or self._invalidated.get(key, 0) > generation:
+                # Ada booking yang masuk selama payload dihitung (atau tidak bisa dipastikan)
+                return entry
+            variants = self._entries.setdefault(key, {})
+            if variant not in variants:
+                self._size += 1
+            variants[variant] = entry
+            self._entries.move_to_end(key)
+            # Key yang paling lama tidak dipakai dibuang utuh; key terbaru selalu disimpan
+            while self._size > self.maxsize and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+            return entry
+
+    def invalidate(self, court_id: int, date: date):
+        key = (court_id, date)
+        with self._lock:
+            self._clock += 1
+            self._invalidated[key] = self._clock
+            self._invalidated.move_to_end(key)
+            if len(self._invalidated) > self.maxsize:
+                _, self._floor = self._invalidated.popitem(last=False)
+            variants = self._entries.pop(key, None)
+            if variants is not None:
+                self._size -= len(variants)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._clock += 1
+            self._floor = self._clock
+            self._invalidated.clear()
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self._size,
+                "keys": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class StaticBodies:
+    """Body JSON yang jarang berubah (daftar lapangan) per key, dipakai ulang sampai invalidate().
+
+    Body dibangun (query + validasi response model + encode) sekali per key; request
+    berikutnya hanya menyalin bytes yang sama.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Entry]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._epoch = uuid.uuid4().hex[:8]
+        self._next_version = 0
+        self.hits = 0
+        self.builds = 0
+
+    def get(self, key: Hashable, build: Callable[[], bytes]) -> Entry:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry
+            generation = self._generation
+        body = build()
+        with self._lock:
+            self.builds += 1
+            self._next_version += 1
+            entry = Entry(f'"{self._epoch}-c{self._next_version}"', body)
+            # Data berubah selama body dibangun: pakai sekali, jangan disimpan
+            if generation == self._generation:
+                self._entries[key] = entry
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            return entry
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "builds": self.builds}
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def json_response(entry: Entry, if_none_match: Optional[str]) -> Response:
+    # no-cache: klien boleh menyimpan, tapi wajib revalidasi lewat If-None-Match
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+
+availability = ResponseCache(config.AVAILABILITY_CACHE_SIZE)
+# Key (skip, limit) GET /courts/; kombinasinya sedikit, jadi batasnya kecil saja
+courts = StaticBodies(64)
@@ -0,0 +1,199 @@
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import create_engine, delete, func, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from . import cache, config, database, occupancy
+
+# --- Koherensi Cache Antar Worker (mode FUTSAL_MULTI_WORKER) ---
+# Beberapa worker uvicorn berbagi satu file SQLite, tetapi cache availability, indeks
+# okupansi, listing courts, hold & broker SSE hidup di memori tiap proses. Setiap perubahan
+# ditulis ke tabel change_log: booking di transaksi yang sama dengan insert-nya, hold dalam
+# transaksi sendiri. Worker lain membaca baris baru (id > yang terakhir dilihat) lalu hanya
+# membuang key (court, tanggal) yang terdampak. Agar cek per request murah, change_log baru
+# dibaca jika PRAGMA data_version koneksi pengawas berubah (ada commit dari koneksi lain).
+
+Change = database.ChangeLog
+
+# Jenis perubahan
+BOOKING = "booking"
+COURTS = "courts"
+HOLD = "hold"
+HOLD_RELEASED = "hold_released"
+
+# Penanda baris milik worker ini (dilewati saat sinkronisasi)
+WORKER_ID = uuid.uuid4().hex
+
+
+def change(kind: str, court_id: Optional[int] = None, booking_date: Optional[date] = None,
+           start_minute: Optional[int] = None, end_minute: Optional[int] = None,
+           hold_id: Optional[str] = None, expires_at: Optional[datetime] = None) -> dict:
+    return {
+        "origin": WORKER_ID, "kind": kind, "court_id": court_id, "booking_date": booking_date,
+        "start_minute": start_minute, "end_minute": end_minute, "hold_id": hold_id,
+        "expires_at": expires_at, "created_at": datetime.utcnow(),
+    }
+
+
+def booking_change(court_id: int, booking_date: date, start_minute: int, end_minute: int,
+                   hold_id: Optional[str] = None) -> dict:
+    """hold_id: hold yang dikonversi oleh booking ini, dibuang diam-diam di worker lain."""
+    return change(BOOKING, court_id, booking_date, start_minute, end_minute, hold_id)
+
+
+def rows(changes: List[dict]) -> List[dict]:
+    """Baris yang perlu di-insert; kosong jika mode multi-worker tidak aktif."""
+    return changes if config.MULTI_WORKER else []
+
+
+def insert_statement():
+    return insert(Change)
+
+
+def record(db: Session, changes: List[dict]):
+    """Catat perubahan; dipanggil sebelum commit transaksi yang membuatnya."""
+    changes = rows(changes)
+    if changes:
+        db.execute(insert_statement(), changes)
+
+
+def record_now(changes: List[dict]):
+    """Catat perubahan state in-memory (hold) dalam transaksi sendiri."""
+    changes = rows(changes)
+    if changes:
+        with database.engine.begin() as conn:
+            conn.execute(insert_statement(), changes)
+
+
+def prune(db: Session) -> int:
+    cutoff = datetime.utcnow() - timedelta(seconds=config.CHANGE_LOG_RETENTION_SECONDS)
+    removed = db.execute(delete(Change).where(Change.created_at < cutoff)).rowcount
+    db.commit()
+    return removed
+
+
+class Watcher:
+    """Terapkan perubahan dari worker lain ke state in-memory worker ini."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engine = None
+        self._conn = None
+        self._version = None
+        self._last_id = 0
+        self._synced_at = 0.0
+        self.applied = 0
+        self.resets = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._conn is not None
+
+    def start(self):
+        """Dipanggil di lifespan setelah skema siap; perubahan sebelum ini sudah ada di DB."""
+        if not config.MULTI_WORKER or (database.is_sqlite and not database.is_file_database()):
+            return
+        # Koneksi khusus di luar pool: data_version bersifat per koneksi, dan sync() yang
+        # berjalan di event loop tidak boleh menunggu koneksi pool yang dipakai handler
+        connect_args = {}
+        if database.is_sqlite:
+            connect_args = {"check_same_thread": False, "timeout": config.SQLITE_PRAGMAS["busy_timeout"] / 1000}
+        self._engine = create_engine(database.DATABASE_URL, poolclass=StaticPool, connect_args=connect_args)
+        with self._lock:
+            self._conn = self._engine.connect()
+            self._version = self._read_version()
+            self._last_id = self._conn.execute(select(func.coalesce(func.max(Change.id), 0))).scalar_one()
+            self._end_read()
+            self._synced_at = time.monotonic()
+
+    def stop(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._engine.dispose()
+                self._conn = self._engine = None
+
+    def sync(self):
+        """Murah jika tidak ada commit baru: satu PRAGMA di koneksi pengawas."""
+        if self._conn is None:
+            return
+        with self._lock:
+            if self._conn is None:
+                return
+            now = time.monotonic()
+            if now - self._synced_at > config.CHANGE_LOG_RETENTION_SECONDS / 2:
+                # Terlalu lama tidak sinkron: baris yang belum dibaca bisa sudah dipangkas
+                self._reset()
+            # Versi dibaca sebelum baris: commit di antara keduanya terdeteksi di sync berikutnya
+            version = self._read_version()
+            if version != self._version:
+                self._version = version
+                changes = self._conn.execute(
+                    select(Change).where(Change.id > self._last_id).order_by(Change.id)
+                ).all()
+                self._end_read()
+                for row in changes:
+                    self._last_id = row.id
+                    if row.origin != WORKER_ID:
+                        apply(row)
+                        self.applied += 1
+            self._synced_at = now
+
+    def _read_version(self):
+        if database.is_sqlite:
+            version = self._conn.exec_driver_sql("PRAGMA data_version").scalar()
+        else:
+            version = self._conn.execute(select(func.max(Change.id))).scalar()
+        self._end_read()
+        return version
+
+    def _end_read(self):
+        # Jangan tahan snapshot baca (menghambat checkpoint WAL)
+        self._conn.rollback()
+
+    def _reset(self):
+        # Hold dari worker lain yang terlewat dilepas tetap hilang sendiri setelah TTL
+        occupancy.index.clear()
+        cache.availability.clear()
+        cache.courts.invalidate()
+        self.resets += 1
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "worker": WORKER_ID, "last_id": self._last_id,
+                "applied": self.applied, "resets": self.resets}
+
+
+def apply(row):
+    # Import lokal: crud & holds sendiri mencatat perubahan lewat modul ini
+    from . import crud, holds
+    if row.kind == BOOKING:
+        if row.hold_id is not None:
+            holds.store.drop(row.hold_id, notify=False)
+        crud.booking_committed(row.court_id, row.booking_date, row.start_minute, row.end_minute)
+    elif row.kind == COURTS:
+        cache.courts.invalidate()
+    elif row.kind == HOLD:
+        holds.store.adopt(holds.Hold(row.hold_id, row.court_id, row.booking_date, row.start_minute,
+                                     row.end_minute, holds.monotonic_deadline(row.expires_at)))
+    elif row.kind == HOLD_RELEASED:
+        holds.store.drop(row.hold_id)
+
+
+watcher = Watcher()
+
+
+class SyncMiddleware:
+    """Sinkronkan sebelum setiap request, agar respons selalu melihat commit worker lain."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            watcher.sync()
+        await self.app(scope, receive, send)
@@ -0,0 +1,85 @@
+import os
+
+# --- Konfigurasi Aplikasi (environment variable) ---
+
+# Lokasi database; file SQLite dipertahankan antar restart
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./futsal.db")
+# FUTSAL_RESET_DB=1: hapus file SQLite saat start (perilaku lama, untuk development)
+RESET_DB = os.getenv("FUTSAL_RESET_DB", "0") == "1"
+
+# Jumlah thread threadpool per worker (diterapkan ke limiter thread AnyIO saat startup);
+# pool koneksi disamakan agar handler sync tidak saling menunggu koneksi
+THREADPOOL_SIZE = int(os.getenv("FUTSAL_THREADPOOL_SIZE", "40"))
+DB_POOL_SIZE = int(os.getenv("FUTSAL_DB_POOL_SIZE", str(THREADPOOL_SIZE)))
+DB_MAX_OVERFLOW = int(os.getenv("FUTSAL_DB_MAX_OVERFLOW", "10"))
+
+# PRAGMA SQLite yang dipasang di setiap koneksi baru
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("FUTSAL_SQLITE_JOURNAL_MODE", "WAL"),
+    # NORMAL aman dengan WAL: commit tetap atomik, hanya fsync yang ditunda ke checkpoint
+    "synchronous": os.getenv("FUTSAL_SQLITE_SYNCHRONOUS", "NORMAL"),
+    "cache_size": int(os.getenv("FUTSAL_SQLITE_CACHE_KB", "65536")) * -1, # negatif = KiB
+    "mmap_size": int(os.getenv("FUTSAL_SQLITE_MMAP_BYTES", str(256 * 1024 * 1024))),
+    "busy_timeout": int(os.getenv("FUTSAL_SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "temp_store": "MEMORY",
+}
+
+# FUTSAL_ASYNC_DB=1: hanya GET /courts/{id}/availability dan POST /bookings/ yang memakai
+# async def + AsyncSession; semua endpoint lain tetap handler sync di threadpool
+ASYNC_DB = os.getenv("FUTSAL_ASYNC_DB", "0") == "1"
+
+# Jumlah maksimum respons availability (court, tanggal, durasi) yang disimpan di cache LRU
+AVAILABILITY_CACHE_SIZE = int(os.getenv("FUTSAL_AVAILABILITY_CACHE_SIZE", "4096"))
+
+# Jumlah maksimum key (court, tanggal) di indeks okupansi in-memory (LRU)
+OCCUPANCY_INDEX_SIZE = int(os.getenv("FUTSAL_OCCUPANCY_INDEX_SIZE", "65536"))
+
+# Request yang lebih lama dari ambang ini (ms) dicatat beserta SQL-nya ke logger
+# futsal.slow_requests; 0 = nonaktif
+SLOW_REQUEST_MS = float(os.getenv("FUTSAL_SLOW_REQUEST_MS", "0"))
+
+# Granularitas jam mulai & durasi booking (menit): 15, 30 atau 60
+GRANULARITY_MINUTES = int(os.getenv("FUTSAL_GRANULARITY_MINUTES", "30"))
+if GRANULARITY_MINUTES not in (15, 30, 60):
+    raise ValueError("FUTSAL_GRANULARITY_MINUTES must be 15, 30 or 60")
+
+# Hold slot saat checkout: lama hold (detik) & batas jumlah hold aktif per worker
+HOLD_TTL_SECONDS = float(os.getenv("FUTSAL_HOLD_TTL_SECONDS", "300"))
+MAX_HOLDS = int(os.getenv("FUTSAL_MAX_HOLDS", "100000"))
+
+# Idempotency-Key POST /bookings/: lama respons disimpan (detik), batas jumlah key di DB
+# (dipangkas berkala), dan lama klaim request yang sedang diproses sebelum dianggap gagal
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("FUTSAL_IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("FUTSAL_IDEMPOTENCY_MAX_KEYS", "100000"))
+IDEMPOTENCY_LEASE_SECONDS = float(os.getenv("FUTSAL_IDEMPOTENCY_LEASE_SECONDS", "30"))
+
+# FUTSAL_MULTI_WORKER=1: beberapa worker (uvicorn --workers N) berbagi satu file SQLite;
+# perubahan dicatat di tabel change_log dan cache in-memory tiap worker disinkronkan darinya
+MULTI_WORKER = os.getenv("FUTSAL_MULTI_WORKER", "0") == "1"
+# Jeda polling change_log di background (detik): event SSE & hold dari worker lain tetap
+# tersampaikan walau worker ini tidak menerima request
+CHANGE_POLL_SECONDS = float(os.getenv("FUTSAL_CHANGE_POLL_SECONDS", "0.1"))
+# Lama baris change_log disimpan (detik) sebelum dipangkas
+CHANGE_LOG_RETENTION_SECONDS = float(os.getenv("FUTSAL_CHANGE_LOG_RETENTION_SECONDS", "600"))
+
+# Admission control (admission.py), per worker. Request yang diproses bersamaan dibatasi
+# terpisah untuk tulis (booking, hold) dan baca; sebagian threadpool disisihkan untuk tulis
+# agar polling availability tidak menghambat booking. Di atas batas, request antre; di atas
+# panjang antrean langsung ditolak 429 + Retry-After. Batas 0 = tanpa batas (dan tanpa antre).
+MAX_CONCURRENT_WRITES = int(os.getenv("FUTSAL_MAX_CONCURRENT_WRITES", "8"))
+MAX_CONCURRENT_READS = int(os.getenv("FUTSAL_MAX_CONCURRENT_READS", str(max(1, THREADPOOL_SIZE - MAX_CONCURRENT_WRITES))))
+MAX_QUEUED_WRITES = int(os.getenv("FUTSAL_MAX_QUEUED_WRITES", "32"))
+MAX_QUEUED_READS = int(os.getenv("FUTSAL_MAX_QUEUED_READS", "64"))
+SHED_RETRY_AFTER_SECONDS = float(os.getenv("FUTSAL_SHED_RETRY_AFTER_SECONDS", "1"))
+# Token bucket per IP klien: request/detik & kapasitas burst; 0 = nonaktif. IP di
+# FUTSAL_RATE_LIMIT_EXEMPT tidak dibatasi (default localhost: frontend Streamlit meneruskan
+# request semua user dari satu IP). Di belakang proxy, IP diambil dari X-Forwarded-For
+# oleh uvicorn (--forwarded-allow-ips).
+RATE_LIMIT_RPS = float(os.getenv("FUTSAL_RATE_LIMIT_RPS", "20"))
+RATE_LIMIT_BURST = float(os.getenv("FUTSAL_RATE_LIMIT_BURST", "40"))
+RATE_LIMIT_EXEMPT = {ip.strip() for ip in os.getenv("FUTSAL_RATE_LIMIT_EXEMPT", "127.0.0.1,::1").split(",") if ip.strip()}
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("FUTSAL_RATE_LIMIT_MAX_CLIENTS", "100000"))
+
+# GET /bookings/export berisi data pribadi semua pelanggan: hanya untuk operator yang mengirim
+# header X-Export-Token bernilai ini. Tidak diset = export nonaktif.
+EXPORT_TOKEN = os.getenv("FUTSAL_EXPORT_TOKEN") or None
@@ -1,6 +1,31 @@
+import random
+import time
+from sqlalchemy import and_, exists, func, insert, or_, tuple_
+from sqlalchemy.exc import IntegrityError, OperationalError
 from sqlalchemy.orm import Session
-from . import models, database
-from datetime import datetime, timedelta
+from . import cache, coherence, config, events, holds, idempotency, models, database, occupancy, rollups
+from . import facilities as facility_names
+from datetime import datetime, timedelta, date
+from typing import List, Optional, Tuple
+
+# Percobaan ulang jika SQLite sedang dikunci writer lain ("database is locked")
+BOOKING_MAX_ATTEMPTS = 4
+BOOKING_RETRY_BACKOFF = 0.02 # detik, dikali 2 setiap percobaan
+
+class SlotTakenError(Exception):
+    def __init__(self, slot_minute: int):
+        super().__init__(f"Slot at {database.minutes_to_time(slot_minute)} is already booked.")
+        self.slot_minute = slot_minute
+
+class OutsideOperatingHoursError(Exception):
+    def __init__(self, operating_hours: str):
+        super().__init__(f"Booking must fall within the court's operating hours ({operating_hours}).")
+
+def check_operating_hours(court: database.Court, start_minute: int, end_minute: int):
+    """Raise OutsideOperatingHoursError jika [start, end) tidak muat di jam operasional (mis. lewat tengah malam)."""
+    open_minute, close_minute = database.operating_minutes(court)
+    if not (open_minute <= start_minute and end_minute <= close_minute):
+        raise OutsideOperatingHoursError(court.operating_hours)
 
 # --- Fungsi untuk Operasi Database (CRUD) ---
 
@@ -10,29 +35,403 @@ def get_court(db: Session, court_id: int):
 def get_courts(db: Session, skip: int = 0, limit: int = 100):
     return db.query(database.Court).offset(skip).limit(limit).all()
 
-def get_bookings_on_date(db: Session, court_id: int, date: str):
+def get_courts_by_ids(db: Session, court_ids: List[int]):
+    return db.query(database.Court).filter(database.Court.id.in_(court_ids)).order_by(database.Court.id).all()
+
+def search_courts(
+    db: Session,
+    type: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    facility_mask: int = 0,
+    after: Optional[Tuple[float, int]] = None,
+    limit: int = 20,
+):
+    """Lapangan urut (price, id); `after` = (price, id) baris terakhir halaman sebelumnya."""
+    Court = database.Court
+    query = db.query(Court)
+    if type is not None:
+        query = query.filter(Court.type == type)
+    if min_price is not None:
+        query = query.filter(Court.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Court.price <= max_price)
+    if facility_mask:
+        query = query.filter(Court.facility_mask.op("&")(facility_mask) == facility_mask)
+    if after is not None:
+        last_price, last_id = after
+        query = query.filter(or_(Court.price > last_price, and_(Court.price == last_price, Court.id > last_id)))
+    return query.order_by(Court.price, Court.id).limit(limit).all()
+
+def find_free_courts(
+    db: Session,
+    date: date,
+    start_minute: int,
+    end_minute: int,
+    type: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    facility_mask: int = 0,
+):
+    """Semua lapangan tanpa booking yang beririsan dengan [start_minute, end_minute), urut harga.
+
+    Satu query: NOT EXISTS per lapangan memakai index (court_id, booking_date) di bookings.
+    """
+    Court, Booking = database.Court, database.Booking
+    overlapping = exists().where(
+        Booking.court_id == Court.id,
+        Booking.booking_date == date,
+        Booking.start_minute < end_minute,
+        Booking.end_minute > start_minute
+    )
+    query = db.query(Court).filter(~overlapping)
+    if type is not None:
+        query = query.filter(Court.type == type)
+    if min_price is not None:
+        query = query.filter(Court.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Court.price <= max_price)
+    if facility_mask:
+        query = query.filter(Court.facility_mask.op("&")(facility_mask) == facility_mask)
+    return query.order_by(Court.price, Court.id).all()
+
+def get_bookings_on_date(db: Session, court_id: int, date: date):
     return db.query(database.Booking).filter(
         database.Booking.court_id == court_id,
         database.Booking.booking_date == date
     ).all()
 
-def create_booking(db: Session, booking: models.BookingCreate):
+def get_bookings_in_range(db: Session, court_ids: List[int], date_from: date, date_to: date):
+    # Satu query untuk semua lapangan, memakai index (court_id, booking_date)
+    return db.query(database.Booking).filter(
+        database.Booking.court_id.in_(court_ids),
+        database.Booking.booking_date >= date_from,
+        database.Booking.booking_date <= date_to
+    ).order_by(database.Booking.booking_date, database.Booking.start_minute).all()
+
+def get_booked_ranges(db: Session, court_ids: List[int], date_from: date, date_to: date):
+    # Sama seperti get_bookings_in_range tapi hanya kolom yang dibutuhkan untuk interval
+    return db.query(
+        database.Booking.court_id,
+        database.Booking.booking_date,
+        database.Booking.start_minute,
+        database.Booking.end_minute
+    ).filter(
+        database.Booking.court_id.in_(court_ids),
+        database.Booking.booking_date >= date_from,
+        database.Booking.booking_date <= date_to
+    ).all()
+
+def iter_bookings_for_export(db: Session, date_from: date, date_to: date, court_id: Optional[int] = None, batch_size: int = 1000):
+    """Baris booking (+ nama lapangan) urut (booking_date, id), diambil per `batch_size` baris.
+
+    yield_per memakai cursor server-side, jadi hanya satu batch yang ada di memori.
+    """
+    Booking = database.Booking
+    query = db.query(
+        Booking.id, Booking.court_id, database.Court.name.label("court_name"),
+        Booking.customer_name, Booking.customer_phone, Booking.customer_email,
+        Booking.booking_date, Booking.start_minute, Booking.end_minute, Booking.duration,
+        Booking.total_price, Booking.status, Booking.created_at
+    ).join(database.Court, database.Court.id == Booking.court_id).filter(
+        Booking.booking_date >= date_from,
+        Booking.booking_date <= date_to
+    )
+    if court_id is not None:
+        query = query.filter(Booking.court_id == court_id)
+    return query.order_by(Booking.booking_date, Booking.id).yield_per(batch_size)
+
+def get_booking_history(
+    db: Session,
+    phone: Optional[str] = None,
+    email: Optional[str] = None,
+    before: Optional[Tuple[date, int, int]] = None,
+    limit: int = 20,
+):
+    """Booking milik satu pelanggan (per nomor HP atau email), terbaru dulu.
+
+    `before` = (booking_date, start_minute, id) baris terakhir halaman sebelumnya. Hanya
+    kolom di index riwayat yang dibaca; nama lapangan diambil lewat primary key courts.
+    """
+    Booking = database.Booking
+    key = Booking.customer_phone == phone if phone is not None else Booking.customer_email == email
+    query = db.query(
+        Booking.id, Booking.court_id, database.Court.name.label("court_name"),
+        Booking.booking_date, Booking.start_minute, Booking.end_minute, Booking.duration,
+        Booking.total_price, Booking.status
+    ).join(database.Court, database.Court.id == Booking.court_id).filter(key)
+    if before is not None:
+        query = query.filter(tuple_(Booking.booking_date, Booking.start_minute, Booking.id) < tuple_(*before))
+    return query.order_by(
+        Booking.booking_date.desc(), Booking.start_minute.desc(), Booking.id.desc()
+    ).limit(limit).all()
+
+def get_rollups(db: Session, period: str, date_from: date, date_to: date, court_id: Optional[int] = None):
+    """Baris rollup per lapangan untuk periode yang beririsan dengan [date_from, date_to]."""
+    Rollup = database.BookingRollup
+    query = db.query(
+        Rollup.period_start, Rollup.court_id, database.Court.name.label("court_name"),
+        database.Court.operating_hours, Rollup.bookings, Rollup.booked_hours, Rollup.revenue
+    ).join(database.Court, database.Court.id == Rollup.court_id).filter(
+        Rollup.period == period,
+        Rollup.period_start >= rollups.period_start(period, date_from),
+        Rollup.period_start <= date_to
+    )
+    if court_id is not None:
+        query = query.filter(Rollup.court_id == court_id)
+    return query.order_by(Rollup.period_start, Rollup.court_id).all()
+
+def get_rollup_totals(db: Session, period: str, date_from: date, date_to: date):
+    """Total semua lapangan per awal periode."""
+    Rollup = database.BookingRollup
+    return db.query(
+        Rollup.period_start,
+        func.sum(Rollup.bookings).label("bookings"),
+        func.sum(Rollup.booked_hours).label("booked_hours"),
+        func.sum(Rollup.revenue).label("revenue")
+    ).filter(
+        Rollup.period == period,
+        Rollup.period_start >= rollups.period_start(period, date_from),
+        Rollup.period_start <= date_to
+    ).group_by(Rollup.period_start).all()
+
+def get_daily_open_hours(db: Session) -> int:
+    """Jumlah jam buka per hari seluruh lapangan (kapasitas untuk utilisasi)."""
+    total = 0
+    for row in db.query(database.Court.operating_hours, func.count().label("courts")).group_by(database.Court.operating_hours):
+        open_hour, close_hour = database.operating_hours(row)
+        total += (close_hour - open_hour) * row.courts
+    return total
+
+def get_occupancy(db: Session, court_id: int, date: date) -> occupancy.Intervals:
+    # Rentang terbooking; query ke DB hanya saat (court, tanggal) belum ada di indeks
+    return occupancy.index.get(
+        court_id, date,
+        lambda: occupancy.from_bookings(get_bookings_on_date(db, court_id, date))
+    )
+
+def availability_payload(court: database.Court, taken: occupancy.Intervals, length: int) -> dict:
+    """Jam mulai (per FUTSAL_GRANULARITY_MINUTES) yang muat `length` menit + rentang kosong."""
+    open_minute, close_minute = database.operating_minutes(court)
+    starts = taken.free_starts(open_minute, close_minute, length, config.GRANULARITY_MINUTES)
+    return {
+        "available_slots": [database.minutes_to_time(minute) for minute in starts],
+        "free_ranges": [
+            [database.minutes_to_time(start), database.minutes_to_time(end)]
+            for start, end in taken.free_gaps(open_minute, close_minute)
+        ],
+    }
+
+def get_taken_slots(db: Session, court_id: int, date: date, start_minute: int, end_minute: int) -> List[int]:
+    rows = db.query(database.BookingSlot.slot_minute).filter(
+        database.BookingSlot.court_id == court_id,
+        database.BookingSlot.booking_date == date,
+        database.BookingSlot.slot_minute >= start_minute,
+        database.BookingSlot.slot_minute < end_minute
+    ).order_by(database.BookingSlot.slot_minute).all()
+    return [r.slot_minute for r in rows]
+
+def booking_values(booking: models.BookingCreate, price: float) -> dict:
+    data = booking.dict(exclude={"hold_id"})
+    start_minute = database.time_to_minutes(data.pop("start_time"))
+    return dict(
+        **data,
+        start_minute=start_minute,
+        end_minute=start_minute + database.duration_minutes(booking.duration),
+        total_price=price * booking.duration,
+        status="confirmed"
+    )
+
+def new_booking(booking: models.BookingCreate, price: float) -> database.Booking:
+    return database.Booking(**booking_values(booking, price))
+
+def new_booking_slots(db_booking: database.Booking) -> List[database.BookingSlot]:
+    # db_booking harus sudah di-flush agar id-nya terisi
+    return [
+        database.BookingSlot(
+            booking_id=db_booking.id,
+            court_id=db_booking.court_id,
+            booking_date=db_booking.booking_date,
+            slot_minute=minute
+        )
+        for minute in range(db_booking.start_minute, db_booking.end_minute, database.SLOT_MINUTES)
+    ]
+
+def booking_committed(court_id: int, booking_date: date, start_minute: int, end_minute: int):
+    # Dipanggil tepat setelah commit, sebelum query lain di session ini
+    occupancy.index.mark(court_id, booking_date, start_minute, end_minute)
+    cache.availability.invalidate(court_id, booking_date)
+    events.slot_taken(court_id, booking_date, start_minute, end_minute)
+
+def slots_changed(court_id: int, booking_date: date):
+    occupancy.index.invalidate(court_id, booking_date)
+    cache.availability.invalidate(court_id, booking_date)
+
+def retry_delay(attempt: int) -> float:
+    return BOOKING_RETRY_BACKOFF * (2 ** attempt) * (1 + random.random())
+
+def create_booking(db: Session, booking: models.BookingCreate, idempotency_key: Optional[str] = None):
+    """Booking + semua slotnya (+ hasil Idempotency-Key) di-insert dalam satu transaksi.
+
+    Raise SlotTakenError jika unique constraint booking_slots menolak salah satu slot.
+    """
     court = get_court(db, booking.court_id)
     if not court:
         return None
-    
-    total_price = court.price * booking.duration
-    
-    db_booking = database.Booking(
-        **booking.dict(),
-        total_price=total_price,
-        status="confirmed"
-    )
-    db.add(db_booking)
-    db.commit()
+
+    # Dibaca sekali: setelah rollback atribut court kedaluwarsa
+    price = court.price
+    for attempt in range(BOOKING_MAX_ATTEMPTS):
+        db_booking = new_booking(booking, price)
+        start_minute, end_minute = db_booking.start_minute, db_booking.end_minute
+        try:
+            db.add(db_booking)
+            db.flush()
+            db.add_all(new_booking_slots(db_booking))
+            rollups.record(db, [(db_booking.court_id, db_booking.booking_date, db_booking.duration, db_booking.total_price)])
+            if idempotency_key is not None:
+                db.execute(idempotency.booking_statement(idempotency_key, db_booking.id))
+            coherence.record(db, [coherence.booking_change(
+                booking.court_id, booking.booking_date, start_minute, end_minute, booking.hold_id
+            )])
+            db.commit()
+            booking_committed(booking.court_id, booking.booking_date, start_minute, end_minute)
+            break
+        except IntegrityError:
+            db.rollback()
+            # State in-memory ketinggalan (mis. ditulis proses lain): muat ulang dari DB
+            slots_changed(booking.court_id, booking.booking_date)
+            taken = get_taken_slots(db, booking.court_id, booking.booking_date, start_minute, end_minute)
+            raise SlotTakenError(taken[0] if taken else start_minute)
+        except OperationalError:
+            db.rollback()
+            if attempt == BOOKING_MAX_ATTEMPTS - 1:
+                raise
+            time.sleep(retry_delay(attempt))
+
     db.refresh(db_booking)
     return db_booking
 
+def create_recurring_bookings(db: Session, request: models.RecurringBookingCreate):
+    """Semua occurrence dicek dengan satu query dan di-insert dalam satu transaksi.
+
+    Return None jika ada court_id yang tidak dikenal.
+    """
+    court_ids = list(dict.fromkeys(request.court_ids))
+    dates = [request.start_date + timedelta(days=i * request.interval_days) for i in range(request.occurrences)]
+    start_minute = database.time_to_minutes(request.start_time)
+    end_minute = start_minute + database.duration_minutes(request.duration)
+
+    courts = {}
+    closed = {} # court_id -> alasan; jam ini di luar jam operasionalnya
+    for court in get_courts_by_ids(db, court_ids):
+        courts[court.id] = court.price
+        try:
+            check_operating_hours(court, start_minute, end_minute)
+        except OutsideOperatingHoursError as e:
+            closed[court.id] = str(e)
+    if len(courts) != len(court_ids):
+        return None
+
+    for attempt in range(BOOKING_MAX_ATTEMPTS):
+        taken = {(court_id, booking_date): detail for court_id, detail in closed.items() for booking_date in dates}
+        for row in db.query(
+            database.BookingSlot.court_id,
+            database.BookingSlot.booking_date,
+            func.min(database.BookingSlot.slot_minute).label("slot_minute")
+        ).filter(
+            database.BookingSlot.court_id.in_([court_id for court_id in court_ids if court_id not in closed]),
+            database.BookingSlot.booking_date.in_(dates),
+            database.BookingSlot.slot_minute >= start_minute,
+            database.BookingSlot.slot_minute < end_minute
+        ).group_by(database.BookingSlot.court_id, database.BookingSlot.booking_date):
+            taken[row.court_id, row.booking_date] = str(SlotTakenError(row.slot_minute))
+        # Slot yang sedang di-hold pelanggan lain juga dihitung bentrok
+        for booking_date in dates:
+            for court_id in court_ids:
+                held = holds.store.held(court_id, booking_date).overlap(start_minute, end_minute)
+                if held is not None and (court_id, booking_date) not in taken:
+                    taken[court_id, booking_date] = str(holds.SlotHeldError(held))
+
+        occurrences = []
+        pending = {}
+        for booking_date in dates:
+            for court_id in court_ids:
+                occurrence = models.BookingOccurrence(court_id=court_id, booking_date=booking_date, status="confirmed")
+                if (court_id, booking_date) in taken:
+                    occurrence.status = "conflict"
+                    occurrence.detail = taken[court_id, booking_date]
+                else:
+                    occurrence.total_price = courts[court_id] * request.duration
+                    pending[court_id, booking_date] = occurrence
+                occurrences.append(occurrence)
+
+        if taken and request.all_or_nothing:
+            for occurrence in pending.values():
+                occurrence.status = "skipped"
+                occurrence.total_price = None
+            pending = {}
+
+        rows = [
+            booking_values(models.BookingCreate(
+                court_id=court_id,
+                customer_name=request.customer_name,
+                customer_phone=request.customer_phone,
+                customer_email=request.customer_email,
+                booking_date=booking_date,
+                start_time=request.start_time,
+                duration=request.duration
+            ), courts[court_id])
+            for court_id, booking_date in pending
+        ]
+        try:
+            if rows:
+                # Core insert: satu INSERT multi-VALUES untuk bookings (RETURNING id) dan
+                # satu executemany untuk booking_slots, bukan satu statement per objek ORM
+                inserted = db.execute(
+                    insert(database.Booking).returning(
+                        database.Booking.id, database.Booking.court_id, database.Booking.booking_date
+                    ),
+                    rows
+                ).all()
+                slot_rows = []
+                for row in inserted:
+                    pending[row.court_id, row.booking_date].booking_id = row.id
+                    slot_rows.extend(
+                        dict(booking_id=row.id, court_id=row.court_id, booking_date=row.booking_date, slot_minute=minute)
+                        for minute in range(start_minute, end_minute, database.SLOT_MINUTES)
+                    )
+                db.execute(insert(database.BookingSlot), slot_rows)
+                rollups.record(db, [(row["court_id"], row["booking_date"], row["duration"], row["total_price"]) for row in rows])
+                coherence.record(db, [
+                    coherence.booking_change(court_id, booking_date, start_minute, end_minute)
+                    for court_id, booking_date in pending
+                ])
+            db.commit()
+            break
+        except IntegrityError:
+            # Ada booking lain yang masuk setelah pengecekan: ulangi dengan data terbaru
+            db.rollback()
+            for court_id in court_ids:
+                for booking_date in dates:
+                    slots_changed(court_id, booking_date)
+            if attempt == BOOKING_MAX_ATTEMPTS - 1:
+                raise
+        except OperationalError:
+            db.rollback()
+            if attempt == BOOKING_MAX_ATTEMPTS - 1:
+                raise
+            time.sleep(retry_delay(attempt))
+
+    for court_id, booking_date in pending:
+        booking_committed(court_id, booking_date, start_minute, end_minute)
+
+    return models.BatchBookingResult(
+        confirmed=len(pending),
+        conflicts=len(taken),
+        occurrences=occurrences
+    )
+
 def seed_data(db: Session):
     """Fungsi untuk mengisi data dummy jika database kosong"""
     if db.query(database.Court).first():
@@ -48,11 +447,15 @@ def seed_data(db: Session):
             {"name": "Sintesis Arena", "type": "Indoor", "price": 95000, "facilities": "Toilet,Kantin,Wifi,Parkir Luas", "image_url": "https://i.imgur.com/3jlvTn1.jpeg"},
         ]
     
+    # Satu INSERT multi-VALUES. Core insert melewati @validates Court, jadi fasilitas
+    # dinormalisasi & facility_mask diisi di sini
     for court_data in courts_data:
-        db_court = database.Court(**court_data)
-        db.add(db_court)
-    
+        names = facility_names.split(court_data["facilities"])
+        court_data.update(facilities=",".join(names), facility_mask=facility_names.to_mask(names))
+    db.execute(insert(database.Court), courts_data)
+    coherence.record(db, [coherence.change(coherence.COURTS)])
     db.commit()
+    cache.courts.invalidate()
     print("Dummy data has been seeded.")
     
     
\ No newline at end of file
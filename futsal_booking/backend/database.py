@@ -1,17 +1,54 @@
 import os
-from sqlalchemy import create_engine, Column, Integer, String, Float, ForeignKey, DateTime
-from sqlalchemy.orm import sessionmaker, relationship, declarative_base
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, ForeignKey, DateTime, Date, Index, UniqueConstraint
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker, relationship, declarative_base, validates
 from datetime import datetime
+from typing import Tuple
 
-# Path untuk file database SQLite
-DATABASE_URL = "sqlite:///./futsal.db"
+from . import config, facilities as facility_names
 
-# Hapus file DB lama jika ada, untuk memulai dari awal setiap kali dijalankan (opsional)
-if os.path.exists("./futsal.db"):
-    os.remove("./futsal.db")
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+DATABASE_URL = config.DATABASE_URL
+url = make_url(DATABASE_URL)
+is_sqlite = url.get_backend_name() == "sqlite"
+
+def _engine_options() -> dict:
+    options = {}
+    if not is_sqlite or url.database not in (None, "", ":memory:"):
+        # SQLite in-memory memakai SingletonThreadPool yang tidak punya overflow
+        options.update(pool_size=config.DB_POOL_SIZE, max_overflow=config.DB_MAX_OVERFLOW)
+    if is_sqlite:
+        options["connect_args"] = {"check_same_thread": False}
+    return options
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in config.SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+engine = create_engine(DATABASE_URL, **_engine_options())
+if is_sqlite:
+    event.listen(engine, "connect", _set_sqlite_pragmas)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Engine async hanya dibuat jika diaktifkan, karena butuh driver aiosqlite
+async_engine = None
+AsyncSessionLocal = None
+if config.ASYNC_DB:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_url = url.set(drivername="sqlite+aiosqlite") if is_sqlite else url
+    async_engine = create_async_engine(async_url, **_engine_options())
+    if is_sqlite:
+        event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # --- Model Tabel Database ---
@@ -22,11 +59,27 @@ class Court(Base):
     type = Column(String) # Indoor, Outdoor, Premium
     price = Column(Float)
     facilities = Column(String) # "AC,Toilet,Kantin"
+    facility_mask = Column(Integer, nullable=False, default=0) # bit per fasilitas, lihat facilities.py
     image_url = Column(String)
     operating_hours = Column(String, default="08:00-22:00") # Format "HH:MM-HH:MM"
 
     bookings = relationship("Booking", back_populates="court")
 
+    # Pencarian: filter tipe + rentang harga, urut (price, id) untuk keyset pagination
+    __table_args__ = (
+        Index("ix_courts_type_price_id", "type", "price", "id"),
+        Index("ix_courts_price_id", "price", "id"),
+    )
+
+    @validates("facilities")
+    def _normalize_facilities(self, key, value):
+        names = facility_names.split(value)
+        self.facility_mask = facility_names.to_mask(names)
+        return ",".join(names)
+
+# Kolom yang ditampilkan di riwayat booking selain kunci urutan (lihat index di Booking)
+HISTORY_COLUMNS = ("court_id", "end_minute", "duration", "total_price", "status")
+
 class Booking(Base):
     __tablename__ = "bookings"
     id = Column(Integer, primary_key=True, index=True)
@@ -34,15 +87,118 @@ class Booking(Base):
     customer_name = Column(String)
     customer_phone = Column(String)
     customer_email = Column(String)
-    booking_date = Column(String) # "YYYY-MM-DD"
-    start_time = Column(String) # "HH:MM"
-    duration = Column(Integer) # in hours
+    booking_date = Column(Date)
+    start_minute = Column(Integer) # menit sejak 00:00, mis. 19:30 -> 1170
+    end_minute = Column(Integer) # eksklusif: start_minute + duration * 60
+    duration = Column(Float) # in hours, mis. 1.5
     total_price = Column(Float)
     status = Column(String, default="confirmed")
     created_at = Column(DateTime, default=datetime.utcnow)
 
     court = relationship("Court", back_populates="bookings")
 
+    # Semua lookup ketersediaan & konflik memfilter (court_id, booking_date)
+    __table_args__ = (
+        Index("ix_bookings_court_date", "court_id", "booking_date"),
+        # Export per rentang tanggal tanpa filter lapangan, urut (booking_date, id)
+        Index("ix_bookings_date", "booking_date"),
+        # Riwayat per pelanggan, terbaru dulu; kolom sisanya ikut di index (covering) agar
+        # satu halaman riwayat dibaca dari index saja tanpa lookup ke tabel
+        Index("ix_bookings_phone_history", "customer_phone", "booking_date", "start_minute", "id", *HISTORY_COLUMNS),
+        Index("ix_bookings_email_history", "customer_email", "booking_date", "start_minute", "id", *HISTORY_COLUMNS),
+    )
+
+    @property
+    def start_time(self) -> str:
+        return minutes_to_time(self.start_minute)
+
+# Satu baris per slot yang ditempati sebuah booking. Unique constraint di sini
+# yang menjamin satu slot tidak bisa dibooking dua kali, walau request paralel.
+# Resolusinya tetap 15 menit (granularitas terkecil), berapa pun FUTSAL_GRANULARITY_MINUTES,
+# agar booking lama & baru tetap saling bentrok jika konfigurasi diubah.
+SLOT_MINUTES = 15
+
+class BookingSlot(Base):
+    __tablename__ = "booking_slots"
+    id = Column(Integer, primary_key=True)
+    booking_id = Column(Integer, ForeignKey("bookings.id"), nullable=False)
+    court_id = Column(Integer, nullable=False)
+    booking_date = Column(Date, nullable=False)
+    slot_minute = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("court_id", "booking_date", "slot_minute", name="uq_booking_slots_slot"),
+    )
+
+# Total per periode (day/week/month) per lapangan, diperbarui bersama insert booking
+# (lihat rollups.py). Primary key diurutkan agar dashboard = satu range scan per periode.
+class BookingRollup(Base):
+    __tablename__ = "booking_rollups"
+    period = Column(String, primary_key=True) # "day", "week" (mulai Senin), "month"
+    period_start = Column(Date, primary_key=True)
+    court_id = Column(Integer, primary_key=True)
+    bookings = Column(Integer, nullable=False, default=0)
+    booked_hours = Column(Float, nullable=False, default=0.0)
+    revenue = Column(Float, nullable=False, default=0.0)
+
+# Idempotency-Key POST /bookings/ (lihat idempotency.py); status_code NULL = sedang diproses
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    key = Column(String, primary_key=True)
+    request_hash = Column(String, nullable=False)
+    status_code = Column(Integer)
+    booking_id = Column(Integer) # diisi dalam transaksi booking-nya
+    detail = Column(String) # pesan error untuk respons 4xx
+    created_at = Column(DateTime, nullable=False)
+    claimed_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        # Pembersihan TTL & batas jumlah key membuang yang tertua dulu
+        Index("ix_idempotency_keys_created_at", "created_at"),
+    )
+
+# Jurnal perubahan untuk koherensi cache antar worker (mode FUTSAL_MULTI_WORKER, lihat
+# coherence.py). AUTOINCREMENT: id tidak dipakai ulang setelah baris lama dipangkas.
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+    id = Column(Integer, primary_key=True)
+    origin = Column(String, nullable=False) # worker penulis
+    kind = Column(String, nullable=False) # "booking", "courts", "hold", "hold_released"
+    court_id = Column(Integer)
+    booking_date = Column(Date)
+    start_minute = Column(Integer)
+    end_minute = Column(Integer)
+    hold_id = Column(String)
+    expires_at = Column(DateTime) # UTC, untuk hold
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_change_log_created_at", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
+
+
+def time_to_minutes(value: str) -> int:
+    hour, minute = value.split(':')
+    return int(hour) * 60 + int(minute)
+
+def minutes_to_time(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def duration_minutes(duration: float) -> int:
+    """Durasi dalam jam (boleh pecahan, mis. 1.5) -> menit."""
+    return round(duration * 60)
+
+def operating_hours(court: Court) -> Tuple[int, int]:
+    """Jam buka & tutup dari string "HH:MM-HH:MM"."""
+    start_op, end_op = court.operating_hours.split('-')
+    return int(start_op.split(':')[0]), int(end_op.split(':')[0])
+
+def operating_minutes(court: Court) -> Tuple[int, int]:
+    """Jam buka & tutup dalam menit sejak 00:00 (menit di "HH:MM" ikut dihitung)."""
+    start_op, end_op = court.operating_hours.split('-')
+    return time_to_minutes(start_op), time_to_minutes(end_op)
+
 
 def get_db():
     db = SessionLocal()
@@ -51,5 +207,43 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def is_file_database() -> bool:
+    return is_sqlite and url.database not in (None, "", ":memory:")
+
+def reset_database():
+    """Hapus file SQLite (FUTSAL_RESET_DB=1); hanya untuk development dengan satu proses."""
+    if not is_file_database():
+        return
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(url.database + suffix):
+            os.remove(url.database + suffix)
+
+@contextmanager
+def schema_lock():
+    """Serialisasi setup skema & seed antar worker yang start bersamaan.
+
+    SQLite tidak punya DDL transaksional lintas langkah migrasi, jadi dipakai file lock di
+    sebelah file DB. Tanpa fcntl (Windows) atau untuk DB lain, cukup andalkan idempotensi.
+    """
+    if fcntl is None or not is_file_database():
+        yield
+        return
+    with open(url.database + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
 def create_db_and_tables():
+    """Buat/upgrade skema; idempotent, dan cepat jika skema sudah terbaru."""
+    from . import migrations
+    if migrations.is_current(engine):
+        return
+    migrations.upgrade(engine)
     Base.metadata.create_all(bind=engine)
\ No newline at end of file
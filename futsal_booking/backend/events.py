@@ -0,0 +1,136 @@
+import asyncio
+import itertools
+import json
+import threading
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from . import config, database
+
+# --- Push Ketersediaan (pub/sub in-process untuk Server-Sent Events) ---
+# Klien berlangganan key (court_id, tanggal) lewat GET /events/availability dan menerima
+# delta slot_taken / slot_freed setiap kali booking di-commit. Publish boleh dipanggil dari
+# thread mana pun (handler sync berjalan di threadpool): frame SSE dibentuk sekali, lalu
+# diserahkan ke event loop via call_soon_threadsafe dan dibagikan ke semua subscriber key itu.
+# Subscriber yang diam hanya berupa satu asyncio.Queue kosong + coroutine yang menunggu.
+
+Key = Tuple[int, date]
+
+SUBSCRIBER_QUEUE_SIZE = 64
+# Komentar SSE berkala agar proxy/load balancer tidak menutup koneksi yang diam
+HEARTBEAT_SECONDS = 15
+
+
+class Subscriber:
+    __slots__ = ("keys", "queue")
+
+    def __init__(self, keys: Iterable[Key]):
+        self.keys = frozenset(keys)
+        self.queue: asyncio.Queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+
+
+class Broker:
+    def __init__(self):
+        self._subscribers: Dict[Key, Set[Subscriber]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._all: Set[Subscriber] = set()
+        self.published = 0
+        self.delivered = 0
+        self.overflows = 0
+
+    def bind(self, loop: asyncio.AbstractEventLoop, heartbeat_seconds: float = HEARTBEAT_SECONDS):
+        """Event loop tempat semua subscriber hidup; dipanggil saat startup aplikasi."""
+        self._loop = loop
+        self._heartbeat_seconds = heartbeat_seconds
+        loop.call_later(heartbeat_seconds, self._heartbeat)
+
+    def _heartbeat(self):
+        # Satu timer untuk semua koneksi (bukan wait_for per subscriber), agar subscriber
+        # yang diam tidak memakan timer/task sama sekali
+        if self._loop is None or self._loop.is_closed():
+            return
+        for subscriber in self._all:
+            if subscriber.queue.empty():
+                subscriber.queue.put_nowait(HEARTBEAT_FRAME)
+        self._loop.call_later(self._heartbeat_seconds, self._heartbeat)
+
+    def subscribe(self, keys: Iterable[Key]) -> Subscriber:
+        # Hanya dipanggil dari event loop, sama seperti _dispatch, jadi tidak perlu lock
+        subscriber = Subscriber(keys)
+        for key in subscriber.keys:
+            self._subscribers.setdefault(key, set()).add(subscriber)
+        self._all.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._all.discard(subscriber)
+        for key in subscriber.keys:
+            subscribers = self._subscribers.get(key)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[key]
+
+    def publish(self, event: str, court_id: int, booking_date: date, start_minute: int, end_minute: int):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return # tidak ada server yang berjalan (mis. skrip seed / benchmark)
+        if (court_id, booking_date) not in self._subscribers:
+            # Aman tanpa lock: subscriber baru mengambil availability setelah berlangganan,
+            # dan commit yang memicu publish ini sudah terlihat di sana
+            return
+        with self._lock:
+            event_id = next(self._ids)
+            self.published += 1
+        payload = json.dumps({
+            "court_id": court_id,
+            "date": booking_date.isoformat(),
+            "start": database.minutes_to_time(start_minute),
+            "end": database.minutes_to_time(end_minute),
+            "slots": slot_labels(start_minute, end_minute),
+        }, separators=(",", ":"))
+        frame = f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n".encode()
+        try:
+            loop.call_soon_threadsafe(self._dispatch, (court_id, booking_date), frame)
+        except RuntimeError:
+            pass # loop sedang ditutup (shutdown)
+
+    def _dispatch(self, key: Key, frame: bytes):
+        for subscriber in self._subscribers.get(key, ()):
+            try:
+                subscriber.queue.put_nowait(frame)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                # Klien terlalu lambat: buang antreannya, minta ambil ulang availability
+                self.overflows += 1
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                subscriber.queue.put_nowait(RESYNC_FRAME)
+
+    def stats(self) -> dict:
+        # Boleh dipanggil dari thread lain (GET /metrics): hanya baca counter
+        return {
+            "subscribers": len(self._all),
+            "keys": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "overflows": self.overflows,
+        }
+
+
+RESYNC_FRAME = b"event: resync\ndata: {}\n\n"
+HEARTBEAT_FRAME = b": ping\n\n"
+
+
+def slot_labels(start_minute: int, end_minute: int) -> List[str]:
+    """Label "HH:MM" tiap langkah FUTSAL_GRANULARITY_MINUTES di dalam [start, end)."""
+    return [database.minutes_to_time(minute) for minute in range(start_minute, end_minute, config.GRANULARITY_MINUTES)]
+
+
+def slot_taken(court_id: int, booking_date: date, start_minute: int, end_minute: int):
+    broker.publish("slot_taken", court_id, booking_date, start_minute, end_minute)
+
+
+broker = Broker()
@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+from datetime import date
+from typing import Iterable, Iterator, Optional
+
+from . import crud, database
+
+# --- Export Booking (streaming CSV / NDJSON) ---
+# Baris dibaca dari DB per batch (yield_per) dan langsung ditulis ke respons, sehingga
+# memori server tetap datar berapa pun jumlah baris yang di-export.
+
+EXPORT_BATCH_SIZE = 1000
+
+COLUMNS = [
+    "id", "court_id", "court_name", "customer_name", "customer_phone", "customer_email",
+    "booking_date", "start_time", "end_time", "duration", "total_price", "status", "created_at",
+]
+
+
+def iter_rows(date_from: date, date_to: date, court_id: Optional[int] = None) -> Iterator[dict]:
+    # Session milik generator ini sendiri: tetap terbuka selama body dikirim dan ditutup
+    # begitu stream selesai atau klien memutus koneksi (generator di-close)
+    db = database.SessionLocal()
+    try:
+        for row in crud.iter_bookings_for_export(db, date_from, date_to, court_id, batch_size=EXPORT_BATCH_SIZE):
+            yield {
+                "id": row.id,
+                "court_id": row.court_id,
+                "court_name": row.court_name,
+                "customer_name": row.customer_name,
+                "customer_phone": row.customer_phone,
+                "customer_email": row.customer_email,
+                "booking_date": row.booking_date.isoformat(),
+                "start_time": database.minutes_to_time(row.start_minute),
+                "end_time": database.minutes_to_time(row.end_minute),
+                "duration": row.duration,
+                "total_price": row.total_price,
+                "status": row.status,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+            }
+    finally:
+        db.close()
+
+
+def csv_chunks(rows: Iterable[dict]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNS, lineterminator="\n")
+    writer.writeheader()
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def ndjson_chunks(rows: Iterable[dict]) -> Iterator[bytes]:
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, separators=(",", ":")))
+        if len(lines) == EXPORT_BATCH_SIZE:
+            yield ("\n".join(lines) + "\n").encode()
+            lines.clear()
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+
+# format -> (penulis chunk, media type)
+FORMATS = {
+    "csv": (csv_chunks, "text/csv"),
+    "ndjson": (ndjson_chunks, "application/x-ndjson"),
+}
@@ -0,0 +1,44 @@
+from typing import Iterable, List
+
+# --- Fasilitas Lapangan sebagai Bitset ---
+# Kolom courts.facilities tetap berupa teks "AC,Toilet,Kantin" untuk ditampilkan, tapi
+# setiap nama dinormalisasi (mis. "Wifi" -> "WiFi") dan dipetakan ke satu bit di
+# courts.facility_mask, sehingga filter "punya Parkir dan WiFi" cukup satu operasi AND.
+# Urutan daftar ini = posisi bit: fasilitas baru hanya boleh ditambahkan di akhir.
+
+FACILITIES = ["AC", "Toilet", "Kantin", "WiFi", "Loker", "Shower", "Parkir", "Parkir Luas"]
+
+_CANONICAL = {name.lower(): name for name in FACILITIES}
+_BITS = {name: 1 << bit for bit, name in enumerate(FACILITIES)}
+
+
+class UnknownFacilityError(ValueError):
+    def __init__(self, name: str):
+        super().__init__(f"Unknown facility {name!r}; choose from {', '.join(FACILITIES)}")
+        self.name = name
+
+
+def canonical(name: str) -> str:
+    """Nama baku sebuah fasilitas; nama yang tidak dikenal dikembalikan apa adanya."""
+    name = name.strip()
+    return _CANONICAL.get(name.lower(), name)
+
+
+def split(facilities: str) -> List[str]:
+    return [canonical(name) for name in (facilities or "").split(",") if name.strip()]
+
+
+def to_mask(names: Iterable[str]) -> int:
+    # Fasilitas di luar daftar tetap tampil di teks, tapi tidak bisa difilter
+    return sum(_BITS.get(name, 0) for name in set(names))
+
+
+def required_mask(names: Iterable[str]) -> int:
+    """Mask untuk filter pencarian; berbeda dengan to_mask, nama yang tidak dikenal ditolak."""
+    mask = 0
+    for name in names:
+        bit = _BITS.get(canonical(name))
+        if bit is None:
+            raise UnknownFacilityError(name)
+        mask |= bit
+    return mask
@@ -0,0 +1,201 @@
+import heapq
+import secrets
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from . import cache, coherence, config, database, events, occupancy
+
+# --- Hold Slot Sementara (checkout) ---
+# Hold menahan rentang slot selama HOLD_TTL_SECONDS saat user mengisi form booking.
+# Disimpan in-memory: interval per (court_id, tanggal) untuk cek ketersediaan (format sama
+# dengan occupancy) + min-heap waktu kedaluwarsa, sehingga eviction cukup melihat puncak
+# heap. Hold yang sudah dilepas/dikonversi tetap di heap dan dilewati saat di-pop.
+# Mode multi-worker: hold baru & pelepasannya dicatat ke change_log dan direplikasi ke
+# worker lain (adopt/drop); konversi menjadi booking ikut tercatat di baris booking-nya.
+
+Key = Tuple[int, date]
+
+
+class Hold(NamedTuple):
+    id: str
+    court_id: int
+    booking_date: date
+    start_minute: int
+    end_minute: int
+    expires_at: float # time.monotonic()
+
+
+class SlotHeldError(Exception):
+    def __init__(self, slot_minute: int):
+        super().__init__(f"Slot at {database.minutes_to_time(slot_minute)} is currently held by another customer.")
+        self.slot_minute = slot_minute
+
+
+class HoldLimitError(Exception):
+    pass
+
+
+class HoldInvalidError(Exception):
+    def __init__(self):
+        super().__init__("Hold expired or does not match this booking")
+
+
+class HoldStore:
+    def __init__(self, ttl_seconds: float, max_holds: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_holds = max_holds
+        self._holds: Dict[str, Hold] = {}
+        self._held: Dict[Key, occupancy.Intervals] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def place(self, court_id: int, booking_date: date, start_minute: int, end_minute: int) -> Hold:
+        """Tahan slot jika tidak bentrok dengan hold lain (cek booking dilakukan pemanggil)."""
+        key = (court_id, booking_date)
+        notify_expired(self.expire())
+        with self._lock:
+            held = self._held.get(key, occupancy.EMPTY).overlap(start_minute, end_minute)
+            if held is not None:
+                raise SlotHeldError(held)
+            if len(self._holds) >= self.max_holds:
+                raise HoldLimitError("Too many active holds, try again shortly")
+            hold = Hold(secrets.token_urlsafe(16), court_id, booking_date, start_minute, end_minute,
+                        time.monotonic() + self.ttl_seconds)
+            self._insert(hold)
+        _changed(hold, "slot_taken")
+        try:
+            coherence.record_now([_change(coherence.HOLD, hold)])
+        except BaseException:
+            self.drop(hold.id)
+            raise
+        return hold
+
+    def held(self, court_id: int, booking_date: date) -> occupancy.Intervals:
+        """Rentang menit yang sedang di-hold (format sama dengan occupancy)."""
+        if self._heap and self._heap[0][0] <= time.monotonic():
+            notify_expired(self.expire())
+        with self._lock:
+            return self._held.get((court_id, booking_date), occupancy.EMPTY)
+
+    def claim(self, hold_id: str, court_id: int, booking_date: date, start_minute: int, end_minute: int) -> Optional[Hold]:
+        """Ambil hold untuk dikonversi menjadi booking; None jika tidak ada/kedaluwarsa/tidak cocok.
+
+        Hold langsung dihapus; slotnya tetap aman karena commit booking dijaga unique
+        constraint booking_slots, dan occupancy ditandai setelah commit.
+        """
+        with self._lock:
+            hold = self._holds.get(hold_id)
+            if hold is None or hold.expires_at <= time.monotonic():
+                return None
+            if (hold.court_id, hold.booking_date, hold.start_minute, hold.end_minute) != (court_id, booking_date, start_minute, end_minute):
+                return None
+            self._remove(hold)
+        return hold
+
+    def release(self, hold_id: str) -> Optional[Hold]:
+        hold = self.drop(hold_id)
+        if hold is not None:
+            coherence.record_now([_change(coherence.HOLD_RELEASED, hold)])
+        return hold
+
+    def drop(self, hold_id: str, notify: bool = True) -> Optional[Hold]:
+        """Hapus hold tanpa mencatat ke change_log (juga untuk replika dari worker lain)."""
+        with self._lock:
+            hold = self._holds.get(hold_id)
+            if hold is not None:
+                self._remove(hold)
+        if hold is not None and notify:
+            _changed(hold, "slot_freed")
+        return hold
+
+    def adopt(self, hold: Hold) -> bool:
+        """Replika hold dari worker lain; dilewati jika bentrok dengan hold lokal (booking
+        yang memakai salah satunya tetap dijaga unique constraint booking_slots)."""
+        with self._lock:
+            held = self._held.get((hold.court_id, hold.booking_date), occupancy.EMPTY)
+            if hold.id in self._holds or hold.expires_at <= time.monotonic() or held.overlap(hold.start_minute, hold.end_minute) is not None:
+                return False
+            self._insert(hold)
+        _changed(hold, "slot_taken")
+        return True
+
+    def restore(self, hold: Hold):
+        """Kembalikan hold hasil claim() jika booking gagal karena error sementara."""
+        with self._lock:
+            held = self._held.get((hold.court_id, hold.booking_date), occupancy.EMPTY)
+            if hold.expires_at > time.monotonic() and held.overlap(hold.start_minute, hold.end_minute) is None:
+                self._insert(hold)
+
+    def expire(self) -> List[Hold]:
+        """Buang hold yang sudah lewat TTL; kembalikan yang dibuang untuk di-notify."""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                expires_at, hold_id = heapq.heappop(self._heap)
+                hold = self._holds.get(hold_id)
+                # Entry basi: hold sudah dilepas/dikonversi, atau di-restore dengan entry baru
+                if hold is not None and hold.expires_at == expires_at:
+                    self._remove(hold)
+                    expired.append(hold)
+        return expired
+
+    def _insert(self, hold: Hold):
+        key = (hold.court_id, hold.booking_date)
+        self._holds[hold.id] = hold
+        self._held[key] = self._held.get(key, occupancy.EMPTY).add(hold.start_minute, hold.end_minute)
+        heapq.heappush(self._heap, (hold.expires_at, hold.id))
+
+    def _remove(self, hold: Hold):
+        del self._holds[hold.id]
+        key = (hold.court_id, hold.booking_date)
+        held = self._held[key].remove(hold.start_minute, hold.end_minute)
+        if held:
+            self._held[key] = held
+        else:
+            del self._held[key]
+
+    def clear(self):
+        with self._lock:
+            self._holds.clear()
+            self._held.clear()
+            self._heap.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"active": len(self._holds), "heap": len(self._heap)}
+
+
+def _changed(hold: Hold, event: str):
+    cache.availability.invalidate(hold.court_id, hold.booking_date)
+    events.broker.publish(event, hold.court_id, hold.booking_date, hold.start_minute, hold.end_minute)
+
+def _change(kind: str, hold: Hold) -> dict:
+    return coherence.change(kind, hold.court_id, hold.booking_date, hold.start_minute, hold.end_minute,
+                            hold.id, expires_at_utc(hold))
+
+def notify_expired(expired: List[Hold]):
+    for hold in expired:
+        _changed(hold, "slot_freed")
+
+
+def claim_for_booking(hold_id: Optional[str], court_id: int, booking_date: date, start_minute: int, end_minute: int) -> Optional[Hold]:
+    """Hold untuk POST /bookings/ (None jika request tanpa hold_id); raise HoldInvalidError."""
+    if hold_id is None:
+        return None
+    hold = store.claim(hold_id, court_id, booking_date, start_minute, end_minute)
+    if hold is None:
+        raise HoldInvalidError()
+    return hold
+
+
+def expires_at_utc(hold: Hold) -> datetime:
+    return datetime.utcnow() + timedelta(seconds=max(0.0, hold.expires_at - time.monotonic()))
+
+def monotonic_deadline(expires_at: datetime) -> float:
+    """Kebalikan expires_at_utc(), untuk hold yang direplikasi dari worker lain."""
+    return time.monotonic() + (expires_at - datetime.utcnow()).total_seconds()
+
+store = HoldStore(config.HOLD_TTL_SECONDS, config.MAX_HOLDS)
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, NamedTuple, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import config, database, models
+
+# --- Idempotency-Key untuk POST /bookings/ ---
+# Request pertama dengan sebuah key "mengklaim" baris di tabel idempotency_keys
+# (status_code NULL = sedang diproses). Retry dengan key yang sama menunggu request itu
+# selesai lalu mendapat respons aslinya tanpa eksekusi ulang: duplikat di worker yang sama
+# menunggu lewat threading.Event, duplikat di worker lain mem-polling baris tersebut.
+# Hasil sukses (booking_id) ditulis dalam transaksi yang sama dengan booking-nya, jadi
+# klaim tanpa hasil yang sudah lewat IDEMPOTENCY_LEASE_SECONDS (mis. worker mati) pasti
+# belum membuat booking dan aman diambil alih.
+
+MAX_KEY_LENGTH = 255
+# Jeda polling saat key sedang diproses worker lain
+POLL_SECONDS = 0.05
+# Penanda di respons yang diambil dari store, bukan hasil eksekusi baru
+REPLAY_HEADERS = {"Idempotent-Replayed": "true"}
+
+IdempotencyKey = database.IdempotencyKey
+
+
+class KeyReusedError(Exception):
+    def __init__(self):
+        super().__init__("Idempotency-Key was already used with a different request")
+
+
+class InProgressError(Exception):
+    def __init__(self):
+        super().__init__("A request with this Idempotency-Key is still in progress")
+
+
+class FinalHTTPException(HTTPException):
+    """Error yang pasti sama jika request diulang (slot sudah dibooking, court tidak ada);
+    hanya error ini yang disimpan di bawah key. Error lain (mis. hold kedaluwarsa atau
+    slot sedang di-hold orang lain) melepas klaim sehingga retry dieksekusi ulang."""
+
+
+class Outcome(NamedTuple):
+    status_code: int
+    booking_id: Optional[int]
+    detail: Optional[str]
+
+
+def request_hash(booking: models.BookingCreate) -> str:
+    """Sidik jari body request; key yang sama dengan body berbeda ditolak.
+
+    hold_id tidak ikut: submit ulang setelah hold terpakai tetap request yang sama.
+    """
+    payload = booking.dict(exclude={"hold_id"})
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class InFlight:
+    """Key yang sedang dieksekusi di worker ini, agar duplikatnya cukup menunggu Event."""
+
+    def __init__(self):
+        self._events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def enter(self, key: str) -> Optional[threading.Event]:
+        """None jika pemanggil kini pemegang key; selain itu Event milik pemegangnya."""
+        with self._lock:
+            event = self._events.get(key)
+            if event is None:
+                self._events[key] = threading.Event()
+            return event
+
+    def leave(self, key: str):
+        with self._lock:
+            event = self._events.pop(key, None)
+        if event is not None:
+            event.set()
+
+
+inflight = InFlight()
+
+# Penanda hasil _claim(): key sedang diproses request lain
+_PENDING = object()
+
+
+def begin(db: Session, key: str, digest: str) -> Optional[Outcome]:
+    """Klaim key untuk dieksekusi (return None), atau Outcome request asli untuk di-replay.
+
+    Setelah None, pemanggil wajib menutup klaim dengan booking_statement() di transaksi
+    booking-nya lalu release(), atau finish()/abandon().
+    """
+    deadline = time.monotonic() + config.IDEMPOTENCY_LEASE_SECONDS
+    while True:
+        event = inflight.enter(key)
+        if event is not None:
+            event.wait(max(0.0, deadline - time.monotonic()))
+        else:
+            try:
+                outcome = _claim(db, key, digest)
+            except BaseException:
+                inflight.leave(key)
+                raise
+            if outcome is None:
+                return None
+            inflight.leave(key)
+            if outcome is not _PENDING:
+                return outcome
+            time.sleep(POLL_SECONDS)
+        if time.monotonic() >= deadline:
+            raise InProgressError()
+
+
+def _claim(db: Session, key: str, digest: str):
+    now = datetime.utcnow()
+    row = db.execute(select(
+        IdempotencyKey.request_hash, IdempotencyKey.status_code, IdempotencyKey.booking_id,
+        IdempotencyKey.detail, IdempotencyKey.created_at, IdempotencyKey.claimed_at,
+    ).where(IdempotencyKey.key == key)).first()
+    # Akhiri transaksi baca agar polling berikutnya melihat data terbaru
+    db.rollback()
+
+    if row is None or row.created_at < now - timedelta(seconds=config.IDEMPOTENCY_TTL_SECONDS):
+        try:
+            if row is not None:
+                db.execute(delete(IdempotencyKey).where(
+                    IdempotencyKey.key == key, IdempotencyKey.created_at == row.created_at
+                ))
+            db.execute(insert(IdempotencyKey).values(
+                key=key, request_hash=digest, created_at=now, claimed_at=now
+            ))
+            db.commit()
+            return None
+        except IntegrityError:
+            # Request lain mengklaim key ini duluan
+            db.rollback()
+            return _PENDING
+
+    if row.request_hash != digest:
+        raise KeyReusedError()
+    if row.status_code is not None:
+        return Outcome(row.status_code, row.booking_id, row.detail)
+    if row.claimed_at < now - timedelta(seconds=config.IDEMPOTENCY_LEASE_SECONDS):
+        # Pemegang klaim tidak pernah selesai: ambil alih (hanya satu yang menang)
+        taken_over = db.execute(update(IdempotencyKey).where(
+            IdempotencyKey.key == key,
+            IdempotencyKey.status_code.is_(None),
+            IdempotencyKey.claimed_at == row.claimed_at,
+        ).values(claimed_at=now)).rowcount
+        db.commit()
+        if taken_over:
+            return None
+    return _PENDING
+
+
+def booking_statement(key: str, booking_id: int):
+    """UPDATE yang menutup klaim dengan hasil sukses; jalankan di transaksi booking."""
+    return update(IdempotencyKey).where(IdempotencyKey.key == key).values(status_code=200, booking_id=booking_id)
+
+
+def release(key: str):
+    """Bangunkan duplikat di worker ini setelah transaksi booking di-commit."""
+    inflight.leave(key)
+
+
+def finish(db: Session, key: str, status_code: int, detail: str):
+    """Simpan respons error final (FinalHTTPException) agar retry mendapat error yang sama."""
+    try:
+        db.rollback()
+        db.execute(update(IdempotencyKey).where(IdempotencyKey.key == key).values(status_code=status_code, detail=detail))
+        db.commit()
+    finally:
+        inflight.leave(key)
+
+
+def abandon(db: Session, key: str):
+    """Lepas klaim tanpa hasil (error tak terduga): retry berikutnya dieksekusi ulang."""
+    try:
+        db.rollback()
+        db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)))
+        db.commit()
+    finally:
+        inflight.leave(key)
+
+
+def prune(db: Session) -> int:
+    """Buang key yang lewat TTL, lalu yang tertua jika jumlahnya melebihi IDEMPOTENCY_MAX_KEYS."""
+    cutoff = datetime.utcnow() - timedelta(seconds=config.IDEMPOTENCY_TTL_SECONDS)
+    removed = db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff)).rowcount
+    excess = db.execute(select(func.count()).select_from(IdempotencyKey)).scalar() - config.IDEMPOTENCY_MAX_KEYS
+    if excess > 0:
+        # Klaim yang masih diproses tidak ikut dibuang
+        oldest = select(IdempotencyKey.key).where(
+            IdempotencyKey.status_code.is_not(None)
+        ).order_by(IdempotencyKey.created_at).limit(excess)
+        removed += db.execute(delete(IdempotencyKey).where(IdempotencyKey.key.in_(oldest))).rowcount
+    db.commit()
+    return removed
@@ -1,15 +1,58 @@
-from fastapi import FastAPI, Depends, HTTPException
+import asyncio
+import base64
+import hmac
+import json
+from contextlib import asynccontextmanager
+from anyio import to_thread
+from fastapi import FastAPI, Depends, HTTPException, Query, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from typing import List, Dict
-from datetime import datetime, timedelta
+from typing import List, Dict, Optional
+from collections import defaultdict
+from datetime import datetime, timedelta, date
 
-from . import crud, models, database
+from . import admission, cache, coherence, config, crud, events, export, holds, idempotency, metrics, models, database, occupancy, rollups
+from .params import duration_param
+from . import facilities as facility_names
 
-# Buat tabel di database
-database.create_db_and_tables()
+# Import modul ini tidak boleh melakukan I/O (worker baru harus murah & tidak merusak):
+# skema, seed, broker event & sweeper hold disiapkan di lifespan.
 
-app = FastAPI()
+def init_database():
+    """Skema + data awal; idempotent dan aman dijalankan beberapa worker sekaligus."""
+    if config.RESET_DB:
+        database.reset_database()
+    with database.schema_lock():
+        database.create_db_and_tables()
+        db = database.SessionLocal()
+        try:
+            crud.seed_data(db)
+        finally:
+            db.close()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Threadpool handler sync (run_in_threadpool memakai limiter default AnyIO)
+    to_thread.current_default_thread_limiter().total_tokens = config.THREADPOOL_SIZE
+    init_database()
+    loop = asyncio.get_running_loop()
+    # Publish dari thread handler sync diteruskan ke loop ini
+    events.broker.bind(loop)
+    sweepers = [loop.create_task(sweep_expired_holds()), loop.create_task(prune_idempotency_keys())]
+    if config.MULTI_WORKER:
+        coherence.watcher.start()
+        sweepers += [loop.create_task(watch_changes()), loop.create_task(prune_change_log())]
+    try:
+        yield
+    finally:
+        for sweeper in sweepers:
+            sweeper.cancel()
+        coherence.watcher.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 # Atur CORS agar frontend bisa mengakses API
 origins = [
@@ -24,6 +67,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Mode multi-worker: terapkan perubahan dari worker lain sebelum request dilayani
+if config.MULTI_WORKER:
+    app.add_middleware(coherence.SyncMiddleware)
+
+# Rate limit per klien & batas konkurensi baca/tulis; request yang ditolak tetap tercatat
+# di metrics (middleware di bawah ini berada di luarnya)
+app.add_middleware(admission.AdmissionMiddleware)
+
+# Latency per route, jumlah query SQL per request & rasio 409 -> GET /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(database.engine)
+if database.async_engine is not None:
+    metrics.instrument_engine(database.async_engine.sync_engine)
+
 # Dependency untuk mendapatkan session DB
 def get_db():
     db = database.SessionLocal()
@@ -32,59 +89,570 @@ def get_db():
     finally:
         db.close()
 
-@app.on_event("startup")
-def on_startup():
-    # Isi database dengan data dummy saat aplikasi pertama kali dijalankan
+# Hold yang kedaluwarsa dibuang secara berkala (bukan hanya saat diakses) agar cache
+# availability dibersihkan dan event slot_freed terkirim tepat waktu
+HOLD_SWEEP_SECONDS = 1.0
+
+async def sweep_expired_holds():
+    while True:
+        await asyncio.sleep(HOLD_SWEEP_SECONDS)
+        holds.notify_expired(holds.store.expire())
+
+# Idempotency-Key yang lewat TTL / melebihi batas jumlah dibuang dari DB secara berkala
+IDEMPOTENCY_PRUNE_SECONDS = 60.0
+
+def prune_idempotency_keys_once() -> int:
+    db = database.SessionLocal()
+    try:
+        return idempotency.prune(db)
+    finally:
+        db.close()
+
+async def prune_idempotency_keys():
+    while True:
+        await asyncio.sleep(IDEMPOTENCY_PRUNE_SECONDS)
+        await run_in_threadpool(prune_idempotency_keys_once)
+
+# Mode multi-worker: perubahan dari worker lain juga diambil tanpa menunggu request
+# (event SSE, hold), dan baris change_log lama dipangkas
+CHANGE_LOG_PRUNE_SECONDS = 60.0
+
+async def watch_changes():
+    while True:
+        await asyncio.sleep(config.CHANGE_POLL_SECONDS)
+        coherence.watcher.sync()
+
+def prune_change_log_once() -> int:
     db = database.SessionLocal()
-    crud.seed_data(db)
-    db.close()
+    try:
+        return coherence.prune(db)
+    finally:
+        db.close()
+
+async def prune_change_log():
+    while True:
+        await asyncio.sleep(CHANGE_LOG_PRUNE_SECONDS)
+        await run_in_threadpool(prune_change_log_once)
 
 # --- API Endpoints ---
 
-@app.get("/courts/", response_model=List[models.Court])
-def read_courts(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def court_metadata(court: database.Court) -> dict:
+    # Hanya kolom tabel courts, relasi bookings tidak disentuh (tidak ada lazy load)
+    return {column.key: getattr(court, column.key) for column in database.Court.__table__.columns}
+
+# Batas rentang tanggal untuk ?include=bookings agar payload tetap terkendali
+MAX_INCLUDE_RANGE_DAYS = 31
+
+court_listing = TypeAdapter(List[models.CourtListing])
+
+@app.get("/courts/", response_model=List[models.CourtListing], response_model_exclude_none=True)
+def read_courts(
+    skip: int = 0,
+    limit: int = 100,
+    include: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    if include is None:
+        # Body sudah jadi (divalidasi response model sekali saat dibangun); dibangun ulang
+        # hanya setelah data courts berubah
+        def build() -> bytes:
+            courts = court_listing.validate_python([court_metadata(c) for c in crud.get_courts(db, skip=skip, limit=limit)])
+            return court_listing.dump_json(courts, exclude_none=True)
+        return cache.json_response(cache.courts.get((skip, limit), build), if_none_match)
+    if include != "bookings":
+        raise HTTPException(status_code=400, detail="Only include=bookings is supported")
+
+    start = date_from or datetime.today().date()
+    end = date_to or start + timedelta(days=6)
+    if end < start or (end - start).days >= MAX_INCLUDE_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range must span 1 to {MAX_INCLUDE_RANGE_DAYS} days")
+
     courts = crud.get_courts(db, skip=skip, limit=limit)
-    return courts
+    bookings_by_court = defaultdict(list)
+    for b in crud.get_bookings_in_range(db, [c.id for c in courts], start, end):
+        bookings_by_court[b.court_id].append(b)
+
+    return [{**court_metadata(c), "bookings": bookings_by_court[c.id]} for c in courts]
+
+MAX_SEARCH_LIMIT = 100
+
+# Cursor keyset = nilai kunci urutan baris terakhir, JSON lalu base64 (opaque bagi klien)
+def encode_cursor(*values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode()
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(types):
+            raise ValueError(cursor)
+        return tuple(cast(value) for cast, value in zip(types, values))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def parse_facilities(values: List[str]) -> int:
+    try:
+        # ?facilities=Parkir&facilities=WiFi atau ?facilities=Parkir,WiFi
+        return facility_names.required_mask(name for value in values for name in value.split(",") if name.strip())
+    except facility_names.UnknownFacilityError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/courts/search", response_model=models.CourtSearchPage)
+def search_courts(
+    type: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    facilities: List[str] = Query([]),
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    db: Session = Depends(get_db),
+):
+    """Cari lapangan berdasarkan tipe, rentang harga & fasilitas wajib, urut harga termurah.
+
+    Pagination keyset: halaman berikutnya diambil dengan ?cursor=<next_cursor>, bukan offset,
+    sehingga biaya per halaman tetap sama sedalam apa pun user menggulir.
+    """
+    if not 1 <= limit <= MAX_SEARCH_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_SEARCH_LIMIT}")
+    required = parse_facilities(facilities)
+
+    # Ambil satu baris ekstra untuk tahu apakah masih ada halaman berikutnya
+    courts = crud.search_courts(
+        db, type=type, min_price=min_price, max_price=max_price, facility_mask=required,
+        after=decode_cursor(cursor, float, int) if cursor else None, limit=limit + 1,
+    )
+    page = courts[:limit]
+    return {
+        "courts": [court_metadata(c) for c in page],
+        "next_cursor": encode_cursor(page[-1].price, page[-1].id) if len(courts) > limit else None,
+    }
+
+@app.get("/courts/free", response_model=List[models.FreeCourt])
+def find_free_courts(
+    date: date,
+    start_time: str,
+    duration: float = 1,
+    type: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    facilities: List[str] = Query([]),
+    db: Session = Depends(get_db),
+):
+    """Lapangan mana saja yang kosong pada tanggal & jam tertentu, urut dari yang termurah."""
+    try:
+        start = datetime.strptime(start_time, "%H:%M")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start_time must be HH:MM")
+    start_minute = start.hour * 60 + start.minute
+    end_minute = start_minute + duration_param(duration)
+
+    courts = crud.find_free_courts(
+        db, date, start_minute, end_minute, type=type, min_price=min_price, max_price=max_price,
+        facility_mask=parse_facilities(facilities),
+    )
+    result = []
+    for court in courts:
+        open_minute, close_minute = database.operating_minutes(court)
+        if holds.store.held(court.id, date).overlap(start_minute, end_minute) is not None:
+            continue
+        if open_minute <= start_minute and end_minute <= close_minute:
+            result.append({**court_metadata(court), "total_price": court.price * duration})
+    return result
 
 @app.get("/courts/{court_id}/availability")
-def get_availability(court_id: int, date: str, db: Session = Depends(get_db)):
-    court = crud.get_court(db, court_id)
+def get_availability(
+    court_id: int,
+    date: date,
+    duration: float = 1,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """Jam mulai yang muat `duration` jam (per FUTSAL_GRANULARITY_MINUTES) + rentang kosong."""
+    length = duration_param(duration)
+    # Cache hit (termasuk 304) tidak menyentuh SQLite sama sekali
+    entry, generation = cache.availability.get(court_id, date, length)
+    if entry is None:
+        court = crud.get_court(db, court_id)
+        if not court:
+            raise HTTPException(status_code=404, detail="Court not found")
+
+        taken = crud.get_occupancy(db, court_id, date).union(holds.store.held(court_id, date))
+        payload = crud.availability_payload(court, taken, length)
+
+        entry = cache.availability.put(court_id, date, payload, generation, length)
+
+    return cache.json_response(entry, if_none_match)
+
+# Batas jumlah key (lapangan x tanggal) per koneksi SSE
+MAX_SUBSCRIPTION_KEYS = 100
+
+@app.get("/events/availability")
+async def stream_availability(court_id: List[int] = Query(...), date: List[date] = Query(...)):
+    """Server-Sent Events: slot_taken / slot_freed untuk setiap (court_id, date) yang diminta.
+
+    Contoh: ?court_id=1&court_id=2&date=2031-01-03 -> 2 key. Event `resync` berarti ada event
+    yang terlewat (klien terlalu lambat); ambil ulang availability. Frame pertama (retry:)
+    menandakan langganan sudah aktif, jadi availability yang diambil setelahnya tidak akan
+    melewatkan perubahan.
+    """
+    keys = {(c, d) for c in court_id for d in date}
+    if len(keys) > MAX_SUBSCRIPTION_KEYS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SUBSCRIPTION_KEYS} (court_id, date) pairs per stream")
+
+    async def stream():
+        subscriber = events.broker.subscribe(keys)
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                # Heartbeat juga masuk lewat antrean ini (lihat Broker._heartbeat)
+                yield await subscriber.queue.get()
+        finally:
+            events.broker.unsubscribe(subscriber)
+
+    # X-Accel-Buffering: cegah reverse proxy (nginx) menahan event
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    return {"availability": cache.availability.stats(), "courts": cache.courts.stats(), "coherence": coherence.watcher.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    # Format teks Prometheus (exposition format 0.0.4)
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+
+MAX_GRID_DAYS = 31
+
+@app.get("/availability/grid")
+def get_availability_grid(
+    date_from: date,
+    days: int = 7,
+    court_ids: Optional[List[int]] = Query(None),
+    db: Session = Depends(get_db),
+):
+    """Matriks ketersediaan N lapangan x D hari dalam satu request.
+
+    `booked[i]` adalah daftar rentang ["HH:MM", "HH:MM") yang sudah dibooking atau di-hold pada
+    hari ke-i sejak date_from; `slot_minutes` adalah granularitas jam mulai.
+    """
+    if not 1 <= days <= MAX_GRID_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {MAX_GRID_DAYS}")
+
+    courts = crud.get_courts_by_ids(db, court_ids) if court_ids else crud.get_courts(db)
+    date_to = date_from + timedelta(days=days - 1)
+
+    ranges = defaultdict(list)
+    for row in crud.get_booked_ranges(db, [c.id for c in courts], date_from, date_to):
+        ranges[row.court_id, row.booking_date].append((row.start_minute, row.end_minute))
+
+    dates = [date_from + timedelta(days=i) for i in range(days)]
+    grid = []
+    for court in courts:
+        open_hour, close_hour = database.operating_hours(court)
+        grid.append({
+            "court_id": court.id,
+            "name": court.name,
+            "open_hour": open_hour,
+            "close_hour": close_hour,
+            "booked": [
+                [
+                    [database.minutes_to_time(start), database.minutes_to_time(end)]
+                    for start, end in occupancy.Intervals.from_ranges(ranges[court.id, d]).union(holds.store.held(court.id, d))
+                ]
+                for d in dates
+            ],
+        })
+    return cache.fast_json({"date_from": date_from, "days": days, "slot_minutes": config.GRANULARITY_MINUTES, "courts": grid})
+
+
+MAX_HISTORY_LIMIT = 100
+
+@app.get("/bookings/history", response_model=models.BookingHistoryPage)
+def read_booking_history(
+    phone: Optional[str] = None,
+    email: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    db: Session = Depends(get_db),
+):
+    """Riwayat booking seorang pelanggan berdasarkan nomor HP atau email, terbaru dulu.
+
+    Pagination keyset (?cursor=<next_cursor>) lewat index covering, sehingga pelanggan
+    dengan ratusan booking tetap dilayani dengan satu index range scan per halaman.
+    """
+    phone = phone.strip() if phone else None
+    email = email.strip() if email else None
+    if bool(phone) == bool(email):
+        raise HTTPException(status_code=400, detail="Provide exactly one of phone or email")
+    if not 1 <= limit <= MAX_HISTORY_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_HISTORY_LIMIT}")
+
+    before = decode_cursor(cursor, date.fromisoformat, int, int) if cursor else None
+    rows = crud.get_booking_history(db, phone=phone, email=email, before=before, limit=limit + 1)
+    page = rows[:limit]
+    return {
+        "bookings": [
+            {
+                "id": row.id,
+                "court_id": row.court_id,
+                "court_name": row.court_name,
+                "booking_date": row.booking_date,
+                "start_time": database.minutes_to_time(row.start_minute),
+                "end_time": database.minutes_to_time(row.end_minute),
+                "duration": row.duration,
+                "total_price": row.total_price,
+                "status": row.status,
+            }
+            for row in page
+        ],
+        "next_cursor": encode_cursor(page[-1].booking_date, page[-1].start_minute, page[-1].id) if len(rows) > limit else None,
+    }
+
+@app.get("/bookings/export")
+def export_bookings(
+    date_from: date,
+    date_to: date,
+    court_id: Optional[int] = None,
+    format: str = "csv",
+    x_export_token: Optional[str] = Header(None),
+):
+    """Dump booking dalam rentang tanggal (inklusif) sebagai CSV atau NDJSON, di-stream per batch.
+
+    Khusus operator: header X-Export-Token harus sama dengan FUTSAL_EXPORT_TOKEN.
+    """
+    if config.EXPORT_TOKEN is None:
+        raise HTTPException(status_code=403, detail="Export is disabled on this server")
+    if x_export_token is None or not hmac.compare_digest(x_export_token.encode(), config.EXPORT_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Export-Token")
+    if format not in export.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(export.FORMATS)}")
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to must not be before date_from")
+
+    write_chunks, media_type = export.FORMATS[format]
+    filename = f"bookings_{date_from.isoformat()}_{date_to.isoformat()}.{format}"
+    return StreamingResponse(
+        write_chunks(export.iter_rows(date_from, date_to, court_id)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+MAX_ANALYTICS_PERIODS = 366
+
+def analytics_periods(period: str, date_from: date, date_to: date) -> List[date]:
+    """Awal tiap periode yang beririsan dengan [date_from, date_to]."""
+    if period not in rollups.PERIODS:
+        raise HTTPException(status_code=400, detail=f"period must be one of {', '.join(rollups.PERIODS)}")
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to must not be before date_from")
+    starts = []
+    start = rollups.period_start(period, date_from)
+    while start <= date_to:
+        if len(starts) == MAX_ANALYTICS_PERIODS:
+            raise HTTPException(status_code=400, detail=f"Range covers more than {MAX_ANALYTICS_PERIODS} periods")
+        starts.append(start)
+        start = rollups.next_period(period, start)
+    return starts
+
+def usage(period: str, period_start: date, bookings: int, booked_hours: int, revenue: float, open_hours: int) -> dict:
+    capacity = open_hours * rollups.period_days(period, period_start)
+    return {
+        "period_start": period_start,
+        "bookings": bookings,
+        "booked_hours": booked_hours,
+        "revenue": revenue,
+        "capacity_hours": capacity,
+        "utilization": round(booked_hours / capacity, 4) if capacity else 0.0,
+    }
+
+@app.get("/analytics/courts", response_model=models.CourtAnalytics)
+def read_court_analytics(
+    date_from: date,
+    date_to: date,
+    period: str = "day",
+    court_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+):
+    """Okupansi & pendapatan per lapangan per periode, dibaca dari booking_rollups saja.
+
+    Periode (day/week/month) dihitung utuh walau hanya sebagian beririsan dengan rentang;
+    pasangan (lapangan, periode) tanpa booking tidak dikembalikan.
+    """
+    analytics_periods(period, date_from, date_to)
+    rows = []
+    for row in crud.get_rollups(db, period, date_from, date_to, court_id):
+        open_hour, close_hour = database.operating_hours(row)
+        rows.append({
+            "court_id": row.court_id,
+            "court_name": row.court_name,
+            **usage(period, row.period_start, row.bookings, row.booked_hours, row.revenue, close_hour - open_hour),
+        })
+    return {"period": period, "rows": rows}
+
+@app.get("/analytics/summary", response_model=models.AnalyticsSummary)
+def read_analytics_summary(
+    date_from: date,
+    date_to: date,
+    period: str = "day",
+    db: Session = Depends(get_db),
+):
+    """Total semua lapangan per periode; setiap periode dalam rentang ada barisnya."""
+    starts = analytics_periods(period, date_from, date_to)
+    totals = {row.period_start: row for row in crud.get_rollup_totals(db, period, date_from, date_to)}
+    open_hours = crud.get_daily_open_hours(db)
+    rows = []
+    for start in starts:
+        row = totals.get(start)
+        if row is None:
+            rows.append(usage(period, start, 0, 0, 0.0, open_hours))
+        else:
+            rows.append(usage(period, start, row.bookings, row.booked_hours, row.revenue, open_hours))
+    return {"period": period, "rows": rows}
+
+@app.post("/holds", response_model=models.Hold, status_code=201)
+def create_hold(request: models.HoldCreate, db: Session = Depends(get_db)):
+    """Tahan slot selama HOLD_TTL_SECONDS; kirim hold_id bersama POST /bookings/ untuk konversi."""
+    court = crud.get_court(db, request.court_id)
     if not court:
         raise HTTPException(status_code=404, detail="Court not found")
+    start_minute = database.time_to_minutes(request.start_time)
+    end_minute = start_minute + database.duration_minutes(request.duration)
+    check_operating_hours(court, start_minute, end_minute)
+    check_slots_free(db, request.court_id, request.booking_date, start_minute, end_minute)
+    try:
+        hold = holds.store.place(request.court_id, request.booking_date, start_minute, end_minute)
+    except holds.SlotHeldError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except holds.HoldLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return hold_response(hold)
+
+@app.delete("/holds/{hold_id}", status_code=204)
+def release_hold(hold_id: str):
+    if holds.store.release(hold_id) is None:
+        raise HTTPException(status_code=404, detail="Hold not found or already expired")
 
-    bookings = crud.get_bookings_on_date(db, court_id, date)
-    booked_slots = set()
-    for b in bookings:
-        start_hour = int(b.start_time.split(':')[0])
-        for i in range(b.duration):
-            booked_slots.add(f"{start_hour + i:02d}:00")
+def hold_response(hold: holds.Hold) -> dict:
+    return {
+        "hold_id": hold.id,
+        "court_id": hold.court_id,
+        "booking_date": hold.booking_date,
+        "start_time": database.minutes_to_time(hold.start_minute),
+        "duration": (hold.end_minute - hold.start_minute) / 60,
+        "expires_at": holds.expires_at_utc(hold),
+        "ttl_seconds": holds.store.ttl_seconds,
+    }
 
-    start_op, end_op = court.operating_hours.split('-')
-    start_hour_op = int(start_op.split(':')[0])
-    end_hour_op = int(end_op.split(':')[0])
+def check_operating_hours(court: database.Court, start_minute: int, end_minute: int):
+    """422 jika rentang booking/hold di luar jam operasional lapangan."""
+    try:
+        crud.check_operating_hours(court, start_minute, end_minute)
+    except crud.OutsideOperatingHoursError as e:
+        raise idempotency.FinalHTTPException(status_code=422, detail=str(e))
 
-    available_slots = []
-    for hour in range(start_hour_op, end_hour_op):
-        time_slot = f"{hour:02d}:00"
-        if time_slot not in booked_slots:
-            available_slots.append(time_slot)
-            
-    return {"available_slots": available_slots}
+def check_slots_free(db: Session, court_id: int, booking_date: date, start_minute: int, end_minute: int):
+    """409 jika ada slot yang sudah dibooking atau sedang di-hold orang lain."""
+    taken = crud.get_occupancy(db, court_id, booking_date).overlap(start_minute, end_minute)
+    if taken is not None:
+        raise idempotency.FinalHTTPException(status_code=409, detail=str(crud.SlotTakenError(taken)))
+    held = holds.store.held(court_id, booking_date).overlap(start_minute, end_minute)
+    if held is not None:
+        raise HTTPException(status_code=409, detail=str(holds.SlotHeldError(held)))
+
+def begin_idempotent(db: Session, key: str, booking: models.BookingCreate) -> Optional[idempotency.Outcome]:
+    if not 1 <= len(key) <= idempotency.MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1 to {idempotency.MAX_KEY_LENGTH} characters")
+    try:
+        return idempotency.begin(db, key, idempotency.request_hash(booking))
+    except idempotency.KeyReusedError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except idempotency.InProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
+def replay_booking(db: Session, outcome: idempotency.Outcome, response: Response):
+    if outcome.status_code != 200:
+        raise HTTPException(status_code=outcome.status_code, detail=outcome.detail, headers=idempotency.REPLAY_HEADERS)
+    response.headers.update(idempotency.REPLAY_HEADERS)
+    return db.get(database.Booking, outcome.booking_id)
 
 @app.post("/bookings/", response_model=models.Booking)
-def create_booking(booking: models.BookingCreate, db: Session = Depends(get_db)):
-    # Cek ketersediaan sekali lagi sebelum membuat booking
-    bookings = crud.get_bookings_on_date(db, booking.court_id, booking.booking_date)
-    start_hour = int(booking.start_time.split(':')[0])
-    
-    for i in range(booking.duration):
-        check_time = f"{start_hour + i:02d}:00"
-        for b in bookings:
-            booked_start_hour = int(b.start_time.split(':')[0])
-            if check_time in [f"{booked_start_hour+j:02d}:00" for j in range(b.duration)]:
-                raise HTTPException(status_code=409, detail=f"Slot at {check_time} is already booked.")
+def create_booking(
+    booking: models.BookingCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """Dengan header Idempotency-Key, retry (timeout, double submit) mendapat respons asli
+    tanpa dieksekusi ulang; duplikat yang datang bersamaan menunggu request pertama selesai.
+    """
+    if idempotency_key is None:
+        return book(db, booking)
+    outcome = begin_idempotent(db, idempotency_key, booking)
+    if outcome is not None:
+        return replay_booking(db, outcome, response)
+    try:
+        db_booking = book(db, booking, idempotency_key)
+    except idempotency.FinalHTTPException as e:
+        idempotency.finish(db, idempotency_key, e.status_code, e.detail)
+        raise
+    except BaseException:
+        idempotency.abandon(db, idempotency_key)
+        raise
+    idempotency.release(idempotency_key)
+    return db_booking
+
+def book(db: Session, booking: models.BookingCreate, idempotency_key: Optional[str] = None) -> database.Booking:
+    # Dengan hold yang valid slotnya sudah dicek saat hold dibuat; tanpa hold, cek sekali lagi
+    start_minute = database.time_to_minutes(booking.start_time)
+    end_minute = start_minute + database.duration_minutes(booking.duration)
+    # Dicek sebelum hold diklaim, dan sebelum indeks okupansi menyimpan entry untuk court ini
+    court = crud.get_court(db, booking.court_id)
+    if not court:
+        raise idempotency.FinalHTTPException(status_code=404, detail="Court not found")
+    check_operating_hours(court, start_minute, end_minute)
+    try:
+        hold = holds.claim_for_booking(booking.hold_id, booking.court_id, booking.booking_date, start_minute, end_minute)
+    except holds.HoldInvalidError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if hold is None:
+        check_slots_free(db, booking.court_id, booking.booking_date, start_minute, end_minute)
+
+    try:
+        db_booking = crud.create_booking(db=db, booking=booking, idempotency_key=idempotency_key)
+    except crud.SlotTakenError as e:
+        raise idempotency.FinalHTTPException(status_code=409, detail=str(e))
+    except Exception:
+        # Error sementara (mis. database terkunci): hold dikembalikan agar bisa dicoba lagi
+        if hold is not None:
+            holds.store.restore(hold)
+        raise
+    if db_booking is None:
+        raise idempotency.FinalHTTPException(status_code=404, detail="Court not found")
+    return db_booking
+
+
+# Batas jumlah occurrence (lapangan x pengulangan) per request batch
+MAX_BATCH_OCCURRENCES = 400
 
-    return crud.create_booking(db=db, booking=booking)
+@app.post("/bookings/batch", response_model=models.BatchBookingResult)
+def create_recurring_bookings(request: models.RecurringBookingCreate, db: Session = Depends(get_db)):
+    if not request.court_ids or request.occurrences < 1 or request.interval_days < 1:
+        raise HTTPException(status_code=400, detail="court_ids, occurrences and interval_days must be non-empty/positive")
+    if len(set(request.court_ids)) * request.occurrences > MAX_BATCH_OCCURRENCES:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {MAX_BATCH_OCCURRENCES} occurrences")
+
+    result = crud.create_recurring_bookings(db=db, request=request)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Court not found")
+    return result
 
 
+# --- Mode Async ---
+# FUTSAL_ASYNC_DB=1 mengganti endpoint availability & booking di atas dengan versi async def
+if config.ASYNC_DB:
+    from . import async_api
+    async_api.install(app)
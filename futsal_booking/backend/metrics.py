@@ -0,0 +1,243 @@
+import contextvars
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from . import admission, cache, coherence, config, events, holds
+
+# --- Instrumentasi Performa per Request ---
+# Middleware ASGI mencatat latency per route; hook engine SQLAlchemy menghitung jumlah &
+# waktu statement SQL milik request yang sedang berjalan (lewat contextvar, yang ikut
+# terbawa ke thread threadpool). Semua diekspos dalam format Prometheus di /metrics.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_LOG_MAX_STATEMENTS = 50
+
+slow_log = logging.getLogger("futsal.slow_requests")
+
+
+class RequestStats:
+    __slots__ = ("statements", "sql_seconds", "queries")
+
+    def __init__(self, record_sql: bool):
+        self.statements = 0
+        self.sql_seconds = 0.0
+        # Teks SQL hanya disimpan jika slow-request log aktif
+        self.queries: Optional[List[Tuple[str, object, float]]] = [] if record_sql else None
+
+
+current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("futsal_request_stats", default=None)
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str, int], int] = defaultdict(int)
+        self.latency: Dict[Tuple[str, str], Histogram] = defaultdict(Histogram)
+        self.sql_statements: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.sql_seconds: Dict[Tuple[str, str], float] = defaultdict(float)
+        self.booking_outcomes: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.in_progress = 0
+
+    def started(self):
+        with self._lock:
+            self.in_progress += 1
+
+    def finished(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        with self._lock:
+            self.in_progress -= 1
+            self.requests[method, route, status] += 1
+            self.latency[method, route].observe(seconds)
+            self.sql_statements[method, route] += stats.statements
+            self.sql_seconds[method, route] += stats.sql_seconds
+            if method == "POST" and route.startswith("/bookings"):
+                outcome = "confirmed" if status < 300 else "conflict" if status == 409 else "rejected" if status < 500 else "error"
+                self.booking_outcomes[route, outcome] += 1
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            metric("futsal_http_requests_total", "counter", "HTTP requests by route and status code.")
+            for (method, route, status), value in sorted(self.requests.items()):
+                lines.append(f'futsal_http_requests_total{{method="{method}",route="{route}",status="{status}"}} {value}')
+
+            metric("futsal_http_request_duration_seconds", "histogram", "HTTP request latency by route.")
+            for (method, route), hist in sorted(self.latency.items()):
+                labels = f'method="{method}",route="{route}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, hist.counts):
+                    cumulative += count
+                    lines.append(f'futsal_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'futsal_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {hist.count}')
+                lines.append(f"futsal_http_request_duration_seconds_sum{{{labels}}} {hist.total:.6f}")
+                lines.append(f"futsal_http_request_duration_seconds_count{{{labels}}} {hist.count}")
+
+            metric("futsal_http_requests_in_progress", "gauge", "HTTP requests currently being served.")
+            lines.append(f"futsal_http_requests_in_progress {self.in_progress}")
+
+            metric("futsal_db_statements_total", "counter", "SQL statements executed, by route.")
+            for (method, route), value in sorted(self.sql_statements.items()):
+                lines.append(f'futsal_db_statements_total{{method="{method}",route="{route}"}} {value}')
+
+            metric("futsal_db_statement_seconds_total", "counter", "Time spent executing SQL, by route.")
+            for (method, route), value in sorted(self.sql_seconds.items()):
+                lines.append(f'futsal_db_statement_seconds_total{{method="{method}",route="{route}"}} {value:.6f}')
+
+            metric("futsal_booking_requests_total", "counter", "Booking POSTs by outcome (conflict = 409).")
+            for (route, outcome), value in sorted(self.booking_outcomes.items()):
+                lines.append(f'futsal_booking_requests_total{{route="{route}",outcome="{outcome}"}} {value}')
+
+        stats = cache.availability.stats()
+        metric("futsal_availability_cache_events_total", "counter", "Availability response cache events.")
+        for name in ("hits", "misses", "evictions", "invalidations"):
+            lines.append(f'futsal_availability_cache_events_total{{event="{name}"}} {stats[name]}')
+        metric("futsal_availability_cache_entries", "gauge", "Availability responses currently cached.")
+        lines.append(f"futsal_availability_cache_entries {stats['size']}")
+        stats = cache.courts.stats()
+        metric("futsal_court_listing_cache_events_total", "counter", "Pre-serialized court listing hits / rebuilds.")
+        for name in ("hits", "builds"):
+            lines.append(f'futsal_court_listing_cache_events_total{{event="{name}"}} {stats[name]}')
+
+        control = admission.controller
+        metric("futsal_admission_requests_total", "counter", "Requests admitted or shed (429) by admission control.")
+        for kind, value in sorted(control.admitted.items()):
+            lines.append(f'futsal_admission_requests_total{{kind="{kind}",outcome="admitted"}} {value}')
+        for (kind, reason), value in sorted(control.shed.items()):
+            lines.append(f'futsal_admission_requests_total{{kind="{kind}",outcome="{reason}"}} {value}')
+        metric("futsal_admission_in_flight", "gauge", "Requests currently admitted, by kind.")
+        for kind, gate in control.gates.items():
+            lines.append(f'futsal_admission_in_flight{{kind="{kind}"}} {gate.active}')
+        metric("futsal_admission_queued", "gauge", "Requests waiting for a concurrency slot, by kind.")
+        for kind, gate in control.gates.items():
+            lines.append(f'futsal_admission_queued{{kind="{kind}"}} {gate.queued}')
+
+        synced = coherence.watcher.stats()
+        metric("futsal_coherence_changes_total", "counter", "Changes from other workers applied to this worker's caches / full cache resets.")
+        lines.append(f'futsal_coherence_changes_total{{event="applied"}} {synced["applied"]}')
+        lines.append(f'futsal_coherence_changes_total{{event="resets"}} {synced["resets"]}')
+
+        metric("futsal_holds_active", "gauge", "Slot holds currently active.")
+        lines.append(f"futsal_holds_active {holds.store.stats()['active']}")
+
+        stream = events.broker.stats()
+        metric("futsal_sse_subscribers", "gauge", "Open availability event streams.")
+        lines.append(f"futsal_sse_subscribers {stream['subscribers']}")
+        metric("futsal_sse_events_total", "counter", "Availability events published / delivered to subscribers / dropped by slow subscribers.")
+        for name in ("published", "delivered", "overflows"):
+            lines.append(f'futsal_sse_events_total{{kind="{name}"}} {stream[name]}')
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class MetricsMiddleware:
+    """Middleware ASGI murni (tanpa BaseHTTPMiddleware) agar respons streaming tidak di-buffer."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(record_sql=config.SLOW_REQUEST_MS > 0)
+        token = current_request.set(stats)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        registry.started()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request.reset(token)
+            # Pakai template route (mis. /courts/{court_id}/availability) agar label tidak meledak
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            registry.finished(scope["method"], route_path, status, elapsed, stats)
+            if stats.queries is not None and elapsed * 1000 >= config.SLOW_REQUEST_MS:
+                log_slow_request(scope, status, elapsed, stats)
+
+
+def log_slow_request(scope, status: int, elapsed: float, stats: RequestStats):
+    query = scope.get("query_string", b"").decode()
+    target = f"{scope['path']}?{query}" if query else scope["path"]
+    lines = [
+        f"{scope['method']} {target} -> {status} "
+        f"in {elapsed * 1000:.1f} ms, {stats.statements} SQL statements ({stats.sql_seconds * 1000:.1f} ms)"
+    ]
+    for statement, parameters, seconds in stats.queries:
+        lines.append(f"  [{seconds * 1000:.2f} ms] {' '.join(statement.split())} {parameters!r}")
+    if stats.statements > len(stats.queries):
+        lines.append(f"  ... {stats.statements - len(stats.queries)} more")
+    slow_log.warning("\n".join(lines))
+
+
+# --- Hook Engine SQLAlchemy ---
+
+# Waktu mulai disimpan di execution context statement itu sendiri (bukan di koneksi), jadi
+# statement yang gagal tidak meninggalkan sisa di koneksi pool
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.futsal_query_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record_statement(context, statement, parameters)
+
+def _handle_error(exception_context):
+    # Statement yang gagal (mis. IntegrityError di balik 409) tetap dihitung & dicatat
+    record_statement(exception_context.execution_context, exception_context.statement, exception_context.parameters)
+
+def record_statement(context, statement, parameters):
+    started = getattr(context, "futsal_query_start", None)
+    if started is None:
+        return
+    context.futsal_query_start = None
+    stats = current_request.get()
+    if stats is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats.statements += 1
+    stats.sql_seconds += elapsed
+    if stats.queries is not None and len(stats.queries) < SLOW_LOG_MAX_STATEMENTS:
+        stats.queries.append((statement, parameters, elapsed))
+
+def instrument_engine(engine: Engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,160 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from . import database, facilities, rollups
+
+# --- Migrasi Skema Database ---
+# Dijalankan sebelum create_all(); setiap langkah harus aman diulang (idempotent).
+
+
+def is_current(engine: Engine) -> bool:
+    """True jika semua tabel, kolom & index model sudah ada dan booking_slots sudah per
+    SLOT_MINUTES (tidak ada yang perlu dijalankan)."""
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    for table in database.Base.metadata.sorted_tables:
+        if table.name not in tables:
+            return False
+        if not set(table.columns.keys()) <= {c["name"] for c in inspector.get_columns(table.name)}:
+            return False
+        if not {i.name for i in table.indexes} <= {i["name"] for i in inspector.get_indexes(table.name)}:
+            return False
+    with engine.connect() as conn:
+        return _slot_grid_current(conn)
+
+
+def upgrade(engine: Engine):
+    _typed_booking_columns(engine)
+    _booking_slots(engine)
+    _booking_slot_grid(engine)
+    _court_facility_mask(engine)
+    _booking_rollups(engine)
+    _indexes(engine)
+
+
+def _typed_booking_columns(engine: Engine):
+    """bookings lama: booking_date/start_time berupa teks -> Date + start/end_minute integer."""
+    inspector = inspect(engine)
+    if "bookings" not in inspector.get_table_names():
+        return
+    columns = {c["name"] for c in inspector.get_columns("bookings")}
+    if "start_minute" in columns:
+        return
+
+    start_minute = (
+        "CAST(substr(start_time, 1, instr(start_time, ':') - 1) AS INTEGER) * 60"
+        " + CAST(substr(start_time, instr(start_time, ':') + 1) AS INTEGER)"
+    )
+    with engine.begin() as conn:
+        # Nama index lama (mis. ix_bookings_id) akan dipakai lagi oleh tabel baru
+        for index_name in [i["name"] for i in inspector.get_indexes("bookings")]:
+            conn.execute(text(f'DROP INDEX IF EXISTS "{index_name}"'))
+        conn.execute(text("ALTER TABLE bookings RENAME TO bookings_old"))
+        database.Booking.__table__.create(conn)
+        conn.execute(text(f"""
+            INSERT INTO bookings (id, court_id, customer_name, customer_phone, customer_email,
+                                  booking_date, start_minute, end_minute, duration,
+                                  total_price, status, created_at)
+            SELECT id, court_id, customer_name, customer_phone, customer_email,
+                   date(booking_date), {start_minute}, {start_minute} + duration * 60, duration,
+                   total_price, status, created_at
+            FROM bookings_old
+        """))
+        conn.execute(text("DROP TABLE bookings_old"))
+
+
+def _fill_booking_slots(conn):
+    """Pecah setiap booking menjadi baris booking_slots per SLOT_MINUTES (satu INSERT, CTE rekursif)."""
+    # OR IGNORE: data lama bisa saja sudah berisi booking ganda hasil race condition
+    conn.execute(text("""
+        WITH RECURSIVE slots(booking_id, court_id, booking_date, slot_minute, end_minute) AS (
+            SELECT id, court_id, booking_date, start_minute, end_minute FROM bookings
+            UNION ALL
+            SELECT booking_id, court_id, booking_date, slot_minute + :step, end_minute
+            FROM slots WHERE slot_minute + :step < end_minute
+        )
+        INSERT OR IGNORE INTO booking_slots (booking_id, court_id, booking_date, slot_minute)
+        SELECT booking_id, court_id, booking_date, slot_minute FROM slots
+    """), {"step": database.SLOT_MINUTES})
+
+
+def _booking_slots(engine: Engine):
+    """Isi booking_slots dari booking yang sudah ada sebelum tabel itu diperkenalkan."""
+    inspector = inspect(engine)
+    tables = inspector.get_table_names()
+    if "bookings" not in tables or "booking_slots" in tables:
+        return
+
+    with engine.begin() as conn:
+        database.BookingSlot.__table__.create(conn)
+        _fill_booking_slots(conn)
+
+
+def _slot_grid_current(conn) -> bool:
+    """False jika booking_slots masih berisi baris per jam (sebelum resolusi 15 menit).
+
+    Migrasi grid mengisi semua booking dalam satu transaksi, jadi cukup periksa satu booking.
+    """
+    row = conn.execute(text("""
+        SELECT b.court_id, b.booking_date, b.start_minute FROM bookings b
+        WHERE b.end_minute - b.start_minute > :step LIMIT 1
+    """), {"step": database.SLOT_MINUTES}).first()
+    if row is None:
+        return True
+    return conn.execute(text("""
+        SELECT 1 FROM booking_slots
+        WHERE court_id = :court_id AND booking_date = :booking_date AND slot_minute = :minute
+    """), {"court_id": row.court_id, "booking_date": row.booking_date,
+           "minute": row.start_minute + database.SLOT_MINUTES}).first() is not None
+
+
+def _booking_slot_grid(engine: Engine):
+    """booking_slots lama (satu baris per jam) -> satu baris per SLOT_MINUTES."""
+    tables = inspect(engine).get_table_names()
+    if "bookings" not in tables or "booking_slots" not in tables:
+        return
+
+    with engine.begin() as conn:
+        if _slot_grid_current(conn):
+            return
+        _fill_booking_slots(conn)
+
+
+def _court_facility_mask(engine: Engine):
+    """Normalisasi teks fasilitas lama + isi courts.facility_mask."""
+    inspector = inspect(engine)
+    if "courts" not in inspector.get_table_names():
+        return
+    if "facility_mask" in {c["name"] for c in inspector.get_columns("courts")}:
+        return
+
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE courts ADD COLUMN facility_mask INTEGER NOT NULL DEFAULT 0"))
+        rows = conn.execute(text("SELECT id, facilities FROM courts")).all()
+        if rows:
+            updates = []
+            for row in rows:
+                names = facilities.split(row.facilities)
+                updates.append({"id": row.id, "facilities": ",".join(names), "mask": facilities.to_mask(names)})
+            conn.execute(text("UPDATE courts SET facilities = :facilities, facility_mask = :mask WHERE id = :id"), updates)
+
+
+def _booking_rollups(engine: Engine):
+    """Backfill booking_rollups untuk booking yang sudah ada sebelum tabel itu diperkenalkan."""
+    tables = inspect(engine).get_table_names()
+    if "bookings" not in tables or "booking_rollups" in tables:
+        return
+
+    with engine.begin() as conn:
+        database.BookingRollup.__table__.create(conn)
+        rollups.rebuild(conn)
+
+
+def _indexes(engine: Engine):
+    """Index baru di model untuk tabel yang sudah ada; create_all() hanya membuat tabel baru."""
+    tables = set(inspect(engine).get_table_names())
+    with engine.begin() as conn:
+        for table in database.Base.metadata.sorted_tables:
+            if table.name in tables:
+                for index in table.indexes:
+                    index.create(conn, checkfirst=True)
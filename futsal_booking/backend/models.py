@@ -1,19 +1,60 @@
-from pydantic import BaseModel
-from typing import List
+import math
+
+from pydantic import BaseModel, validator
+from typing import List, Optional
+from datetime import date, datetime
+
+from . import config
 
 # --- Skema Pydantic untuk API ---
 
+def validate_slot_time(value: str) -> str:
+    """"HH:MM" yang jatuh tepat di kelipatan FUTSAL_GRANULARITY_MINUTES."""
+    parsed = datetime.strptime(value, "%H:%M")
+    if (parsed.hour * 60 + parsed.minute) % config.GRANULARITY_MINUTES:
+        raise ValueError(f"start_time must be a multiple of {config.GRANULARITY_MINUTES} minutes")
+    return value
+
+# Slot tidak pernah melewati tengah malam, jadi durasi di atas satu hari tidak mungkin muat
+MAX_DURATION_HOURS = 24
+
+def validate_duration(value: float) -> float:
+    """Durasi dalam jam, positif, maksimal MAX_DURATION_HOURS dan kelipatan FUTSAL_GRANULARITY_MINUTES (mis. 1.5)."""
+    # Dicek sebelum int(): inf/1e308 membuat int() OverflowError, nan membuatnya ValueError
+    if value > MAX_DURATION_HOURS:
+        raise ValueError(f"duration must be at most {MAX_DURATION_HOURS} hours")
+    minutes = value * 60
+    if not math.isfinite(value) or value <= 0 or minutes != int(minutes) or int(minutes) % config.GRANULARITY_MINUTES:
+        raise ValueError(f"duration must be a positive multiple of {config.GRANULARITY_MINUTES} minutes")
+    return value
+
 class BookingBase(BaseModel):
     court_id: int
     customer_name: str
     customer_phone: str
     customer_email: str
-    booking_date: str
-    start_time: str
-    duration: int
+    booking_date: date
+    start_time: str # "HH:MM"
+    duration: float # jam, mis. 1.5
+
+    @validator("start_time")
+    def check_start_time(cls, value):
+        datetime.strptime(value, "%H:%M")
+        return value
 
 class BookingCreate(BookingBase):
-    pass
+    # Hold dari POST /holds untuk slot yang sama; jika valid, cek konflik tidak diulang
+    hold_id: Optional[str] = None
+
+    # Hanya request baru yang harus mengikuti granularitas; booking lama tetap valid
+    # sebagai respons walau FUTSAL_GRANULARITY_MINUTES diubah
+    @validator("start_time")
+    def check_slot_start(cls, value):
+        return validate_slot_time(value)
+
+    @validator("duration")
+    def check_duration(cls, value):
+        return validate_duration(value)
 
 class Booking(BookingBase):
     id: int
@@ -23,6 +64,41 @@ class Booking(BookingBase):
     class Config:
         orm_mode = True
 
+class RecurringBookingCreate(BaseModel):
+    """Booking berulang, mis. setiap Selasa 19:00 selama 12 minggu di lapangan 2 dan 3."""
+    court_ids: List[int]
+    customer_name: str
+    customer_phone: str
+    customer_email: str
+    start_date: date
+    start_time: str # "HH:MM"
+    duration: float # jam, mis. 1.5
+    occurrences: int = 1
+    interval_days: int = 7
+    # True: jika ada satu saja yang bentrok, tidak ada yang dibooking
+    all_or_nothing: bool = False
+
+    @validator("start_time")
+    def check_start_time(cls, value):
+        return validate_slot_time(value)
+
+    @validator("duration")
+    def check_duration(cls, value):
+        return validate_duration(value)
+
+class BookingOccurrence(BaseModel):
+    court_id: int
+    booking_date: date
+    status: str # "confirmed", "conflict", atau "skipped" (all_or_nothing)
+    booking_id: Optional[int] = None
+    total_price: Optional[float] = None
+    detail: Optional[str] = None
+
+class BatchBookingResult(BaseModel):
+    confirmed: int
+    conflicts: int
+    occurrences: List[BookingOccurrence]
+
 class CourtBase(BaseModel):
     name: str
     type: str
@@ -33,7 +109,85 @@ class CourtBase(BaseModel):
 
 class Court(CourtBase):
     id: int
-    bookings: List[Booking] = []
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class PublicBooking(BaseModel):
+    """Booking tanpa data pelanggan (nama & kontak), untuk endpoint tanpa autentikasi."""
+    id: int
+    court_id: int
+    booking_date: date
+    start_time: str # "HH:MM"
+    duration: float
+    status: str
+
+    class Config:
+        orm_mode = True
+
+class CourtListing(Court):
+    # Hanya diisi jika diminta lewat ?include=bookings
+    bookings: Optional[List[PublicBooking]] = None
+
+class CourtSearchPage(BaseModel):
+    courts: List[Court]
+    # None berarti halaman terakhir; kirim balik sebagai ?cursor= untuk halaman berikutnya
+    next_cursor: Optional[str] = None
+
+class FreeCourt(Court):
+    # Harga untuk seluruh durasi yang dicari
+    total_price: float
+
+class BookingHistoryItem(BaseModel):
+    id: int
+    court_id: int
+    court_name: str
+    booking_date: date
+    start_time: str # "HH:MM"
+    end_time: str
+    duration: float
+    total_price: float
+    status: str
+
+class BookingHistoryPage(BaseModel):
+    bookings: List[BookingHistoryItem]
+    next_cursor: Optional[str] = None
+
+class PeriodUsage(BaseModel):
+    period_start: date
+    bookings: int
+    booked_hours: float
+    revenue: float
+    capacity_hours: int # jam buka x jumlah hari dalam periode
+    utilization: float # booked_hours / capacity_hours
+
+class CourtUsage(PeriodUsage):
+    court_id: int
+    court_name: str
+
+class CourtAnalytics(BaseModel):
+    period: str
+    rows: List[CourtUsage]
+
+class AnalyticsSummary(BaseModel):
+    period: str
+    rows: List[PeriodUsage]
+
+class HoldCreate(BaseModel):
+    court_id: int
+    booking_date: date
+    start_time: str # "HH:MM"
+    duration: float # jam, mis. 1.5
+
+    @validator("start_time")
+    def check_start_time(cls, value):
+        return validate_slot_time(value)
+
+    @validator("duration")
+    def check_duration(cls, value):
+        return validate_duration(value)
+
+class Hold(HoldCreate):
+    hold_id: str
+    expires_at: datetime # UTC
+    ttl_seconds: float
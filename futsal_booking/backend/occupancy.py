@@ -0,0 +1,219 @@
+import bisect
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import config
+
+# --- Indeks Okupansi Slot (in-memory) ---
+# Per (court_id, tanggal) disimpan rentang menit [start, end) yang sudah terisi, terurut dan
+# sudah digabung (tidak ada yang tumpang tindih atau berdempetan). Cek bentrok cukup satu
+# bisect (O(log n)) dan rentang kosong dienumerasi langsung dari celah antar interval, berapa
+# pun granularitas jamnya. Diisi (hydrate) secara lazy dari tabel bookings, lalu diperbarui
+# setiap kali booking baru berhasil di-commit. Key yang paling lama tidak dipakai dibuang (LRU);
+# key itu cukup di-hydrate ulang dari DB saat diminta lagi.
+
+Key = Tuple[int, date]
+Range = Tuple[int, int]
+
+
+class Intervals:
+    """Himpunan rentang menit [start, end) yang immutable.
+
+    Operasi tulis mengembalikan objek baru, sehingga pembaca tidak perlu lock: indeks
+    cukup mengganti referensinya.
+    """
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, starts: List[int], ends: List[int]):
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def from_ranges(cls, ranges: Iterable[Range]) -> "Intervals":
+        starts: List[int] = []
+        ends: List[int] = []
+        for start, end in sorted(ranges):
+            if start >= end:
+                continue
+            if ends and start <= ends[-1]:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        return cls(starts, ends)
+
+    def __iter__(self) -> Iterator[Range]:
+        return zip(self.starts, self.ends)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Intervals) and self.starts == other.starts and self.ends == other.ends
+
+    def __repr__(self) -> str:
+        return f"Intervals({list(self)})"
+
+    def overlap(self, start: int, end: int) -> Optional[int]:
+        """Menit pertama di [start, end) yang sudah terisi, atau None jika kosong."""
+        # Interval pertama yang berakhir setelah `start`; bentrok jika mulainya sebelum `end`
+        i = bisect.bisect_right(self.ends, start)
+        if i < len(self.starts) and self.starts[i] < end:
+            return max(self.starts[i], start)
+        return None
+
+    def add(self, start: int, end: int) -> "Intervals":
+        # Semua interval yang beririsan atau berdempetan dengan [start, end) digabung jadi satu
+        lo = bisect.bisect_left(self.ends, start)
+        hi = bisect.bisect_right(self.starts, end)
+        if lo < hi:
+            start = min(start, self.starts[lo])
+            end = max(end, self.ends[hi - 1])
+        return Intervals(self.starts[:lo] + [start] + self.starts[hi:], self.ends[:lo] + [end] + self.ends[hi:])
+
+    def remove(self, start: int, end: int) -> "Intervals":
+        lo = bisect.bisect_right(self.ends, start)
+        hi = bisect.bisect_left(self.starts, end)
+        if lo >= hi:
+            return self
+        # Sisa interval di pinggir yang hanya sebagian tertutup [start, end)
+        starts, ends = [], []
+        if self.starts[lo] < start:
+            starts.append(self.starts[lo])
+            ends.append(start)
+        if self.ends[hi - 1] > end:
+            starts.append(end)
+            ends.append(self.ends[hi - 1])
+        return Intervals(self.starts[:lo] + starts + self.starts[hi:], self.ends[:lo] + ends + self.ends[hi:])
+
+    def union(self, other: "Intervals") -> "Intervals":
+        if not other:
+            return self
+        if not self:
+            return other
+        return Intervals.from_ranges([*self, *other])
+
+    def free_gaps(self, lo: int, hi: int) -> List[Range]:
+        """Rentang kosong di dalam [lo, hi)."""
+        gaps = []
+        cursor = lo
+        i = bisect.bisect_right(self.ends, lo)
+        while i < len(self.starts) and self.starts[i] < hi:
+            if self.starts[i] > cursor:
+                gaps.append((cursor, self.starts[i]))
+            cursor = max(cursor, self.ends[i])
+            i += 1
+        if cursor < hi:
+            gaps.append((cursor, hi))
+        return gaps
+
+    def free_starts(self, lo: int, hi: int, length: int, step: int) -> List[int]:
+        """Menit mulai kelipatan `step` di mana [t, t + length) muat kosong di dalam [lo, hi)."""
+        starts = []
+        for gap_start, gap_end in self.free_gaps(lo, hi):
+            t = -(-gap_start // step) * step
+            while t + length <= gap_end:
+                starts.append(t)
+                t += step
+        return starts
+
+
+EMPTY = Intervals([], [])
+
+
+def from_bookings(bookings: Iterable) -> Intervals:
+    return Intervals.from_ranges((b.start_minute, b.end_minute) for b in bookings)
+
+
+class OccupancyIndex:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._intervals: "OrderedDict[Key, Intervals]" = OrderedDict()
+        # Rentang yang di-commit selama key tersebut sedang di-hydrate dari DB;
+        # digabungkan saat hasil hydrate disimpan agar tidak ada booking yang hilang.
+        self._loading: Dict[Key, int] = {}
+        self._pending: Dict[Key, List[Range]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, court_id: int, date: date, loader: Callable[[], Intervals]) -> Intervals:
+        key = (court_id, date)
+        intervals = self._begin_load(key)
+        if intervals is not None:
+            return intervals
+        try:
+            loaded = loader()
+        except BaseException:
+            self._abort_load(key)
+            raise
+        return self._finish_load(key, loaded)
+
+    async def aget(self, court_id: int, date: date, loader: Callable[[], Awaitable[Intervals]]) -> Intervals:
+        """Sama seperti get(), untuk loader async (mode FUTSAL_ASYNC_DB)."""
+        key = (court_id, date)
+        intervals = self._begin_load(key)
+        if intervals is not None:
+            return intervals
+        try:
+            loaded = await loader()
+        except BaseException:
+            self._abort_load(key)
+            raise
+        return self._finish_load(key, loaded)
+
+    def _begin_load(self, key: Key) -> Optional[Intervals]:
+        with self._lock:
+            intervals = self._intervals.get(key)
+            if intervals is None:
+                self._loading[key] = self._loading.get(key, 0) + 1
+            else:
+                self._intervals.move_to_end(key)
+            return intervals
+
+    def _abort_load(self, key: Key):
+        with self._lock:
+            self._done_loading(key)
+            if key not in self._loading:
+                self._pending.pop(key, None)
+
+    def _finish_load(self, key: Key, loaded: Intervals) -> Intervals:
+        with self._lock:
+            self._done_loading(key)
+            intervals = self._intervals.get(key)
+            if intervals is None:
+                intervals = loaded
+                for start, end in self._pending.get(key, ()):
+                    intervals = intervals.add(start, end)
+                self._intervals[key] = intervals
+                while len(self._intervals) > self.maxsize:
+                    self._intervals.popitem(last=False)
+            if key not in self._loading:
+                self._pending.pop(key, None)
+            return intervals
+
+    def _done_loading(self, key: Key):
+        remaining = self._loading[key] - 1
+        if remaining:
+            self._loading[key] = remaining
+        else:
+            del self._loading[key]
+
+    def mark(self, court_id: int, date: date, start_minute: int, end_minute: int):
+        key = (court_id, date)
+        with self._lock:
+            if key in self._intervals:
+                self._intervals[key] = self._intervals[key].add(start_minute, end_minute)
+            elif key in self._loading:
+                self._pending.setdefault(key, []).append((start_minute, end_minute))
+
+    def invalidate(self, court_id: int, date: date):
+        with self._lock:
+            self._intervals.pop((court_id, date), None)
+
+    def clear(self):
+        with self._lock:
+            self._intervals.clear()
+
+
+index = OccupancyIndex(config.OCCUPANCY_INDEX_SIZE)
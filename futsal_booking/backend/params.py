@@ -0,0 +1,15 @@
+from fastapi import HTTPException
+
+from . import database, models
+
+# --- Parameter Query Bersama ---
+# Dipakai endpoint sync (main.py) maupun async (async_api.py) agar validasinya sama persis.
+
+
+def duration_param(duration: float) -> int:
+    """Durasi (jam) dari query string -> menit; 400 jika bukan kelipatan granularitas, 422 jika terlalu panjang."""
+    try:
+        models.validate_duration(duration)
+    except ValueError as e:
+        raise HTTPException(status_code=422 if duration > models.MAX_DURATION_HOURS else 400, detail=str(e))
+    return database.duration_minutes(duration)
@@ -0,0 +1,128 @@
+import argparse
+import calendar
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from . import database
+
+# --- Rollup Okupansi & Pendapatan (dashboard operator) ---
+# booking_rollups menyimpan total per (periode, awal periode, lapangan): jumlah booking,
+# jam terpakai dan pendapatan. Diperbarui secara inkremental di transaksi yang sama dengan
+# insert booking (upsert "kolom = kolom + delta"), sehingga endpoint analytics cukup membaca
+# satu range index per periode yang diminta, berapa pun panjang riwayat booking.
+
+PERIODS = ("day", "week", "month")
+
+Key = Tuple[str, date, int]
+Rollup = database.BookingRollup
+
+
+def period_start(period: str, value: date) -> date:
+    if period == "day":
+        return value
+    if period == "week":
+        return value - timedelta(days=value.weekday()) # minggu mulai Senin
+    if period == "month":
+        return value.replace(day=1)
+    raise ValueError(f"Unknown period {period!r}")
+
+
+def next_period(period: str, start: date) -> date:
+    if period == "day":
+        return start + timedelta(days=1)
+    if period == "week":
+        return start + timedelta(days=7)
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def period_days(period: str, start: date) -> int:
+    if period == "month":
+        return calendar.monthrange(start.year, start.month)[1]
+    return 7 if period == "week" else 1
+
+
+def _add(totals: Dict[Key, List[float]], key: Key, bookings: int, hours: int, revenue: float):
+    total = totals[key]
+    total[0] += bookings
+    total[1] += hours
+    total[2] += revenue
+
+
+def _rows(totals: Dict[Key, List[float]]) -> List[dict]:
+    return [
+        {"period": period, "period_start": start, "court_id": court_id,
+         "bookings": count, "booked_hours": hours, "revenue": revenue}
+        for (period, start, court_id), (count, hours, revenue) in totals.items()
+    ]
+
+
+def deltas(bookings: Iterable[Tuple[int, date, int, float]], sign: int = 1) -> List[dict]:
+    """Baris upsert dari (court_id, booking_date, duration, total_price); sign=-1 untuk pembatalan."""
+    totals: Dict[Key, List[float]] = defaultdict(lambda: [0, 0, 0.0])
+    for court_id, booking_date, duration, total_price in bookings:
+        for period in PERIODS:
+            _add(totals, (period, period_start(period, booking_date), court_id), sign, sign * duration, sign * total_price)
+    return _rows(totals)
+
+
+def upsert_statement():
+    # ON CONFLICT DO UPDATE: baris periode baru dibuat, baris yang ada ditambah delta
+    stmt = (sqlite.insert if database.is_sqlite else postgresql.insert)(Rollup)
+    return stmt.on_conflict_do_update(
+        index_elements=[Rollup.period, Rollup.period_start, Rollup.court_id],
+        set_={
+            "bookings": Rollup.bookings + stmt.excluded.bookings,
+            "booked_hours": Rollup.booked_hours + stmt.excluded.booked_hours,
+            "revenue": Rollup.revenue + stmt.excluded.revenue,
+        },
+    )
+
+
+def record(db, bookings: Iterable[Tuple[int, date, int, float]], sign: int = 1):
+    """Tambahkan booking ke rollup; dipanggil sebelum commit transaksi booking-nya."""
+    rows = deltas(bookings, sign)
+    if rows:
+        db.execute(upsert_statement(), rows)
+
+
+def rebuild(conn) -> int:
+    """Hitung ulang semua rollup dari tabel bookings (backfill); return jumlah baris rollup."""
+    booking = database.Booking
+    conn.execute(delete(Rollup))
+    # Harian langsung di SQL, satu GROUP BY atas bookings
+    conn.execute(insert(Rollup).from_select(
+        ["period", "period_start", "court_id", "bookings", "booked_hours", "revenue"],
+        select(
+            literal("day"), booking.booking_date, booking.court_id,
+            func.count(), func.sum(booking.duration), func.sum(booking.total_price),
+        ).where(booking.status == "confirmed").group_by(booking.booking_date, booking.court_id),
+    ))
+    # Mingguan & bulanan dijumlahkan dari baris harian (lapangan x hari, jauh lebih kecil)
+    totals: Dict[Key, List[float]] = defaultdict(lambda: [0, 0, 0.0])
+    for row in conn.execute(select(Rollup).where(Rollup.period == "day")):
+        for period in PERIODS[1:]:
+            _add(totals, (period, period_start(period, row.period_start), row.court_id),
+                 row.bookings, row.booked_hours, row.revenue)
+    if totals:
+        conn.execute(insert(Rollup), _rows(totals))
+    return conn.execute(select(func.count()).select_from(Rollup)).scalar_one()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild booking_rollups from the bookings table.")
+    parser.parse_args(argv)
+    database.create_db_and_tables()
+    started = time.perf_counter()
+    with database.engine.begin() as conn:
+        rows = rebuild(conn)
+    print(f"rebuilt {rows} rollup rows in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
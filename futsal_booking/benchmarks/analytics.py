@@ -0,0 +1,96 @@
+"""Uji latency dashboard analytics terhadap panjang riwayat booking.
+
+Isi DB sementara dengan N booking sintetis (langsung lewat sqlite3), bangun ulang
+booking_rollups dengan backfill, lalu ukur median latency endpoint /analytics/* dan
+agregasi ad-hoc yang setara langsung atas tabel bookings. Jalankan dengan beberapa
+--rows: latency endpoint rollup harus tetap datar, agregasi ad-hoc tumbuh bersama data.
+
+    python -m futsal_booking.benchmarks.analytics --rows 1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import func
+
+from .export_memory import seed_rows
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    workdir = Path(tempfile.mkdtemp(prefix="futsal-analytics-"))
+    db_path = workdir / "bench.db"
+    # Harus diset sebelum modul backend di-import
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    # Request berurutan yang rapat dari TestClient tidak boleh kena rate limit per klien
+    os.environ["FUTSAL_RATE_LIMIT_RPS"] = "0"
+    from fastapi.testclient import TestClient
+    from futsal_booking.backend import crud, database, main as api, rollups
+
+    database.create_db_and_tables()
+    db = database.SessionLocal()
+    try:
+        crud.seed_data(db)
+        courts = len(crud.get_courts(db))
+    finally:
+        db.close()
+
+    start = date(2030, 1, 1)
+    end = seed_rows(db_path, args.rows, courts, start)
+    started = time.perf_counter()
+    with database.engine.begin() as conn:
+        rollup_rows = rollups.rebuild(conn)
+    print(f"{args.rows} bookings ({start} .. {end}); backfill {rollup_rows} rollup rows "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    # Dashboard tipikal: 30 hari terakhir per hari, 12 minggu per lapangan, 12 bulan total
+    month_from = (end - timedelta(days=365)).replace(day=1)
+    queries = {
+        "summary day x30": ("/analytics/summary", {"period": "day", "date_from": end - timedelta(days=29), "date_to": end}),
+        "courts week x12": ("/analytics/courts", {"period": "week", "date_from": end - timedelta(weeks=12), "date_to": end}),
+        "summary month x12": ("/analytics/summary", {"period": "month", "date_from": month_from, "date_to": end}),
+    }
+    Booking = database.Booking
+
+    def ad_hoc(date_from: date, date_to: date):
+        db = database.SessionLocal()
+        try:
+            return db.query(
+                Booking.court_id, Booking.booking_date, func.count(), func.sum(Booking.duration), func.sum(Booking.total_price)
+            ).filter(Booking.booking_date.between(date_from, date_to)).group_by(Booking.court_id, Booking.booking_date).all()
+        finally:
+            db.close()
+
+    with TestClient(api.app) as client:
+        print(f"{'query':20} {'rollup ms':>10} {'ad-hoc ms':>10}")
+        for name, (path, params) in queries.items():
+            query = {k: v.isoformat() if isinstance(v, date) else v for k, v in params.items()}
+            client.get(path, params=query).raise_for_status()
+            rollup_ms = timed(lambda: client.get(path, params=query), args.repeat)
+            ad_hoc_ms = timed(lambda: ad_hoc(params["date_from"], params["date_to"]), max(1, args.repeat // 10))
+            print(f"{name:20} {rollup_ms:10.2f} {ad_hoc_ms:10.2f}")
+        all_time_ms = timed(lambda: ad_hoc(start, end), 1)
+        print(f"{'ad-hoc all history':20} {'':>10} {all_time_ms:10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Uji latency availability terhadap panjang riwayat booking (skema bertipe + indeks).
+
+Isi DB sementara dengan N booking historis (langsung lewat sqlite3), lalu ukur latency
+GET /courts/{id}/availability untuk (court, tanggal) acak di sepanjang riwayat, dalam dua
+kondisi: dengan indeks (court_id, booking_date) seperti skema sekarang ("after"), dan
+setelah indeks yang diawali court_id/booking_date di-drop ("before", setara skema lama
+yang hanya mengindeks id). Setiap request adalah cold path: indeks okupansi & cache
+availability dikosongkan dulu, sehingga yang terukur adalah query ke tabel bookings.
+
+    python -m futsal_booking.benchmarks.availability_history --rows 1000000 --requests 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from .export_memory import seed_rows
+from .run import percentile
+
+# Indeks yang belum ada sebelum skema bertipe (user-003)
+DATE_INDEXES = ("ix_bookings_court_date", "ix_bookings_date")
+
+
+def measure(client, court_ids, start: date, days: int, requests: int, rng: random.Random) -> dict:
+    from futsal_booking.backend import cache, occupancy
+
+    latencies = []
+    for _ in range(requests):
+        court_id = rng.choice(court_ids)
+        day = start + timedelta(days=rng.randrange(days))
+        occupancy.index.clear()
+        cache.availability.clear()
+        started = time.perf_counter()
+        client.get(f"/courts/{court_id}/availability", params={"date": day.isoformat()}).raise_for_status()
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return {"p50_ms": percentile(latencies, 50) * 1000, "p95_ms": percentile(latencies, 95) * 1000}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    workdir = Path(tempfile.mkdtemp(prefix="futsal-history-"))
+    db_path = workdir / "bench.db"
+    # Harus diset sebelum modul backend di-import
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    # Request berurutan yang rapat dari TestClient tidak boleh kena rate limit per klien
+    os.environ["FUTSAL_RATE_LIMIT_RPS"] = "0"
+    from fastapi.testclient import TestClient
+    from futsal_booking.backend import crud, database, main as api
+
+    database.create_db_and_tables()
+    db = database.SessionLocal()
+    try:
+        crud.seed_data(db)
+        court_ids = [c.id for c in crud.get_courts(db)]
+    finally:
+        db.close()
+
+    started = time.perf_counter()
+    start = date(2030, 1, 1)
+    end = seed_rows(db_path, args.rows, len(court_ids), start)
+    days = (end - start).days + 1
+    print(f"seeded {args.rows} bookings ({start} .. {end}) in {time.perf_counter() - started:.1f}s")
+
+    indexes = [index for index in database.Booking.__table__.indexes if index.name in DATE_INDEXES]
+    results = {}
+    with TestClient(api.app) as client:
+        results["after"] = measure(client, court_ids, start, days, args.requests, random.Random(args.seed))
+        with database.engine.begin() as conn:
+            for index in indexes:
+                index.drop(conn)
+        try:
+            results["before"] = measure(client, court_ids, start, days, args.requests, random.Random(args.seed))
+        finally:
+            with database.engine.begin() as conn:
+                for index in indexes:
+                    index.create(conn)
+
+    print(f"{'schema':8} {'p50 ms':>8} {'p95 ms':>8}")
+    for name in ("before", "after"):
+        print(f"{name:8} {results[name]['p50_ms']:8.2f} {results[name]['p95_ms']:8.2f}")
+    print(f"p50 speedup: {results['before']['p50_ms'] / results['after']['p50_ms']:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Uji booking berulang: satu POST /bookings/batch vs loop POST /bookings/ yang setara.
+
+Untuk setiap run, pesan jam yang sama setiap minggu selama `--weeks` minggu di `--courts`
+lapangan, sekali sebagai loop booking tunggal dan sekali sebagai satu request batch (di
+rentang tanggal berbeda agar tidak bentrok), lewat TestClient in-process. Yang dilaporkan:
+waktu total dan jumlah statement SQL yang dieksekusi per cara.
+
+    python -m futsal_booking.benchmarks.batch --courts 2 --weeks 12 --runs 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import event
+
+CUSTOMER = {"customer_name": "Batch Bench", "customer_phone": "081234567890", "customer_email": "batch@example.com"}
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def timed(client, counter: StatementCounter, requests) -> tuple:
+    """(ms, statement SQL) untuk mengirim semua request berurutan; setiap booking harus berhasil."""
+    before = counter.count
+    started = time.perf_counter()
+    for path, body in requests:
+        response = client.post(path, json=body)
+        response.raise_for_status()
+        if path.endswith("/batch") and response.json()["conflicts"]:
+            raise RuntimeError("batch hit a conflict")
+    return (time.perf_counter() - started) * 1000, counter.count - before
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courts", type=int, default=2)
+    parser.add_argument("--weeks", type=int, default=12)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--start-time", default="19:00")
+    args = parser.parse_args(argv)
+
+    workdir = Path(tempfile.mkdtemp(prefix="futsal-batch-"))
+    # Harus diset sebelum modul backend di-import
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+    # Request berurutan yang rapat dari TestClient tidak boleh kena rate limit per klien
+    os.environ["FUTSAL_RATE_LIMIT_RPS"] = "0"
+    from fastapi.testclient import TestClient
+    from futsal_booking.backend import crud, database, main as api
+
+    counter = StatementCounter(database.engine)
+    with TestClient(api.app) as client:
+        db = database.SessionLocal()
+        try:
+            court_ids = [c.id for c in crud.get_courts(db, limit=args.courts)]
+        finally:
+            db.close()
+        if len(court_ids) < args.courts:
+            raise SystemExit(f"only {len(court_ids)} courts seeded")
+
+        print(f"{args.weeks} weeks x {args.courts} courts = {args.weeks * args.courts} bookings per run")
+        print(f"{'run':>4} {'singles ms':>11} {'SQL':>5} {'batch ms':>9} {'SQL':>5} {'speedup':>8}")
+        # Setiap run & cara memakai blok minggu sendiri, jadi tidak ada yang bentrok
+        first = date(2031, 1, 7)
+        for run in range(args.runs):
+            singles_start = first + timedelta(weeks=2 * run * args.weeks)
+            batch_start = singles_start + timedelta(weeks=args.weeks)
+            singles = [
+                ("/bookings/", {**CUSTOMER, "court_id": court_id, "start_time": args.start_time, "duration": 1,
+                                "booking_date": (singles_start + timedelta(weeks=week)).isoformat()})
+                for week in range(args.weeks) for court_id in court_ids
+            ]
+            batch = [("/bookings/batch", {**CUSTOMER, "court_ids": court_ids, "start_time": args.start_time,
+                                          "duration": 1, "start_date": batch_start.isoformat(),
+                                          "occurrences": args.weeks, "interval_days": 7})]
+            singles_ms, singles_sql = timed(client, counter, singles)
+            batch_ms, batch_sql = timed(client, counter, batch)
+            print(f"{run + 1:4} {singles_ms:11.1f} {singles_sql:5} {batch_ms:9.1f} {batch_sql:5} "
+                  f"{singles_ms / batch_ms:7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Uji cold start backend.
+
+Untuk tiap run, di direktori kerja sementara yang baru:
+  1. import futsal_booking.backend.main di proses Python baru, ukur waktunya, dan pastikan
+     import tidak menyentuh file DB sama sekali;
+  2. jalankan uvicorn dan ukur waktu sampai GET /courts/ pertama berhasil, baik dengan DB
+     kosong (skema + seed dibuat) maupun dengan DB yang sudah ada (restart).
+
+    python -m futsal_booking.benchmarks.cold_start --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from .run import REPO_ROOT, free_port
+
+IMPORT_SCRIPT = (
+    "import time; started = time.perf_counter(); "
+    "import futsal_booking.backend.main; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def environment(db_path: Path) -> dict:
+    return {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])),
+    }
+
+
+def import_seconds(workdir: Path, db_path: Path) -> float:
+    output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], cwd=workdir, env=environment(db_path),
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def first_response_seconds(workdir: Path, db_path: Path) -> float:
+    """Waktu dari spawn uvicorn sampai GET /courts/ pertama mengembalikan 200 berisi data."""
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "futsal_booking.backend.main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=environment(db_path), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < 30:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/courts/", timeout=1)
+                if response.status_code == 200 and response.json():
+                    return time.perf_counter() - started
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.005)
+        raise RuntimeError("uvicorn did not become ready within 30s")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    results = {"import": [], "first response (empty DB)": [], "first response (existing DB)": []}
+    side_effects = 0
+    for _ in range(args.runs):
+        workdir = Path(tempfile.mkdtemp(prefix="futsal-cold-start-"))
+        db_path = workdir / "futsal.db"
+        results["import"].append(import_seconds(workdir, db_path))
+        if db_path.exists():
+            side_effects += 1
+            db_path.unlink()
+        results["first response (empty DB)"].append(first_response_seconds(workdir, db_path))
+        results["first response (existing DB)"].append(first_response_seconds(workdir, db_path))
+
+    for name, samples in results.items():
+        print(f"{name:30} median {statistics.median(samples) * 1000:7.1f} ms   max {max(samples) * 1000:7.1f} ms")
+    if side_effects:
+        print(f"FAIL: importing the app created the database file in {side_effects}/{args.runs} runs")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
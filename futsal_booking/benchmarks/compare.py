@@ -0,0 +1,50 @@
+"""Bandingkan dua hasil benchmark (JSON dari run.py) dan tandai regresi.
+
+    python -m futsal_booking.benchmarks.compare baseline.json candidate.json --threshold 10
+
+Exit code 1 jika ada operasi yang throughput-nya turun atau p99-nya naik melebihi threshold (%).
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def change(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> list:
+    rows = []
+    for mode, operations in candidate["results"].items():
+        for name, stats in operations.items():
+            old = baseline.get("results", {}).get(mode, {}).get(name)
+            if old is None:
+                continue
+            throughput = change(old["throughput_rps"], stats["throughput_rps"])
+            p99 = change(old["p99_ms"], stats["p99_ms"])
+            regressed = throughput < -threshold or p99 > threshold
+            rows.append((mode, name, old["throughput_rps"], stats["throughput_rps"], throughput,
+                         old["p99_ms"], stats["p99_ms"], p99, regressed))
+    for name, queries in candidate.get("queries_per_request", {}).items():
+        old = baseline.get("queries_per_request", {}).get(name)
+        if old is not None and queries > old:
+            rows.append(("queries", name, old, queries, change(old, queries), 0, 0, 0, True))
+    return rows
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed change in percent")
+    args = parser.parse_args(argv)
+
+    rows = compare(json.loads(args.baseline.read_text()), json.loads(args.candidate.read_text()), args.threshold)
+    print(f"{'mode':10} {'operation':13} {'req/s old':>10} {'req/s new':>10} {'Δ%':>7} {'p99 old':>9} {'p99 new':>9} {'Δ%':>7}")
+    for mode, name, old_rps, new_rps, rps_pct, old_p99, new_p99, p99_pct, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{mode:10} {name:13} {old_rps:10.1f} {new_rps:10.1f} {rps_pct:7.1f} {old_p99:9.2f} {new_p99:9.2f} {p99_pct:7.1f}{flag}")
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""Uji memori export booking secara streaming.
+
+Isi DB sementara dengan jutaan booking sintetis, jalankan server uvicorn lokal, unduh
+GET /bookings/export sampai habis, dan ukur RSS proses server selama export. Keluar
+dengan kode 1 jika kenaikan RSS anonim melebihi batas, jadi bisa dipakai sebagai gate di
+CI (hanya Linux, membaca /proc). Batas default = page cache SQLite (FUTSAL_SQLITE_CACHE_KB,
+memang boleh terisi penuh) + 32 MiB; sisanya harus datar berapa pun jumlah barisnya.
+Versi kecilnya (heap Python selama export 50k baris, tanpa server) dijalankan pytest di
+tests/test_export_memory.py.
+
+    python -m futsal_booking.benchmarks.export_memory --rows 2000000 --format csv
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import httpx
+
+from .run import free_port, start_server
+
+
+def rss_kib(pid: int, field: str = "RssAnon") -> int:
+    # RssAnon = heap/memori anonim. VmRSS juga menghitung halaman file DB yang di-mmap
+    # SQLite (PRAGMA mmap_size), yang bukan memori milik proses dan bisa dibuang kernel.
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise RuntimeError(f"{field} not found for pid {pid}")
+
+
+def seed_rows(db_path: Path, rows: int, courts: int, start: date) -> date:
+    """Tulis `rows` booking langsung lewat sqlite3 (jauh lebih cepat dari ORM); kembalikan tanggal terakhir."""
+    slots_per_day = courts * 14
+    created_at = datetime(2030, 1, 1).isoformat(sep=" ")
+
+    def generate():
+        for i in range(rows):
+            day, slot = divmod(i, slots_per_day)
+            court, hour = divmod(slot, 14)
+            start_minute = (8 + hour) * 60
+            yield (court + 1, f"Customer {i}", "0800000000", "export@example.com",
+                   (start + timedelta(days=day)).isoformat(), start_minute, start_minute + 60, 1,
+                   100000.0, "confirmed", created_at)
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO bookings (court_id, customer_name, customer_phone, customer_email, booking_date,"
+            " start_minute, end_minute, duration, total_price, status, created_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            generate(),
+        )
+    conn.close()
+    return start + timedelta(days=(rows - 1) // slots_per_day)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--max-rss-growth-mb", type=float, help="default: SQLite page cache + 32 MiB")
+    args = parser.parse_args(argv)
+
+    workdir = Path(tempfile.mkdtemp(prefix="futsal-export-"))
+    db_path = workdir / "bench.db"
+    # Harus diset sebelum modul backend di-import
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    from futsal_booking.backend import config, crud, database
+
+    if args.max_rss_growth_mb is None:
+        args.max_rss_growth_mb = abs(config.SQLITE_PRAGMAS["cache_size"]) / 1024 + 32
+
+    database.create_db_and_tables()
+    db = database.SessionLocal()
+    try:
+        crud.seed_data(db)
+        courts = len(crud.get_courts(db))
+    finally:
+        db.close()
+    database.engine.dispose()
+
+    started = time.perf_counter()
+    start = date(2030, 1, 1)
+    end = seed_rows(db_path, args.rows, courts, start)
+    print(f"seeded {args.rows} bookings ({start} .. {end}) in {time.perf_counter() - started:.1f}s")
+
+    port = free_port()
+    token = uuid.uuid4().hex
+    server = start_server(workdir, port, env={"FUTSAL_EXPORT_TOKEN": token})
+    try:
+        baseline = rss_kib(server.pid)
+        peak = [baseline]
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(0.05):
+                peak[0] = max(peak[0], rss_kib(server.pid))
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+
+        received = lines = 0
+        started = time.perf_counter()
+        params = {"date_from": start.isoformat(), "date_to": end.isoformat(), "format": args.format}
+        with httpx.stream("GET", f"http://127.0.0.1:{port}/bookings/export", params=params,
+                          headers={"X-Export-Token": token}, timeout=None) as response:
+            response.raise_for_status()
+            for chunk in response.iter_bytes():
+                received += len(chunk)
+                lines += chunk.count(b"\n")
+        elapsed = time.perf_counter() - started
+        done.set()
+        sampler.join()
+        peak_kib = max(peak[0], rss_kib(server.pid))
+        total_rss_kib = rss_kib(server.pid, "VmRSS")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    exported = lines - (1 if args.format == "csv" else 0)
+    growth_mb = (peak_kib - baseline) / 1024
+    print(f"exported {exported} rows, {received / 2**20:.1f} MiB in {elapsed:.1f}s "
+          f"({exported / elapsed:,.0f} rows/s)")
+    print(f"server anonymous RSS: baseline {baseline / 1024:.1f} MiB, peak {peak_kib / 1024:.1f} MiB, "
+          f"growth {growth_mb:.1f} MiB (limit {args.max_rss_growth_mb} MiB); "
+          f"VmRSS incl. mmap'd DB pages at end: {total_rss_kib / 1024:.1f} MiB")
+
+    if exported != args.rows:
+        print(f"FAIL: expected {args.rows} rows")
+        return 1
+    if growth_mb > args.max_rss_growth_mb:
+        print("FAIL: memory grew beyond the limit")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Uji beban push availability (Server-Sent Events).
+
+Buka N koneksi SSE ke server uvicorn lokal, semuanya berlangganan key (court, tanggal)
+yang sama, lalu kirim beberapa booking ke key itu dan ukur fan-out latency: waktu dari
+POST /bookings/ dikirim sampai event slot_taken diterima tiap subscriber. Juga dicatat
+kenaikan memori server (RssAnon) per subscriber yang diam.
+
+    python -m futsal_booking.benchmarks.fanout --subscribers 2000 --events 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from .export_memory import rss_kib
+from .run import free_port, percentile, start_server
+
+COURT_ID = 1
+DATE = "2031-01-06"
+
+
+async def subscriber(port: int, ready: asyncio.Event, ready_count: list, total: int, received: dict, expected: int):
+    """Satu koneksi SSE; selesai setelah menerima `expected` event slot_taken.
+
+    Memakai socket asyncio mentah, bukan httpx: dengan ribuan stream, parsing di httpx
+    sendiri yang menjadi bottleneck dan latency yang terukur bukan lagi milik server.
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET /events/availability?court_id={COURT_ID}&date={DATE} HTTP/1.1\r\n"
+                 f"Host: 127.0.0.1\r\nAccept: text/event-stream\r\n\r\n".encode())
+    await writer.drain()
+    events = 0
+    try:
+        # Body chunked: baris ukuran chunk (hex) diabaikan, frame SSE tidak pernah terpotong
+        while events < expected:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("stream closed early")
+            if line.startswith(b"retry:"):
+                ready_count[0] += 1
+                if ready_count[0] == total:
+                    ready.set()
+            elif line.startswith(b"data: "):
+                received.setdefault(json.loads(line[6:])["slots"][0], []).append(time.perf_counter())
+                events += 1
+    finally:
+        writer.close()
+
+
+async def run(port: int, args, server_pid: int) -> dict:
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+        baseline = rss_kib(server_pid)
+        ready = asyncio.Event()
+        ready_count = [0]
+        received: dict = {}
+        tasks = [asyncio.create_task(subscriber(port, ready, ready_count, args.subscribers, received, args.events))
+                 for _ in range(args.subscribers)]
+        started = time.perf_counter()
+        await asyncio.wait_for(ready.wait(), timeout=120)
+        connect_seconds = time.perf_counter() - started
+        await asyncio.sleep(1)
+        idle_rss = rss_kib(server_pid)
+
+        sent = {}
+        for i in range(args.events):
+            slot = f"{8 + i:02d}:00"
+            sent[slot] = time.perf_counter()
+            response = await client.post("/bookings/", json={
+                "court_id": COURT_ID, "customer_name": "Fanout", "customer_phone": "0800000000",
+                "customer_email": "fanout@example.com", "booking_date": DATE, "start_time": slot, "duration": 1,
+            })
+            response.raise_for_status()
+            await asyncio.sleep(args.interval)
+
+        await asyncio.wait_for(asyncio.gather(*tasks), timeout=60)
+
+    per_delivery = sorted(t - sent[slot] for slot, times in received.items() for t in times)
+    last_delivery = sorted(max(times) - sent[slot] for slot, times in received.items())
+    return {
+        "subscribers": args.subscribers,
+        "events": args.events,
+        "deliveries": len(per_delivery),
+        "connect_seconds": round(connect_seconds, 2),
+        "delivery_p50_ms": round(percentile(per_delivery, 50) * 1000, 2),
+        "delivery_p99_ms": round(percentile(per_delivery, 99) * 1000, 2),
+        "all_delivered_p50_ms": round(percentile(last_delivery, 50) * 1000, 2),
+        "all_delivered_max_ms": round(max(last_delivery) * 1000, 2),
+        "idle_kib_per_subscriber": round((idle_rss - baseline) / args.subscribers, 1),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=10, help="bookings to publish (max 14, one per hour)")
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between bookings")
+    args = parser.parse_args(argv)
+
+    workdir = Path(tempfile.mkdtemp(prefix="futsal-fanout-"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+    port = free_port()
+    server = start_server(workdir, port)
+    try:
+        result = asyncio.run(run(port, args, server.pid))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    for name, value in result.items():
+        print(f"{name:26} {value}")
+    return 0 if result["deliveries"] == args.subscribers * args.events else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
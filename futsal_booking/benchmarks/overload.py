@@ -0,0 +1,191 @@
+"""Uji beban berlebih: admission control menjaga latency request yang diterima.
+
+Seed DB, jalankan server uvicorn lokal dua kali — dengan admission control (default
+config) dan tanpa (batas konkurensi & rate limit 0) — lalu beri dua tingkat beban dari
+beberapa proses klien: normal (`--nominal` klien) dan lonjakan (`--overload` klien, mis.
+slot akhir pekan populer dibuka). Setiap klien virtual polling availability + POST booking
+ke satu tanggal dengan jeda `--think` ms, memakai IP sendiri lewat X-Forwarded-For (uvicorn
+mempercayai header itu dari 127.0.0.1), dan menunggu Retry-After setelah 429. Saat lonjakan,
+`--greedy` klien polling tanpa jeda sama sekali (untuk rate limit per klien).
+
+Yang dilaporkan: throughput & p50/p99 request yang diterima (bukan 429), p99 booking,
+dan jumlah 429 per alasan (rate limit per klien / server sibuk). Dengan admission control,
+p99 saat lonjakan harus tetap dekat dengan p99 beban normal.
+
+    python -m futsal_booking.benchmarks.overload --nominal 16 --overload 256 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date
+from pathlib import Path
+from typing import Dict, List
+
+from .run import free_port, percentile, start_server
+
+DAY = date(2031, 1, 11) # Sabtu
+# Tanpa batas apa pun: perilaku sebelum admission control
+ADMISSION_OFF = {"FUTSAL_MAX_CONCURRENT_READS": "0", "FUTSAL_MAX_CONCURRENT_WRITES": "0", "FUTSAL_RATE_LIMIT_RPS": "0"}
+# Klien beban datang dari 127.0.0.1 (dikecualikan secara default); IP asli lewat X-Forwarded-For
+ADMISSION_ON = {"FUTSAL_RATE_LIMIT_EXEMPT": ""}
+
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, raw: bytes) -> tuple:
+    """Kirim satu request HTTP/1.1 keep-alive; return (status, header Retry-After, body).
+
+    Socket asyncio mentah, bukan httpx: di mesin dengan sedikit core, biaya klien httpx
+    sendiri sudah menyamai server, sehingga beban berlebih tidak pernah benar-benar sampai.
+    """
+    writer.write(raw)
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    headers = dict(line.lower().split(": ", 1) for line in lines[1:] if line)
+    body = await reader.readexactly(int(headers["content-length"]))
+    return int(lines[0].split(" ", 2)[1]), headers.get("retry-after"), body
+
+
+def encode(method: str, target: str, ip: str, body: bytes = b"") -> bytes:
+    head = (f"{method} {target} HTTP/1.1\r\nHost: bench\r\nX-Forwarded-For: {ip}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+    return head.encode() + body
+
+
+async def virtual_client(port: int, index: int, court_ids: List[int], deadline: float, bookings: float,
+                         think: float, latencies: Dict[str, List[float]], statuses: Counter, seed: int):
+    rng = random.Random(seed)
+    ip = f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}"
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while time.perf_counter() < deadline:
+            name = "booking" if rng.random() < bookings else "availability"
+            court_id = rng.choice(court_ids)
+            if name == "booking":
+                raw = encode("POST", "/bookings/", ip, json.dumps({
+                    "court_id": court_id, "customer_name": "Overload Test", "customer_phone": "0800000000",
+                    "customer_email": "overload@example.com", "booking_date": DAY.isoformat(),
+                    "start_time": f"{rng.randrange(8, 22):02d}:00", "duration": 1,
+                }).encode())
+            else:
+                raw = encode("GET", f"/courts/{court_id}/availability?date={DAY.isoformat()}", ip)
+            started = time.perf_counter()
+            status, retry_after, body = await request(reader, writer, raw)
+            elapsed = time.perf_counter() - started
+            if status == 429:
+                statuses["rate_limited" if b"client" in body else "busy"] += 1
+                await asyncio.sleep(float(retry_after))
+                continue
+            statuses[name, status] += 1
+            latencies[name].append(elapsed)
+            if think:
+                await asyncio.sleep(think)
+    finally:
+        writer.close()
+
+
+def client_process(port: int, first: int, count: int, greedy: int, court_ids: List[int], duration: float,
+                   bookings: float, think: float, seed: int) -> tuple:
+    async def run():
+        latencies = {"availability": [], "booking": []}
+        statuses = Counter()
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(
+            virtual_client(port, first + i, court_ids, deadline, bookings, 0 if first + i < greedy else think,
+                           latencies, statuses, seed + first + i)
+            for i in range(count)
+        ))
+        return latencies, statuses
+    return asyncio.run(run())
+
+
+def drive(port: int, clients: int, greedy: int, processes: int, court_ids: List[int], duration: float,
+          bookings: float, think: float, seed: int) -> dict:
+    processes = min(processes, clients)
+    shares = [clients // processes + (i < clients % processes) for i in range(processes)]
+    firsts = [sum(shares[:i]) for i in range(processes)]
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.starmap(client_process, [
+            (port, first, share, greedy, court_ids, duration, bookings, think, seed)
+            for first, share in zip(firsts, shares)
+        ])
+    latencies = {"availability": [], "booking": []}
+    statuses = Counter()
+    for part, counts in results:
+        for name, values in part.items():
+            latencies[name].extend(values)
+        statuses.update(counts)
+    admitted = sorted(latencies["availability"] + latencies["booking"])
+    booking = sorted(latencies["booking"])
+    return {
+        "admitted_rps": len(admitted) / duration,
+        "p50_ms": percentile(admitted, 50) * 1000,
+        "p99_ms": percentile(admitted, 99) * 1000,
+        "booking_p99_ms": percentile(booking, 99) * 1000,
+        "confirmed": statuses["booking", 200],
+        "rate_limited": statuses["rate_limited"],
+        "busy": statuses["busy"],
+        "errors": sum(count for key, count in statuses.items() if isinstance(key, tuple) and key[1] >= 500),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courts", type=int, default=10)
+    parser.add_argument("--nominal", type=int, default=16, help="virtual clients at normal load")
+    parser.add_argument("--overload", type=int, default=256, help="virtual clients during the burst")
+    parser.add_argument("--greedy", type=int, default=8, help="burst clients polling without think time")
+    parser.add_argument("--think", type=float, default=100.0, help="ms between a client's requests")
+    parser.add_argument("--processes", type=int, default=4, help="load generator processes")
+    parser.add_argument("--bookings", type=float, default=0.2, help="fraction of requests that are booking POSTs")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--admission", choices=["on", "off", "both"], default="both")
+    args = parser.parse_args(argv)
+
+    workdir = Path(tempfile.mkdtemp(prefix="futsal-overload-"))
+    # Harus diset sebelum modul backend di-import; server mewarisi env yang sama
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+    from futsal_booking.backend import crud, database
+    from .seed import seed
+
+    database.create_db_and_tables()
+    db = database.SessionLocal()
+    try:
+        seed(db, args.courts, 1, 0.0, DAY, random.Random(1))
+        court_ids = [c.id for c in crud.get_courts(db, limit=args.courts)]
+    finally:
+        db.close()
+    print(f"{args.courts} courts, {os.cpu_count()} CPU(s), {args.processes} client processes, "
+          f"{args.bookings:.0%} bookings")
+
+    print(f"{'admission':10} {'clients':>7} {'ok req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'book p99':>9} "
+          f"{'booked':>7} {'429 rate':>9} {'429 busy':>9} {'5xx':>5}")
+    for index, (label, env) in enumerate([("on", ADMISSION_ON), ("off", ADMISSION_OFF)]):
+        if args.admission not in (label, "both"):
+            continue
+        for clients, greedy in ((args.nominal, 0), (args.overload, args.greedy)):
+            # DB baru per run: slot yang sudah dibooking run sebelumnya tidak bisa dibooking lagi
+            with database.engine.begin() as conn:
+                conn.execute(database.BookingSlot.__table__.delete())
+                conn.execute(database.Booking.__table__.delete())
+            port = free_port()
+            server = start_server(workdir, port, env=env)
+            try:
+                result = drive(port, clients, greedy, args.processes, court_ids, args.duration,
+                               args.bookings, args.think / 1000, seed=(index + 1) * 100000)
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+            print(f"{label:10} {clients:7} {result['admitted_rps']:9.1f} {result['p50_ms']:8.2f} {result['p99_ms']:8.2f} "
+                  f"{result['booking_p99_ms']:9.2f} {result['confirmed']:7} {result['rate_limited']:9} "
+                  f"{result['busy']:9} {result['errors']:5}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+"""Benchmark API booking secara offline.
+
+Seed dataset sintetis (lapangan x hari x kepadatan booking), jalankan traffic campuran
+availability/listing/booking ke app FastAPI secara in-process dan/atau lewat server
+uvicorn lokal, lalu simpan throughput, latency p50/p95/p99 dan jumlah query SQL per
+request sebagai JSON agar bisa dibandingkan antar run (lihat compare.py).
+
+    python -m futsal_booking.benchmarks.run --courts 20 --days 60 --density 0.4 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import httpx
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+# --- Jenis Traffic ---
+
+@dataclass
+class Context:
+    court_ids: List[int]
+    start: date
+    days: int
+
+    def random_date(self, rng: random.Random) -> str:
+        return (self.start + timedelta(days=rng.randrange(self.days))).isoformat()
+
+
+async def op_availability(client: httpx.AsyncClient, rng: random.Random, ctx: Context) -> int:
+    response = await client.get(f"/courts/{rng.choice(ctx.court_ids)}/availability", params={"date": ctx.random_date(rng)})
+    return response.status_code
+
+async def op_listing(client: httpx.AsyncClient, rng: random.Random, ctx: Context) -> int:
+    response = await client.get("/courts/")
+    return response.status_code
+
+async def op_booking(client: httpx.AsyncClient, rng: random.Random, ctx: Context) -> int:
+    response = await client.post("/bookings/", json={
+        "court_id": rng.choice(ctx.court_ids),
+        "customer_name": "Bench Load",
+        "customer_phone": "0800000000",
+        "customer_email": "load@example.com",
+        "booking_date": ctx.random_date(rng),
+        "start_time": f"{rng.randrange(8, 22):02d}:00",
+        "duration": 1,
+    })
+    return response.status_code
+
+async def op_search(client: httpx.AsyncClient, rng: random.Random, ctx: Context) -> int:
+    params = {"type": rng.choice(["Indoor", "Outdoor", "Premium"]), "max_price": rng.randrange(80, 160) * 1000,
+              "facilities": rng.sample(["WiFi", "Parkir", "Toilet", "Kantin"], rng.randint(0, 2))}
+    response = await client.get("/courts/search", params=params)
+    return response.status_code
+
+OPERATIONS: Dict[str, Callable] = {
+    "availability": op_availability,
+    "listing": op_listing,
+    "booking": op_booking,
+    "search": op_search,
+}
+
+
+# --- Statistik ---
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(latencies: List[float], statuses: Counter, elapsed: float) -> dict:
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "throughput_rps": round(len(values) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+async def drive(client: httpx.AsyncClient, mix: Dict[str, int], duration: float, concurrency: int,
+                ctx: Context, seed: int) -> dict:
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    latencies = {name: [] for name in names}
+    statuses = {name: Counter() for name in names}
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id: int):
+        rng = random.Random(seed * 1000 + worker_id)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            status = await OPERATIONS[name](client, rng, ctx)
+            latencies[name].append(time.perf_counter() - started)
+            statuses[name][status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    result = {name: summarize(latencies[name], statuses[name], elapsed) for name in names}
+    result["total"] = summarize(
+        [value for values in latencies.values() for value in values],
+        sum(statuses.values(), Counter()),
+        elapsed,
+    )
+    return result
+
+
+async def run_load(base_url: str, transport, args, ctx: Context, seed: int) -> dict:
+    # Seed berbeda per mode; kalau sama, mode kedua hanya mengulang booking yang sudah ada (409)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits, timeout=60) as client:
+        if args.warmup:
+            await drive(client, args.mix, args.warmup, args.concurrency, ctx, seed=seed + 1)
+        return await drive(client, args.mix, args.duration, args.concurrency, ctx, seed=seed)
+
+
+async def profile_queries(app, engine, args, ctx: Context) -> dict:
+    """Rata-rata jumlah statement SQL per request, diukur berurutan di proses ini."""
+    from sqlalchemy import event
+
+    statements = [0]
+    def count(*_):
+        statements[0] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        result = {}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(base_url="http://bench", transport=transport, timeout=60) as client:
+            for name in args.mix:
+                rng = random.Random(args.seed + 7)
+                statements[0] = 0
+                for _ in range(args.profile_requests):
+                    await OPERATIONS[name](client, rng, ctx)
+                result[name] = round(statements[0] / args.profile_requests, 2)
+        return result
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+
+# --- Server uvicorn lokal ---
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(workdir: Path, port: int, workers: int = 1, env: Dict[str, str] = None) -> subprocess.Popen:
+    env = {**os.environ, **(env or {}),
+           "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")]))}
+    command = [sys.executable, "-m", "uvicorn", "futsal_booking.backend.main:app",
+               "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    process = subprocess.Popen(command, cwd=workdir, env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/courts/", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not become ready within 30s")
+
+
+# --- CLI ---
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}, choose from {sorted(OPERATIONS)}")
+        mix[name] = int(weight or 1)
+    return mix
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courts", type=int, default=20)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--density", type=float, default=0.4, help="fraction of hourly slots booked (0-1)")
+    parser.add_argument("--start-date", type=date.fromisoformat, default=date(2030, 1, 7))
+    parser.add_argument("--mode", choices=["inprocess", "server", "both"], default="both")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("availability=70,listing=20,booking=10"))
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of measured load per mode")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of unmeasured load per mode")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--profile-requests", type=int, default=50, help="sequential requests per operation for query counts")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, help=f"result JSON path (default: {RESULTS_DIR}/<timestamp>.json)")
+    return parser.parse_args(argv)
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def main(argv=None) -> dict:
+    args = parse_args(argv)
+    workdir = Path(tempfile.mkdtemp(prefix="futsal-bench-"))
+    # Harus diset sebelum modul backend di-import
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+    from futsal_booking.backend import crud, database, main as api
+
+    # Transport ASGI in-process tidak menjalankan lifespan: siapkan skema di sini
+    database.create_db_and_tables()
+    db = database.SessionLocal()
+    try:
+        started = time.perf_counter()
+        dataset = seed_dataset(db, args)
+        dataset["seed_seconds"] = round(time.perf_counter() - started, 2)
+        court_ids = [c.id for c in crud.get_courts(db, limit=args.courts)]
+    finally:
+        db.close()
+    ctx = Context(court_ids=court_ids, start=args.start_date, days=args.days)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {k: (str(v) if isinstance(v, (Path, date)) else v) for k, v in vars(args).items()},
+        },
+        "dataset": dataset,
+        "queries_per_request": asyncio.run(profile_queries(api.app, database.engine, args, ctx)),
+        "results": {},
+    }
+
+    if args.mode in ("inprocess", "both"):
+        transport = httpx.ASGITransport(app=api.app)
+        report["results"]["inprocess"] = asyncio.run(run_load("http://bench", transport, args, ctx, seed=args.seed))
+
+    if args.mode in ("server", "both"):
+        port = free_port()
+        server = start_server(workdir, port)
+        try:
+            report["results"]["server"] = asyncio.run(run_load(f"http://127.0.0.1:{port}", None, args, ctx, seed=args.seed + 100))
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    output = args.output or RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print_report(report)
+    print(f"\nsaved {output}")
+    return report
+
+def seed_dataset(db, args) -> dict:
+    from . import seed
+    return seed.seed(db, args.courts, args.days, args.density, args.start_date, random.Random(args.seed))
+
+def print_report(report: dict):
+    dataset = report["dataset"]
+    print(f"dataset: {dataset['courts']} courts x {dataset['days']} days, {dataset['bookings']} bookings "
+          f"(seeded in {dataset['seed_seconds']}s)")
+    print("queries/request:", ", ".join(f"{k}={v}" for k, v in report["queries_per_request"].items()))
+    print(f"{'mode':10} {'operation':13} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  status")
+    for mode, operations in report["results"].items():
+        for name, stats in operations.items():
+            print(f"{mode:10} {name:13} {stats['throughput_rps']:9.1f} {stats['p50_ms']:9.2f} "
+                  f"{stats['p95_ms']:9.2f} {stats['p99_ms']:9.2f}  {stats['status_codes']}")
+
+
+if __name__ == "__main__":
+    main()
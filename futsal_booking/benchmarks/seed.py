@@ -0,0 +1,49 @@
+import random
+from datetime import date, timedelta
+
+from futsal_booking.backend import crud, database, models
+
+# --- Dataset Sintetis untuk Benchmark ---
+# Lapangan dibuat langsung; booking dibuat lewat crud.create_recurring_bookings agar
+# tabel bookings & booking_slots terisi persis seperti lewat API.
+
+COURT_TYPES = ["Indoor", "Outdoor", "Premium"]
+FACILITIES = ["AC", "Toilet", "Kantin", "WiFi", "Loker", "Shower", "Parkir"]
+
+
+def seed(db, courts: int, days: int, density: float, start: date, rng: random.Random) -> dict:
+    """Isi DB kosong: `courts` lapangan, `days` hari mulai `start`, sekitar `density` slot terisi."""
+    db.add_all([
+        database.Court(
+            name=f"Bench Court {i + 1}",
+            type=rng.choice(COURT_TYPES),
+            price=rng.randrange(60, 160) * 1000,
+            facilities=",".join(rng.sample(FACILITIES, rng.randint(2, len(FACILITIES)))),
+            image_url="",
+        )
+        for i in range(courts)
+    ])
+    db.commit()
+    court_rows = crud.get_courts(db, limit=courts)
+
+    bookings = 0
+    for court in court_rows:
+        open_hour, close_hour = database.operating_hours(court)
+        # Pola mingguan: tiap (hari dalam minggu, jam) dibooking berulang dengan peluang `density`
+        for weekday in range(min(7, days)):
+            for hour in range(open_hour, close_hour):
+                if rng.random() >= density:
+                    continue
+                occurrences = len(range(weekday, days, 7))
+                result = crud.create_recurring_bookings(db, models.RecurringBookingCreate(
+                    court_ids=[court.id],
+                    customer_name=f"Bench {rng.randrange(10_000)}",
+                    customer_phone=f"08{rng.randrange(10 ** 9, 10 ** 10)}",
+                    customer_email="bench@example.com",
+                    start_date=start + timedelta(days=weekday),
+                    start_time=f"{hour:02d}:00",
+                    duration=1,
+                    occurrences=occurrences,
+                ))
+                bookings += result.confirmed
+    return {"courts": courts, "days": days, "density": density, "bookings": bookings}
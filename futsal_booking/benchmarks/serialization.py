@@ -0,0 +1,106 @@
+"""Uji CPU per request endpoint baca yang panas.
+
+Seed dataset sintetis di DB sementara, lalu panggil app ASGI langsung (tanpa klien HTTP
+maupun socket, supaya yang terukur hanya kerja server: routing, query/cache, validasi &
+encode JSON) dan ukur waktu CPU proses (semua thread, termasuk threadpool handler sync)
+per request. Availability diukur saat cache hit dan saat miss (cache dikosongkan sebelum
+setiap request, indeks okupansi tetap hangat), sehingga biaya encode-nya terlihat.
+
+    python -m futsal_booking.benchmarks.serialization --courts 50 --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from urllib.parse import urlencode
+
+
+async def call(app, path: str, params: dict = None) -> bytes:
+    """Satu GET langsung ke app ASGI; kembalikan body (raise jika status bukan 200)."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": urlencode(params or {}, doseq=True).encode(),
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    status = messages[0]["status"]
+    if status != 200:
+        raise RuntimeError(f"GET {path} -> {status}")
+    return b"".join(m.get("body", b"") for m in messages[1:])
+
+
+async def cpu_per_request(app, requests: int, path: str, params: dict, before=None) -> float:
+    """Median-free rata-rata CPU (us) per request setelah pemanasan."""
+    for _ in range(50):
+        if before:
+            before()
+        await call(app, path, params)
+    started = time.process_time()
+    for _ in range(requests):
+        if before:
+            before()
+        await call(app, path, params)
+    return (time.process_time() - started) / requests * 1e6
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courts", type=int, default=50)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--density", type=float, default=0.4)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    workdir = Path(tempfile.mkdtemp(prefix="futsal-serialization-"))
+    # Harus diset sebelum modul backend di-import
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+    from futsal_booking.backend import cache, database, main as api
+    from .seed import seed
+
+    database.create_db_and_tables()
+    start = date(2031, 1, 6)
+    db = database.SessionLocal()
+    try:
+        dataset = seed(db, args.courts, args.days, args.density, start, random.Random(1))
+    finally:
+        db.close()
+    print(f"dataset: {dataset['courts']} courts x {dataset['days']} days, {dataset['bookings']} bookings")
+
+    day = start.isoformat()
+    cases = {
+        "courts listing": ("/courts/", {}, None),
+        "availability (cache hit)": ("/courts/1/availability", {"date": day}, None),
+        "availability (cache miss)": ("/courts/1/availability", {"date": day}, cache.availability.clear),
+        "grid 7 days": ("/availability/grid", {"date_from": day, "days": 7}, None),
+        "search": ("/courts/search", {"limit": 20}, None),
+    }
+
+    async def run():
+        results = {}
+        for name, (path, params, before) in cases.items():
+            size = len(await call(api.app, path, params))
+            results[name] = (await cpu_per_request(api.app, args.requests, path, params, before), size)
+        return results
+
+    print(f"{'endpoint':28} {'cpu us/req':>11} {'bytes':>8}")
+    for name, (cpu_us, size) in asyncio.run(run()).items():
+        print(f"{name:28} {cpu_us:11.1f} {size:8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
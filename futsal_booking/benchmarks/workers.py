@@ -0,0 +1,149 @@
+"""Uji skala throughput mode multi-worker (FUTSAL_MULTI_WORKER) & koherensi cache-nya.
+
+Seed satu DB SQLite, lalu untuk setiap jumlah worker jalankan `uvicorn --workers N` di atas
+file yang sama dan beri traffic campuran dari beberapa proses klien (satu proses Python
+klien saja sudah menjadi bottleneck sebelum server). Baris "1 (off)" adalah satu worker
+tanpa mode multi-worker, untuk melihat biaya sinkronisasinya.
+
+Setelah tiap run (gate): availability sejumlah key (court, tanggal) yang ikut dibooking
+diminta lewat koneksi baru berulang kali, sehingga tersebar ke semua worker, dan dibandingkan
+dengan hasil yang dihitung langsung dari DB. Satu respons basi = keluar dengan kode 1.
+
+    python -m futsal_booking.benchmarks.workers --workers 1,2,4 --clients 4 --duration 10
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from typing import List
+
+import httpx
+
+from .run import Context, free_port, parse_mix, run_load, start_server
+
+
+def client_load(base_url: str, args: argparse.Namespace, ctx: Context, seed: int) -> dict:
+    return asyncio.run(run_load(base_url, None, args, ctx, seed))
+
+
+def wait_for_workers(base_url: str, workers: int, timeout: float = 30):
+    """start_server() kembali begitu satu worker siap; tunggu sampai semuanya menjawab."""
+    seen = set()
+    deadline = time.monotonic() + timeout
+    while len(seen) < workers and time.monotonic() < deadline:
+        # Koneksi baru per request agar tersebar ke worker yang berbeda
+        seen.add(httpx.get(f"{base_url}/cache/stats").json()["coherence"]["worker"])
+    if len(seen) < workers:
+        raise RuntimeError(f"only {len(seen)} of {workers} workers answered")
+
+
+def stale_responses(base_url: str, ctx: Context, keys: int, repeat: int, seed: int) -> int:
+    """Jumlah respons availability yang berbeda dari kondisi DB saat ini."""
+    from futsal_booking.backend import crud, database, occupancy
+
+    rng = random.Random(seed)
+    stale = 0
+    db = database.SessionLocal()
+    try:
+        for _ in range(keys):
+            court_id, day = rng.choice(ctx.court_ids), ctx.random_date(rng)
+            court = crud.get_court(db, court_id)
+            taken = occupancy.from_bookings(crud.get_bookings_on_date(db, court_id, date.fromisoformat(day)))
+            expected = crud.availability_payload(court, taken, 60)["available_slots"]
+            for _ in range(repeat):
+                response = httpx.get(f"{base_url}/courts/{court_id}/availability", params={"date": day})
+                stale += response.json()["available_slots"] != expected
+    finally:
+        db.close()
+    return stale
+
+
+def run_case(workdir: Path, workers: int, coherent: bool, args, ctx: Context, seed: int) -> dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(workdir, port, workers, env={"FUTSAL_MULTI_WORKER": "1" if coherent else "0"})
+    try:
+        if coherent:
+            wait_for_workers(base_url, workers)
+        with multiprocessing.Pool(args.clients) as pool:
+            results = pool.starmap(client_load, [(base_url, args, ctx, seed + i) for i in range(args.clients)])
+        totals = [result["total"] for result in results]
+        return {
+            "throughput_rps": sum(total["throughput_rps"] for total in totals),
+            # Persentil per proses klien; yang terburuk yang dilaporkan
+            "p50_ms": max(total["p50_ms"] for total in totals),
+            "p99_ms": max(total["p99_ms"] for total in totals),
+            "errors": sum(count for total in totals for code, count in total["status_codes"].items()
+                          if code.startswith("5")),
+            "stale": stale_responses(base_url, ctx, args.check_keys, args.check_repeat, seed),
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def parse_workers(value: str) -> List[int]:
+    return [int(part) for part in value.split(",")]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=parse_workers, default=parse_workers("1,2,4"))
+    parser.add_argument("--clients", type=int, default=4, help="load generator processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent requests per client process")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("availability=70,listing=20,booking=10"))
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--courts", type=int, default=20)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--density", type=float, default=0.4)
+    parser.add_argument("--check-keys", type=int, default=20, help="(court, date) keys verified after each run")
+    parser.add_argument("--check-repeat", type=int, default=10, help="requests per verified key")
+    args = parser.parse_args(argv)
+
+    workdir = Path(tempfile.mkdtemp(prefix="futsal-workers-"))
+    # Harus diset sebelum modul backend di-import; server mewarisi env yang sama
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+    from futsal_booking.backend import crud, database
+    from .seed import seed
+
+    database.create_db_and_tables()
+    start = date(2031, 1, 6)
+    db = database.SessionLocal()
+    try:
+        dataset = seed(db, args.courts, args.days, args.density, start, random.Random(1))
+        court_ids = [c.id for c in crud.get_courts(db, limit=args.courts)]
+    finally:
+        db.close()
+    # Engine proses ini dibuat sebelum fork proses klien
+    database.engine.dispose()
+    ctx = Context(court_ids=court_ids, start=start, days=args.days)
+    print(f"dataset: {dataset['courts']} courts x {dataset['days']} days, {dataset['bookings']} bookings; "
+          f"{os.cpu_count()} CPU(s), {args.clients} client processes x {args.concurrency}")
+
+    cases = [(1, False)] + [(workers, True) for workers in args.workers]
+    print(f"{'workers':10} {'req/s':>9} {'speedup':>8} {'p50 ms':>8} {'p99 ms':>8} {'5xx':>5} {'stale':>6}")
+    baseline = None
+    failed = False
+    for index, (workers, coherent) in enumerate(cases):
+        # Seed berbeda per run agar booking tidak hanya mengulang slot yang sudah terisi
+        result = run_case(workdir, workers, coherent, args, ctx, seed=(index + 1) * 1000)
+        baseline = baseline or result["throughput_rps"]
+        label = str(workers) if coherent else f"{workers} (off)"
+        print(f"{label:10} {result['throughput_rps']:9.1f} {result['throughput_rps'] / baseline:7.2f}x "
+              f"{result['p50_ms']:8.2f} {result['p99_ms']:8.2f} {result['errors']:5} {result['stale']:6}")
+        failed = failed or (coherent and result["stale"] > 0)
+    if failed:
+        print("FAIL: stale availability served by a worker")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,28 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
+import time
 import uuid
 import streamlit.components.v1 as components
 import pandas as pd
 
 
-booked_data = {
-    "2025-07-18": ["08.00", "10.00", "16.00"],
-    "2025-07-19": ["09.00", "14.00", "18.00"],
-    "2025-07-20": ["11.00", "13.00", "19.00"],
-}
-
 # --- Konfigurasi Halaman & API ---
 st.set_page_config(layout="wide", page_title="Futsal Booking", page_icon="⚽")
 API_URL = "http://127.0.0.1:8000"
+REQUEST_TIMEOUT = (3.05, 10) # (connect, read) dalam detik, agar UI tidak membeku saat backend lambat
+COURTS_TTL = 300 # detik; data lapangan jarang berubah
+AVAILABILITY_TTL = 15 # detik; dibuang lebih awal setelah booking berhasil
+SEARCH_PAGE_SIZE = 12 # lapangan per halaman hasil pencarian
+HISTORY_PAGE_SIZE = 20 # booking per halaman riwayat
+BOOKING_ATTEMPTS = 3 # POST /bookings/ aman diulang karena memakai Idempotency-Key
+MAX_RETRY_AFTER = 3 # detik; batas tunggu Retry-After saat backend menolak karena sibuk (429)
+FACILITY_OPTIONS = ["AC", "Toilet", "Kantin", "WiFi", "Loker", "Shower", "Parkir", "Parkir Luas"]
+PRICE_OPTIONS = {"Semua Harga": None, "≤ Rp 80.000": 80000, "≤ Rp 100.000": 100000, "≤ Rp 120.000": 120000}
+DURATION_OPTIONS = [1, 1.5, 2, 2.5, 3, 4] # jam; kelipatan 30 menit (FUTSAL_GRANULARITY_MINUTES backend)
+START_TIME_OPTIONS = [f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(8 * 60, 22 * 60, 30)]
 
 # --- Styling (CSS Injection) ---
 def load_css():
@@ -109,32 +117,136 @@ def load_css():
     """, unsafe_allow_html=True)
 
 # --- Helper Functions ---
-def get_courts_data():
+@st.cache_resource
+def get_http_session():
+    # Satu Session (connection pool keep-alive) untuk semua rerun & semua user
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(total=2, backoff_factor=0.2, allowed_methods=["GET"]),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# Fungsi fetch_* di-cache oleh Streamlit; error tidak ikut di-cache karena berupa exception
+@st.cache_data(ttl=COURTS_TTL, show_spinner=False)
+def fetch_court_search(court_type, max_price, facilities, cursor):
+    # Filter dijalankan di server; tiap halaman di-cache terpisah per cursor
+    params = {"type": court_type, "max_price": max_price, "facilities": list(facilities), "cursor": cursor, "limit": SEARCH_PAGE_SIZE}
+    response = get_http_session().get(f"{API_URL}/courts/search", params=params, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+@st.cache_data(ttl=AVAILABILITY_TTL, show_spinner=False)
+def fetch_availability(court_id, date, duration):
+    params = {"date": date, "duration": duration}
+    response = get_http_session().get(f"{API_URL}/courts/{court_id}/availability", params=params, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json().get("available_slots", [])
+
+@st.cache_data(ttl=AVAILABILITY_TTL, show_spinner=False)
+def fetch_free_courts(date, start_time, duration, court_type, max_price):
+    params = {"date": date, "start_time": start_time, "duration": duration, "type": court_type, "max_price": max_price}
+    response = get_http_session().get(f"{API_URL}/courts/free", params=params, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+@st.cache_data(ttl=AVAILABILITY_TTL, show_spinner=False)
+def fetch_availability_grid(date_from, days):
+    response = get_http_session().get(f"{API_URL}/availability/grid", params={"date_from": date_from, "days": days}, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+def search_courts(court_type, max_price, facilities, cursor=None):
     try:
-        response = requests.get(f"{API_URL}/courts/")
-        response.raise_for_status()
-        return response.json()
+        return fetch_court_search(court_type, max_price, facilities, cursor)
     except requests.exceptions.RequestException as e:
         st.error(f"Gagal terhubung ke server: {e}")
-        return []
+        return None
+
+def clear_availability(court_id, date):
+    # Satu booking/hold mengubah jam mulai yang tersedia untuk semua durasi di tanggal ini
+    for duration in DURATION_OPTIONS:
+        fetch_availability.clear(court_id, date, duration)
 
-def get_availability(court_id, date):
+def get_availability(court_id, date, duration):
     try:
-        response = requests.get(f"{API_URL}/courts/{court_id}/availability?date={date}")
-        response.raise_for_status()
-        return response.json().get("available_slots", [])
+        return fetch_availability(court_id, date, duration)
     except requests.exceptions.RequestException as e:
         st.error(f"Gagal mengambil jadwal: {e}")
         return []
 
+@st.cache_data(ttl=AVAILABILITY_TTL, show_spinner=False)
+def fetch_booking_history(field, value, cursor):
+    params = {field: value, "cursor": cursor, "limit": HISTORY_PAGE_SIZE}
+    response = get_http_session().get(f"{API_URL}/bookings/history", params=params, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+def get_free_courts(date, start_time, duration, court_type=None, max_price=None):
+    try:
+        return fetch_free_courts(date, start_time, duration, court_type, max_price)
+    except requests.exceptions.RequestException as e:
+        st.error(f"Gagal mencari lapangan kosong: {e}")
+        return []
+
+def get_booking_history(field, value, cursor=None):
+    try:
+        return fetch_booking_history(field, value, cursor)
+    except requests.exceptions.RequestException as e:
+        st.error(f"Gagal mengambil riwayat: {e}")
+        return None
+
+def get_availability_grid(date_from, days=7):
+    try:
+        return fetch_availability_grid(date_from, days)
+    except requests.exceptions.RequestException as e:
+        st.error(f"Gagal mengambil jadwal: {e}")
+        return None
+
+def booking_key(payload):
+    # Submit ulang data yang sama (double click, retry setelah timeout) memakai key yang sama,
+    # sehingga server mengembalikan booking yang sudah tercatat, bukan 409
+    intent = tuple(sorted((k, v) for k, v in payload.items() if k != "hold_id"))
+    saved = st.session_state.get('booking_key')
+    if saved is None or saved[0] != intent:
+        saved = (intent, str(uuid.uuid4()))
+        st.session_state.booking_key = saved
+    return saved[1]
+
 def book_court(payload):
+    headers = {"Idempotency-Key": booking_key(payload)}
     try:
-        response = requests.post(f"{API_URL}/bookings/", json=payload)
+        for attempt in range(BOOKING_ATTEMPTS):
+            try:
+                response = get_http_session().post(f"{API_URL}/bookings/", json=payload, headers=headers, timeout=REQUEST_TIMEOUT)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == BOOKING_ATTEMPTS - 1:
+                    raise
+                continue
+            # Backend sedang membuang beban (429): tunggu sesuai Retry-After lalu ulangi
+            if response.status_code != 429 or attempt == BOOKING_ATTEMPTS - 1:
+                break
+            time.sleep(min(float(response.headers.get("Retry-After", 1)), MAX_RETRY_AFTER))
         response.raise_for_status()
+        st.session_state.pop('booking_key', None)
+        # Jadwal tanggal ini sudah berubah: buang hanya cache yang terdampak
+        clear_availability(payload["court_id"], payload["booking_date"])
+        fetch_availability_grid.clear()
+        fetch_free_courts.clear()
+        fetch_booking_history.clear()
         return response.json()
     except requests.exceptions.HTTPError as e:
+        # Submit berikutnya adalah percobaan baru (mis. setelah hold baru), bukan replay error ini
+        st.session_state.pop('booking_key', None)
         if e.response.status_code == 409:
+            # Cache kita ternyata basi untuk tanggal ini
+            clear_availability(payload["court_id"], payload["booking_date"])
             st.error("Jadwal yang dipilih sudah tidak tersedia.")
+        elif e.response.status_code == 429:
+            st.error("Server sedang sibuk. Silakan coba lagi sebentar lagi.")
         else:
             st.error(f"Gagal booking: {e.response.text}")
         return None
@@ -142,6 +254,48 @@ def book_court(payload):
         st.error(f"Gagal terhubung ke server: {e}")
         return None
 
+def hold_key(court_id, date, start_time, duration):
+    return (court_id, date, start_time, duration)
+
+def place_hold(court_id, date, start_time, duration):
+    # Tahan slot selama user mengisi form, agar tidak diambil orang lain saat checkout
+    payload = {"court_id": court_id, "booking_date": date, "start_time": start_time, "duration": duration}
+    try:
+        response = get_http_session().post(f"{API_URL}/holds", json=payload, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+    except requests.exceptions.HTTPError as e:
+        if e.response.status_code == 409:
+            clear_availability(court_id, date)
+            st.error("Jadwal yang dipilih baru saja diambil orang lain. Silakan pilih jam lain.")
+        else:
+            st.error(f"Gagal menahan jadwal: {e.response.text}")
+        return None
+    except requests.exceptions.RequestException as e:
+        st.error(f"Gagal terhubung ke server: {e}")
+        return None
+    hold = response.json()
+    return {
+        "id": hold["hold_id"],
+        "key": hold_key(court_id, date, start_time, duration),
+        "held_until": datetime.now() + timedelta(seconds=hold["ttl_seconds"]),
+    }
+
+def release_hold():
+    hold = st.session_state.pop('hold', None)
+    if hold is None:
+        return
+    try:
+        get_http_session().delete(f"{API_URL}/holds/{hold['id']}", timeout=REQUEST_TIMEOUT)
+    except requests.exceptions.RequestException:
+        pass # hold tetap kedaluwarsa sendiri di server
+    clear_availability(hold['key'][0], hold['key'][1])
+
+def held_slots(hold, court_id, date):
+    # Jam yang sedang kita tahan tidak muncul di availability, tapi tetap boleh dipilih
+    if hold is None or hold['key'][:2] != (court_id, date):
+        return []
+    return [hold['key'][2]]
+
 # --- Session State Init ---
 if 'page' not in st.session_state:
     st.session_state.page = 'main'
@@ -165,17 +319,33 @@ def main_page():
     """, unsafe_allow_html=True)
     st.markdown("---")
 
-    courts = get_courts_data()
+    show_free_court_finder()
+
+    type_col, price_col, facility_col = st.columns([1, 1, 2])
+    filter_type = type_col.selectbox("Tipe", ["Semua", "Indoor", "Outdoor", "Premium"])
+    price_label = price_col.selectbox("Harga per jam", list(PRICE_OPTIONS))
+    filter_facilities = facility_col.multiselect("Fasilitas", FACILITY_OPTIONS)
+
+    filters = (None if filter_type == "Semua" else filter_type, PRICE_OPTIONS[price_label], tuple(filter_facilities))
+    # Cursor tiap halaman yang sudah dimuat; diulang dari awal jika filter berubah
+    if st.session_state.get('search_filters') != filters:
+        st.session_state.search_filters = filters
+        st.session_state.search_cursors = [None]
+
+    courts, next_cursor = [], None
+    for cursor in st.session_state.search_cursors:
+        page = search_courts(*filters, cursor)
+        if page is None:
+            return
+        courts.extend(page['courts'])
+        next_cursor = page['next_cursor']
+
     if not courts:
-        st.warning("Tidak ada lapangan tersedia.")
+        st.warning("Tidak ada lapangan yang cocok dengan filter.")
         return
 
-    _, _, filter_col = st.columns([2, 2, 1])
-    filter_type = filter_col.selectbox("Filter Tipe", ["Semua", "Indoor", "Outdoor", "Premium"], label_visibility="collapsed")
-
-    filtered = [c for c in courts if c['type'] == filter_type] if filter_type != "Semua" else courts
     cols = st.columns(3)
-    for i, court in enumerate(filtered):
+    for i, court in enumerate(courts):
         with cols[i % 3]:
             with st.container():
                 st.markdown(f"""
@@ -191,6 +361,30 @@ def main_page():
                     navigate_to('booking', court)
                 st.markdown('</div>', unsafe_allow_html=True)
 
+    if next_cursor and st.button("Muat lebih banyak"):
+        st.session_state.search_cursors.append(next_cursor)
+        st.rerun()
+
+def show_free_court_finder():
+    # Untuk user yang tidak peduli lapangan mana: cukup pilih tanggal, jam & durasi
+    with st.expander("Cari lapangan kosong"):
+        date_col, time_col, duration_col, price_col = st.columns(4)
+        selected_date = date_col.date_input("Tanggal", min_value=datetime.today(), max_value=datetime.today() + timedelta(days=30), key="free_date")
+        start_time = time_col.selectbox("Jam Mulai", START_TIME_OPTIONS, index=START_TIME_OPTIONS.index("19:00"), key="free_start")
+        duration = duration_col.selectbox("Durasi (jam)", DURATION_OPTIONS, format_func=lambda hours: f"{hours:g}", key="free_duration")
+        price_label = price_col.selectbox("Harga per jam", list(PRICE_OPTIONS), key="free_price")
+
+        courts = get_free_courts(selected_date.strftime("%Y-%m-%d"), start_time, duration, max_price=PRICE_OPTIONS[price_label])
+        if not courts:
+            st.info("Tidak ada lapangan kosong pada jam tersebut.")
+            return
+        for court in courts:
+            name_col, price_info_col, button_col = st.columns([3, 2, 1])
+            name_col.markdown(f"**{court['name']}** ({court['type']})")
+            price_info_col.markdown(f"Rp {court['total_price']:,.0f} untuk {duration:g} jam")
+            if button_col.button("Book", key=f"free_book_{court['id']}"):
+                navigate_to('booking', court)
+
 def booking_page():
     court = st.session_state.selected_court
     if not court:
@@ -200,6 +394,7 @@ def booking_page():
         return
 
     if st.button("← Kembali"):
+        release_hold()
         navigate_to('main')
 
     st.markdown('<div class="booking-form">', unsafe_allow_html=True)
@@ -207,12 +402,27 @@ def booking_page():
     st.image(court['image_url'])
     st.markdown(f"### Harga: Rp {court['price']:,.0f}/jam")
 
-    with st.form("booking_form"):
-        selected_date = st.date_input("Tanggal", min_value=datetime.today(), max_value=datetime.today() + timedelta(days=30))
-        duration = st.selectbox("Durasi (jam)", [1, 2, 3, 4])
-        available_slots = get_availability(court['id'], selected_date.strftime("%Y-%m-%d"))
-        start_time = st.radio("Jam Mulai", available_slots, horizontal=True) if available_slots else None
+    # Tanggal, durasi & jam di luar form: tiap perubahan pilihan langsung menahan slot
+    selected_date = st.date_input("Tanggal", min_value=datetime.today(), max_value=datetime.today() + timedelta(days=30))
+    booking_date = selected_date.strftime("%Y-%m-%d")
+    duration = st.selectbox("Durasi (jam)", DURATION_OPTIONS, format_func=lambda hours: f"{hours:g}")
+    hold = st.session_state.get('hold')
+    available_slots = sorted(set(get_availability(court['id'], booking_date, duration)) | set(held_slots(hold, court['id'], booking_date)))
+    # key tetap: pilihan jam tidak hilang saat durasi diganti (daftar jam mulai ikut berubah)
+    start_time = st.radio("Jam Mulai", available_slots, index=None, horizontal=True, key="start_time") if available_slots else None
+
+    wanted = hold_key(court['id'], booking_date, start_time, duration) if start_time else None
+    if hold is not None and hold['key'] != wanted:
+        release_hold()
+        hold = None
+    if wanted is not None and hold is None:
+        hold = place_hold(*wanted)
+        if hold is not None:
+            st.session_state.hold = hold
+    if hold is not None:
+        st.info(f"Jadwal ditahan untuk Anda sampai {hold['held_until']:%H:%M}. Selesaikan booking sebelum waktu tersebut.")
 
+    with st.form("booking_form"):
         customer_name = st.text_input("Nama Lengkap")
         customer_phone = st.text_input("Nomor HP")
         customer_email = st.text_input("Email")
@@ -229,11 +439,14 @@ def booking_page():
                     "customer_name": customer_name,
                     "customer_phone": customer_phone,
                     "customer_email": customer_email,
-                    "booking_date": selected_date.strftime("%Y-%m-%d"),
+                    "booking_date": booking_date,
                     "start_time": start_time,
                     "duration": duration,
+                    "hold_id": hold['id'] if hold else None,
                 }
                 result = book_court(payload)
+                # Berhasil atau gagal, hold sudah terpakai/kedaluwarsa di server
+                st.session_state.pop('hold', None)
                 if result:
                     st.session_state.booking_result = {**result, 'court_name': court['name']}
                     navigate_to('success')
@@ -257,7 +470,7 @@ def success_page():
     - **Nama**: {result['customer_name']}
     - **Lapangan**: {result['court_name']}
     - **Tanggal**: {tanggal}
-    - **Jam**: {result['start_time']} ({result['duration']} jam)
+    - **Jam**: {result['start_time']} ({result['duration']:g} jam)
     - **Total**: Rp {result['total_price']:,.0f}
     - **Status**: <span style='color:green; font-weight:bold;'>{result['status'].upper()}</span>
     """, unsafe_allow_html=True)
@@ -285,61 +498,112 @@ with st.sidebar:
 
 # --- Halaman Sidebar ---
 def show_today_schedule():
-    selected_date = st.date_input("Pilih Tanggal", datetime.today())
-    date_key = selected_date.strftime("%Y-%m-%d")
-    booked_hours = booked_data.get(date_key, [])
-    hours = [f"{h:02d}.00" for h in range(8, 22)]
+    start_date = st.date_input("Mulai Tanggal", datetime.today())
+    # Satu request untuk seminggu penuh, semua lapangan
+    grid = get_availability_grid(start_date.strftime("%Y-%m-%d"), days=7)
+    courts = grid["courts"] if grid else []
+    if not courts:
+        st.warning("Tidak ada lapangan tersedia.")
+        return
 
-    # HTML dan CSS Table
-    table_html = f"""
+    open_hour = min(c['open_hour'] for c in courts)
+    close_hour = max(c['close_hour'] for c in courts)
+    step = grid["slot_minutes"]
+    days = [start_date + timedelta(days=i) for i in range(7)]
+
+    st.markdown("""
     <style>
-        table {{
+        table {
             width: 100%;
             border-collapse: collapse;
             margin-top: 20px;
             font-size: 18px;
-        }}
-        th, td {{
+        }
+        th, td {
             padding: 12px;
             text-align: center;
             border: 1px solid #444;
-        }}
-        th {{
+        }
+        th {
             background-color: #111;
             color: white;
-        }}
-        .booked {{
+        }
+        .booked {
             color: #00FFAA;
             font-weight: bold;
-        }}
-        .available {{
+        }
+        .available {
             color: #FF5555;
-        }}
+        }
     </style>
-    <h3>Jadwal Booking: {selected_date.strftime('%A, %d %B %Y')}</h3>
-    <table>
-        <tr><th>Jam</th><th>Status</th></tr>
-    """
-
-    for hour in hours:
-        if hour in booked_hours:
-            status = '<span class="booked">Booked</span>'
-        else:
-            status = '<span class="available">Tersedia</span>'
-        table_html += f"<tr><td>{hour}</td><td>{status}</td></tr>"
-
-    table_html += "</table>"
+    """, unsafe_allow_html=True)
 
-    st.markdown(table_html, unsafe_allow_html=True)
+    for i, tab in enumerate(st.tabs([d.strftime('%a, %d %b') for d in days])):
+        with tab:
+            table_html = f"""
+            <h3>Jadwal Booking: {days[i].strftime('%A, %d %B %Y')}</h3>
+            <table>
+                <tr><th>Jam</th>{''.join(f"<th>{c['name']}</th>" for c in courts)}</tr>
+            """
+            for minute in range(open_hour * 60, close_hour * 60, step):
+                start, end = f"{minute // 60:02d}:{minute % 60:02d}", f"{(minute + step) // 60:02d}:{(minute + step) % 60:02d}"
+                row = f"<tr><td>{minute // 60:02d}.{minute % 60:02d}</td>"
+                for court in courts:
+                    if not court['open_hour'] * 60 <= minute < court['close_hour'] * 60:
+                        status = '-'
+                    # Rentang "HH:MM" bisa dibandingkan sebagai string
+                    elif any(booked_start < end and start < booked_end for booked_start, booked_end in court['booked'][i]):
+                        status = '<span class="booked">Booked</span>'
+                    else:
+                        status = '<span class="available">Tersedia</span>'
+                    row += f"<td>{status}</td>"
+                table_html += row + "</tr>"
+            table_html += "</table>"
+
+            st.markdown(table_html, unsafe_allow_html=True)
 
 
 def show_booking_history_summary():
+    field_label = st.radio("Cari berdasarkan", ["Nomor HP", "Email"], horizontal=True)
+    value = st.text_input(field_label).strip()
+    if not value:
+        st.info("Masukkan nomor HP atau email yang dipakai saat booking.")
+        return
+
+    lookup = ("phone" if field_label == "Nomor HP" else "email", value)
+    # Cursor tiap halaman yang sudah dimuat; diulang dari awal jika pencarian berubah
+    if st.session_state.get('history_lookup') != lookup:
+        st.session_state.history_lookup = lookup
+        st.session_state.history_cursors = [None]
+
+    bookings, next_cursor = [], None
+    for cursor in st.session_state.history_cursors:
+        page = get_booking_history(*lookup, cursor)
+        if page is None:
+            return
+        bookings.extend(page['bookings'])
+        next_cursor = page['next_cursor']
+
+    if not bookings:
+        st.warning("Belum ada booking untuk data tersebut.")
+        return
+
     st.subheader("Riwayat Terakhir")
     st.dataframe([
-        {"Tanggal": "16 Juli 2025", "Lapangan": "A", "Jam": "09:00", "Status": "Selesai"},
-        {"Tanggal": "15 Juli 2025", "Lapangan": "B", "Jam": "11:00", "Status": "Selesai"},
+        {
+            "Tanggal": datetime.strptime(b['booking_date'], "%Y-%m-%d").strftime('%d %B %Y'),
+            "Lapangan": b['court_name'],
+            "Jam": f"{b['start_time']}-{b['end_time']}",
+            "Total": f"Rp {b['total_price']:,.0f}",
+            "Status": b['status'].capitalize(),
+        }
+        for b in bookings
     ], use_container_width=True)
 
+    if next_cursor and st.button("Muat lebih banyak", key="history_more"):
+        st.session_state.history_cursors.append(next_cursor)
+        st.rerun()
+
 def show_contact_form():
     st.markdown("""
         <style>
@@ -0,0 +1,93 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+# Backend membaca konfigurasi saat di-import: DB sementara & tanpa rate limit (semua
+# request TestClient datang dari satu klien "testclient"). Antrean tulis dibuat cukup
+# panjang untuk uji stress ratusan booking serentak (yang dicek di sana 409, bukan 429).
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(tempfile.mkdtemp(prefix='futsal-tests-')) / 'test.db'}"
+os.environ["FUTSAL_RATE_LIMIT_RPS"] = "0"
+os.environ["FUTSAL_MAX_QUEUED_WRITES"] = "1000"
+# Bukan default AnyIO (40), agar terlihat bahwa ukuran threadpool benar-benar diterapkan
+os.environ["FUTSAL_THREADPOOL_SIZE"] = "32"
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from futsal_booking.backend.main import app
+
+    # Lifespan membuat skema & seed lapangan dummy
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def db(client):
+    from futsal_booking.backend import database
+
+    db = database.SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def court(db):
+    from futsal_booking.backend import crud
+
+    return crud.get_courts(db, limit=1)[0]
+
+
+def booking_payload(court_id: int, booking_date, start_time: str, duration: float = 1) -> dict:
+    return {
+        "court_id": court_id,
+        "customer_name": "Budi Santoso",
+        "customer_phone": "081234567890",
+        "customer_email": "budi@example.com",
+        "booking_date": str(booking_date),
+        "start_time": start_time,
+        "duration": duration,
+    }
+
+
+def race(attempt, n: int):
+    """Jalankan attempt(i) di n thread yang dilepas serentak lewat barrier; return hasil/exception."""
+    barrier = threading.Barrier(n + 1)
+    results = [None] * n
+
+    def run(i):
+        barrier.wait()
+        try:
+            results[i] = attempt(i)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    print(f"\n{n} concurrent attempts in {elapsed * 1000:.0f} ms ({n / elapsed:,.0f} req/s)")
+    return results
+
+
+def bookings_on(court_id: int, booking_date: date) -> int:
+    from futsal_booking.backend import crud, database
+
+    db = database.SessionLocal()
+    try:
+        return len(crud.get_bookings_on_date(db, court_id, booking_date))
+    finally:
+        db.close()
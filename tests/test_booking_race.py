@@ -0,0 +1,41 @@
+from datetime import date
+
+import pytest
+
+from conftest import booking_payload, bookings_on, race
+from futsal_booking.backend import crud, database, models
+
+# Jumlah request yang dilepas bersamaan untuk slot yang sama: kecil, dan varian stress
+# beberapa ratus request yang juga melaporkan throughput-nya (terlihat dengan pytest -s)
+SIZES = [8, 300]
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_create_booking_race(court, n):
+    booking_date = date(2032, 1, 5 + SIZES.index(n))
+    court_id = court.id
+
+    def attempt(i):
+        # Separuh mulai 10:00, separuh 10:30: semuanya bertumpuk di 10:30-11:00
+        booking = models.BookingCreate(**booking_payload(court_id, booking_date, "10:30" if i % 2 else "10:00"))
+        db = database.SessionLocal()
+        try:
+            return crud.create_booking(db, booking)
+        finally:
+            db.close()
+
+    results = race(attempt, n)
+    assert sum(isinstance(r, database.Booking) for r in results) == 1
+    assert sum(isinstance(r, crud.SlotTakenError) for r in results) == n - 1
+    assert bookings_on(court_id, booking_date) == 1
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_post_booking_race(client, court, n):
+    booking_date = date(2032, 1, 15 + SIZES.index(n))
+    payload = booking_payload(court.id, booking_date, "18:00", duration=2)
+
+    responses = race(lambda i: client.post("/bookings/", json=payload), n)
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [200] + [409] * (n - 1)
+    assert bookings_on(court.id, booking_date) == 1
@@ -0,0 +1,34 @@
+from datetime import date
+
+from futsal_booking.backend.cache import ResponseCache
+
+DAY = date(2032, 5, 1)
+
+
+def test_put_after_invalidate_is_not_stored():
+    cache = ResponseCache(maxsize=4)
+    _, generation = cache.get(1, DAY)
+    cache.invalidate(1, DAY) # booking masuk selama payload dihitung
+    cache.put(1, DAY, {"slots": []}, generation)
+    assert cache.get(1, DAY)[0] is None
+
+    _, generation = cache.get(1, DAY)
+    cache.invalidate(2, DAY) # key lain tidak berpengaruh
+    cache.put(1, DAY, {"slots": []}, generation)
+    assert cache.get(1, DAY)[0] is not None
+
+
+def test_invalidation_history_is_bounded():
+    cache = ResponseCache(maxsize=4)
+    _, stale = cache.get(1, DAY)
+    cache.invalidate(1, DAY)
+    for court_id in range(2, 1000):
+        cache.invalidate(court_id, DAY)
+    assert len(cache._invalidated) == 4
+
+    # Invalidate key 1 sudah dilupakan: generation lama tetap ditolak, yang baru diterima
+    cache.put(1, DAY, {"slots": []}, stale)
+    assert cache.get(1, DAY)[0] is None
+    _, fresh = cache.get(1, DAY)
+    cache.put(1, DAY, {"slots": []}, fresh)
+    assert cache.get(1, DAY)[0] is not None
@@ -0,0 +1,59 @@
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from conftest import booking_payload
+from futsal_booking.backend import crud, database, models
+
+DATE_FROM = date(2032, 3, 1)
+DATE_TO = DATE_FROM + timedelta(days=6)
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # PRAGMA dari event connect & pemangkasan berkala di background tidak dihitung
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(database.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(database.engine, "before_cursor_execute", before_cursor_execute)
+
+
+def add_bookings(db, court_ids, hours: range):
+    for court_id in court_ids:
+        for day in range((DATE_TO - DATE_FROM).days + 1):
+            for hour in hours:
+                booking = models.BookingCreate(**booking_payload(court_id, DATE_FROM + timedelta(days=day), f"{hour:02d}:00"))
+                crud.create_booking(db, booking)
+
+
+def listing_queries(client) -> tuple:
+    with count_queries() as statements:
+        response = client.get("/courts/", params={"include": "bookings", "date_from": DATE_FROM, "date_to": DATE_TO})
+    assert response.status_code == 200
+    bookings = [booking for court in response.json() for booking in court["bookings"]]
+    # Listing publik: kontak pelanggan hanya lewat export dengan token operator
+    assert not any(key.startswith("customer_") for booking in bookings for key in booking)
+    return len(statements), len(bookings)
+
+
+def test_courts_with_bookings_query_count_is_constant(client, db):
+    court_ids = [court.id for court in crud.get_courts(db)]
+
+    add_bookings(db, court_ids[:1], range(8, 9))
+    queries, bookings = listing_queries(client)
+    assert bookings == 7
+    assert queries == 2
+
+    # Semua lapangan terisi penuh hampir sepanjang hari: jumlah query tetap sama
+    add_bookings(db, court_ids, range(9, 21))
+    queries, bookings = listing_queries(client)
+    assert bookings == 7 + len(court_ids) * 7 * 12
+    assert queries == 2
@@ -0,0 +1,41 @@
+import tracemalloc
+from datetime import date
+from pathlib import Path
+
+from futsal_booking.backend import config, crud, database, export
+from futsal_booking.benchmarks.export_memory import seed_rows
+
+ROWS = 50_000
+START = date(2030, 1, 1)
+# Heap Python (tracemalloc) selama export; page cache SQLite tidak ikut terhitung. Tanpa
+# streaming, 50k baris saja sudah puluhan MiB
+MAX_PEAK_MB = 8
+
+
+def test_export_streams_in_constant_memory(db):
+    courts = len(crud.get_courts(db))
+    end = seed_rows(Path(database.engine.url.database), ROWS, courts, START)
+
+    for format, (write_chunks, _) in export.FORMATS.items():
+        lines = 0
+        tracemalloc.start()
+        try:
+            for chunk in write_chunks(export.iter_rows(START, end)):
+                lines += chunk.count(b"\n")
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert lines - (format == "csv") == ROWS, format
+        assert peak / 2**20 < MAX_PEAK_MB, format
+
+
+def test_export_requires_operator_token(client, monkeypatch):
+    params = {"date_from": START.isoformat(), "date_to": START.isoformat()}
+    monkeypatch.setattr(config, "EXPORT_TOKEN", None)
+    assert client.get("/bookings/export", params=params, headers={"X-Export-Token": ""}).status_code == 403
+
+    monkeypatch.setattr(config, "EXPORT_TOKEN", "operator-secret")
+    assert client.get("/bookings/export", params=params).status_code == 403
+    assert client.get("/bookings/export", params=params, headers={"X-Export-Token": "guess"}).status_code == 403
+    assert client.get("/bookings/export", params=params, headers={"X-Export-Token": "operator-secret"}).status_code == 200
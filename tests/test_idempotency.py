@@ -0,0 +1,60 @@
+from datetime import date
+
+from conftest import booking_payload, bookings_on, race
+
+
+def post(client, payload: dict, key: str):
+    return client.post("/bookings/", json=payload, headers={"Idempotency-Key": key})
+
+
+def test_retry_replays_stored_response(client, court):
+    payload = booking_payload(court.id, date(2032, 6, 1), "10:00")
+    first = post(client, payload, "replay-ok")
+    assert first.status_code == 200
+    assert "Idempotent-Replayed" not in first.headers
+
+    replay = post(client, payload, "replay-ok")
+    assert replay.status_code == 200
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.json() == first.json()
+    assert bookings_on(court.id, date(2032, 6, 1)) == 1
+
+
+def test_retry_replays_final_conflict(client, court):
+    payload = booking_payload(court.id, date(2032, 6, 2), "10:00")
+    assert client.post("/bookings/", json=payload).status_code == 200
+
+    first = post(client, payload, "replay-conflict")
+    assert first.status_code == 409
+    replay = post(client, payload, "replay-conflict")
+    assert replay.status_code == 409
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.json() == first.json()
+
+
+def test_hold_conflict_is_not_stored(client, court):
+    payload = booking_payload(court.id, date(2032, 6, 3), "10:00")
+    assert post(client, {**payload, "hold_id": "expired"}, "hold-retry").status_code == 409
+    # Retry dengan hold yang valid (di sini: tanpa hold) dieksekusi ulang, bukan replay 409
+    retry = post(client, payload, "hold-retry")
+    assert retry.status_code == 200
+    assert "Idempotent-Replayed" not in retry.headers
+
+
+def test_reused_key_with_different_body_is_rejected(client, court):
+    payload = booking_payload(court.id, date(2032, 6, 4), "10:00")
+    assert post(client, payload, "reused").status_code == 200
+    response = post(client, {**payload, "start_time": "12:00"}, "reused")
+    assert response.status_code == 422
+    assert bookings_on(court.id, date(2032, 6, 4)) == 1
+
+
+def test_concurrent_duplicates_create_one_booking(client, court):
+    booking_date = date(2032, 6, 5)
+    payload = booking_payload(court.id, booking_date, "10:00")
+
+    responses = race(lambda i: post(client, payload, "double-submit"), 16)
+    assert [response.status_code for response in responses] == [200] * 16
+    assert len({response.json()["id"] for response in responses}) == 1
+    assert sum(response.headers.get("Idempotent-Replayed") == "true" for response in responses) == 15
+    assert bookings_on(court.id, booking_date) == 1
@@ -0,0 +1,82 @@
+import random
+from typing import List, Optional, Set, Tuple
+
+from futsal_booking.backend.occupancy import EMPTY, Intervals
+
+# Skenario acak: booking dengan jam mulai & durasi kelipatan 15 menit ditambah/dihapus
+# berurutan, dibandingkan dengan referensi brute force berupa himpunan menit terisi.
+# overlap, free_gaps, free_starts dan union harus sama persis.
+CASES = 2000
+
+DAY = 24 * 60
+STEP = 15
+
+
+def random_range(rng: random.Random) -> Tuple[int, int]:
+    start = rng.randrange(0, DAY, STEP)
+    return start, min(DAY, start + rng.randrange(1, 16) * STEP)
+
+
+def minutes(ranges) -> Set[int]:
+    return {minute for start, end in ranges for minute in range(start, end)}
+
+
+def ref_overlap(taken: Set[int], start: int, end: int) -> Optional[int]:
+    return next((minute for minute in range(start, end) if minute in taken), None)
+
+
+def ref_gaps(taken: Set[int], lo: int, hi: int) -> List[Tuple[int, int]]:
+    gaps = []
+    for minute in range(lo, hi):
+        if minute in taken:
+            continue
+        if gaps and gaps[-1][1] == minute:
+            gaps[-1] = (gaps[-1][0], minute + 1)
+        else:
+            gaps.append((minute, minute + 1))
+    return gaps
+
+
+def ref_free_starts(taken: Set[int], lo: int, hi: int, length: int, step: int) -> List[int]:
+    first = -(-lo // step) * step
+    return [t for t in range(first, hi - length + 1, step) if not any(m in taken for m in range(t, t + length))]
+
+
+def check_case(seed: int) -> Optional[str]:
+    """None jika semua operasi cocok dengan referensi, atau deskripsi selisih pertama."""
+    rng = random.Random(seed)
+    intervals, taken = EMPTY, set()
+    for _ in range(rng.randrange(1, 40)):
+        start, end = random_range(rng)
+        if rng.random() < 0.75:
+            intervals, taken = intervals.add(start, end), taken | set(range(start, end))
+        else:
+            intervals, taken = intervals.remove(start, end), taken - set(range(start, end))
+
+        # Invarian: terurut, tidak tumpang tindih & tidak berdempetan, isinya sama
+        pairs = list(intervals)
+        if any(s >= e for s, e in pairs) or any(pairs[i][1] >= pairs[i + 1][0] for i in range(len(pairs) - 1)):
+            return f"not normalized: {intervals}"
+        if minutes(pairs) != taken:
+            return f"content mismatch: {intervals}"
+
+        query = random_range(rng)
+        if intervals.overlap(*query) != ref_overlap(taken, *query):
+            return f"overlap{query}: {intervals.overlap(*query)} != {ref_overlap(taken, *query)} in {intervals}"
+        lo, hi = sorted(rng.sample(range(0, DAY + 1, 5), 2))
+        if intervals.free_gaps(lo, hi) != ref_gaps(taken, lo, hi):
+            return f"free_gaps({lo}, {hi}) in {intervals}"
+        length, step = rng.randrange(1, 9) * STEP, rng.choice([15, 30, 60])
+        if intervals.free_starts(lo, hi, length, step) != ref_free_starts(taken, lo, hi, length, step):
+            return f"free_starts({lo}, {hi}, {length}, {step}) in {intervals}"
+
+        other = Intervals.from_ranges(random_range(rng) for _ in range(rng.randrange(0, 5)))
+        if minutes(intervals.union(other)) != taken | minutes(other):
+            return f"union with {other} in {intervals}"
+    return None
+
+
+def test_intervals_match_brute_force():
+    for seed in range(1, CASES + 1):
+        error = check_case(seed)
+        assert error is None, f"seed {seed}: {error}"
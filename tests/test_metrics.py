@@ -0,0 +1,30 @@
+from datetime import date
+
+import pytest
+
+from conftest import booking_payload
+from futsal_booking.backend import crud, database, metrics, models
+
+CONFLICTS = 3
+
+
+def test_failed_statements_are_counted(client, court):
+    booking = models.BookingCreate(**booking_payload(court.id, date(2032, 4, 1), "10:00"))
+    stats = metrics.RequestStats(record_sql=True)
+    token = metrics.current_request.set(stats)
+    db = database.SessionLocal()
+    try:
+        crud.create_booking(db, booking)
+        for _ in range(CONFLICTS):
+            # Insert booking_slots ditolak unique constraint (IntegrityError di balik 409)
+            with pytest.raises(crud.SlotTakenError):
+                crud.create_booking(db, booking)
+        connection = db.connection()
+        assert not any(key.startswith("futsal_") for key in connection.info)
+    finally:
+        db.close()
+        metrics.current_request.reset(token)
+
+    # Booking pertama: satu insert (RETURNING id) per slot; tiap konflik: satu insert yang gagal
+    slot_inserts = [q for q in stats.queries if q[0].lstrip().upper().startswith("INSERT INTO BOOKING_SLOTS")]
+    assert len(slot_inserts) == 60 // database.SLOT_MINUTES + CONFLICTS
@@ -0,0 +1,10 @@
+from anyio import to_thread
+
+from futsal_booking.backend import config
+
+
+def test_threadpool_size_is_applied(client):
+    async def limit():
+        return to_thread.current_default_thread_limiter().total_tokens
+
+    assert client.portal.call(limit) == config.THREADPOOL_SIZE
@@ -0,0 +1,31 @@
+import pytest
+
+from conftest import booking_payload
+from futsal_booking.backend import models
+
+
+@pytest.mark.parametrize("value", [1, 1.5, 0.5, 24])
+def test_valid_durations(value):
+    assert models.validate_duration(value) == value
+
+
+@pytest.mark.parametrize("value", [0, -1, 0.25, 1.2, 24.5, 1e308, float("inf"), float("-inf"), float("nan")])
+def test_invalid_durations(value):
+    with pytest.raises(ValueError):
+        models.validate_duration(value)
+
+
+@pytest.mark.parametrize("duration, status", [("inf", 422), ("1e308", 422), ("25", 422), ("nan", 400), ("0.1", 400)])
+def test_duration_query_rejected(client, court, duration, status):
+    for path, params in [
+        (f"/courts/{court.id}/availability", {"date": "2032-02-02"}),
+        ("/courts/free", {"date": "2032-02-02", "start_time": "10:00"}),
+    ]:
+        response = client.get(path, params={**params, "duration": duration})
+        assert response.status_code == status, path
+        assert "convert" not in response.json()["detail"]
+
+
+def test_duration_body_rejected(client, court):
+    response = client.post("/bookings/", json=booking_payload(court.id, "2032-02-02", "10:00", duration=1e308))
+    assert response.status_code == 422